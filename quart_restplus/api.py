@@ -25,14 +25,17 @@ from quart.datastructures import Headers
 from jsonschema import RefResolver
 from cached_property import cached_property
 
-from . import apidoc
+from . import apidoc, marshalling, mask
 from .mask import ParseError, MaskError
 from .namespace import Namespace
 from .postman import PostmanCollectionV1
 from .resource import Resource
 from .swagger import Swagger
-from .utils import default_id, camel_to_dash, unpack
-from .representations import output_json
+from .utils import default_id, camel_to_dash, unpack, LRUCache
+from .validation import VALIDATION_BACKENDS
+from .offload import make_offloader, OFFLOAD_MIN_ITEMS, OFFLOAD_MIN_BYTES
+from .profiling import PROFILE_RATE
+from .representations import output_json, make_json_encoder, STREAM_CHUNK_SIZE
 from .exceptions import NotAcceptable
 
 RE_RULES = re.compile('(<.*>)')
@@ -205,8 +208,42 @@ class Api:
 
         self._register_apidoc(app)
         self._validate = self._validate if self._validate is not None else app.config.get('RESTPLUS_VALIDATE', False)
+        app.config.setdefault('RESTPLUS_VALIDATION_BACKEND', 'jsonschema')
+        if app.config['RESTPLUS_VALIDATION_BACKEND'] not in VALIDATION_BACKENDS:
+            raise ValueError('Unknown validation backend "{0}"'.format(app.config['RESTPLUS_VALIDATION_BACKEND']))
         app.config.setdefault('RESTPLUS_MASK_HEADER', 'X-Fields')
         app.config.setdefault('RESTPLUS_MASK_SWAGGER', True)
+        app.config.setdefault('RESTPLUS_MASK_QUERY_PARAM', None)
+        app.config.setdefault('RESTPLUS_MASK_QUERY_REDIRECT', True)
+        app.config.setdefault('RESTPLUS_MASK_CACHE_SIZE', marshalling.MASKED_MARSHALLERS_CACHE_SIZE)
+        app.config.setdefault('RESTPLUS_MASK_PARSE_CACHE_SIZE', mask.MASKS_CACHE_SIZE)
+        app.config.setdefault('RESTPLUS_MASK_MAX_LENGTH', mask.MASK_MAX_LENGTH)
+        app.config.setdefault('RESTPLUS_MASK_MAX_FIELDS', mask.MASK_MAX_FIELDS)
+        app.config.setdefault('RESTPLUS_MASK_MAX_DEPTH', mask.MASK_MAX_DEPTH)
+        app.config.setdefault('RESTPLUS_STREAM_CHUNK_SIZE', STREAM_CHUNK_SIZE)
+        app.config.setdefault('RESTPLUS_DIRECT_SERIALIZATION', False)
+        app.config.setdefault('RESTPLUS_MARSHAL_ASYNC_MIN_ITEMS', marshalling.MARSHAL_ASYNC_MIN_ITEMS)
+        app.config.setdefault('RESTPLUS_MARSHAL_ASYNC_CHUNK_SIZE', marshalling.MARSHAL_ASYNC_CHUNK_SIZE)
+        app.config.setdefault('RESTPLUS_MARSHAL_ASYNC_BUDGET', marshalling.MARSHAL_ASYNC_BUDGET)
+        app.config.setdefault('RESTPLUS_MARSHAL_ASYNC_CONCURRENCY', marshalling.MARSHAL_ASYNC_CONCURRENCY)
+        app.config.setdefault('RESTPLUS_RESOLVE_AWAITABLES', False)
+        app.config.setdefault('RESTPLUS_OFFLOAD_EXECUTOR', None)
+        app.config.setdefault('RESTPLUS_OFFLOAD_WORKERS', None)
+        app.config.setdefault('RESTPLUS_OFFLOAD_MIN_ITEMS', OFFLOAD_MIN_ITEMS)
+        app.config.setdefault('RESTPLUS_OFFLOAD_MIN_BYTES', OFFLOAD_MIN_BYTES)
+        app.config.setdefault('RESTPLUS_PROFILE_RATE', PROFILE_RATE)
+        app.config.setdefault('RESTPLUS_PROFILE_HEADER', None)
+        restplus = app.extensions.setdefault('restplus', {})
+        if restplus.get('masked_marshallers') is None:
+            restplus['masked_marshallers'] = LRUCache(app.config['RESTPLUS_MASK_CACHE_SIZE'])
+        if restplus.get('masks') is None:
+            restplus['masks'] = LRUCache(app.config['RESTPLUS_MASK_PARSE_CACHE_SIZE'])
+        if restplus.get('offloader') is None:
+            restplus['offloader'] = make_offloader(app.config)
+        restplus['json_encoders'] = (
+            make_json_encoder(app.config),
+            make_json_encoder(app.config, debug=True),
+        )
 
     def __getattr__(self, name):
         try:
@@ -3,17 +3,22 @@ import re
 import fnmatch
 import inspect
 
+from array import array
 from calendar import timegm
 from datetime import date, datetime
 from decimal import Decimal, ROUND_HALF_EVEN
 from email.utils import formatdate
+from functools import lru_cache
+from operator import attrgetter, itemgetter
+from string import Formatter
 from urllib.parse import urlparse, urlunparse
 
-from quart import url_for, request
+from quart import url_for, request, _app_ctx_stack, _request_ctx_stack
 from cached_property import cached_property
 
 from .inputs import date_from_iso8601, datetime_from_iso8601, datetime_from_rfc822, boolean
 from .errors import RestError
+from .loaders import Loader
 from .marshalling import marshal
 from .utils import camel_to_dash, not_none
 
@@ -23,6 +28,20 @@ __all__ = ('Raw', 'String', 'FormattedString', 'Url', 'DateTime', 'Date',
            'Nested', 'List', 'ClassName', 'Polymorph', 'Wildcard',
            'StringMixin', 'MinMaxMixin', 'NumberMixin', 'MarshallingError')
 
+#: The maximum number of compiled keys accessors kept in cache
+ACCESSORS_CACHE_SIZE = 1024
+
+#: The maximum number of precompiled ``Url`` endpoints kept in cache
+URL_RULES_CACHE_SIZE = 256
+
+#: The maximum number of RFC 822 formatted timestamps kept in cache
+RFC822_CACHE_SIZE = 4096
+
+_FORMAT_NAME = re.compile(r'[^.\[]*')
+
+#: The iterable types formatted at once by ``List`` of primitive values
+_SEQUENCE_TYPES = (list, tuple, set, frozenset, range, array)
+
 
 class MarshallingError(RestError):
     """
@@ -40,12 +59,130 @@ def is_indexable_but_not_string(obj):
 
 def get_value(key, obj, default=None):
     """Helper for pulling a keyed value off various types of objects"""
+    if callable(key):
+        return key(obj)
+    return _compile_accessor(key)(obj, default)
+
+
+def compile_accessor(key, many=False):
+    """
+    Compile a field key or attribute into an accessor.
+
+    Dotted keys are split once into a chain of accessors
+    and plain dicts are read without probing the object type.
+    Instances of classes without ``__getitem__`` (plain classes, dataclasses, ``__slots__`` classes)
+    and namedtuples are read as attributes directly.
+    The returned accessor behaves exactly like :func:`get_value`.
+
+    :param key: a field key or attribute (string, integer or callable)
+    :param bool many: whether to compile an accessor reading a list of objects at once
+                      (homogeneous lists of dicts or objects are read by C-level getters)
+    :return: an ``accessor(obj, default=None)`` function
+             or an ``accessor(objs, default=None)`` function returning a list if ``many`` is ``True``
+    """
+    if callable(key):
+        if many:
+            return lambda objs, default=None: [key(obj) for obj in objs]
+        return lambda obj, default=None: key(obj)
+    return _compile_many_accessor(key) if many else _compile_accessor(key)
+
+
+@lru_cache(maxsize=ACCESSORS_CACHE_SIZE)
+def _compile_accessor(key):
     if isinstance(key, int):
+        return _key_accessor(key)
+    keys = key.split('.')
+    if len(keys) == 1:
+        return _key_accessor(key)
+    accessors = [_key_accessor(k) for k in keys]
+
+    def accessor(obj, default=None):
+        for get in accessors:
+            obj = get(obj, default)
+        return obj
+
+    return accessor
+
+
+@lru_cache(maxsize=ACCESSORS_CACHE_SIZE)
+def _compile_many_accessor(key):
+    accessor = _compile_accessor(key)
+    if not isinstance(key, str) or '.' in key:
+        return lambda objs, default=None: [accessor(obj, default) for obj in objs]
+    get_item = itemgetter(key)
+    get_attribute = attrgetter(key)
+
+    def many(objs, default=None):
+        types = set(map(type, objs))
+        if len(types) == 1:
+            cls = types.pop()
+            try:
+                if cls is dict:
+                    return list(map(get_item, objs))
+                elif _attributes_only(cls):
+                    return list(map(get_attribute, objs))
+            except (KeyError, AttributeError):
+                # Missing values are handled one by one
+                pass
+        return [accessor(obj, default) for obj in objs]
+
+    return many
+
+
+@lru_cache(maxsize=ACCESSORS_CACHE_SIZE)
+def _compile_glob(pattern):
+    return re.compile(fnmatch.translate(pattern), re.IGNORECASE).match
+
+
+def _key_accessor(key):
+    if not isinstance(key, str):
+        def accessor(obj, default=None):
+            if type(obj) is dict:
+                try:
+                    return obj[key]
+                except KeyError:
+                    return getattr(obj, key, default)
+            return _get_value_for_key(key, obj, default)
+
+        return accessor
+
+    def accessor(obj, default=None):
+        cls = type(obj)
+        if cls is dict:
+            try:
+                return obj[key]
+            except KeyError:
+                return getattr(obj, key, default)
+        elif _attributes_only(cls):
+            return getattr(obj, key, default)
         return _get_value_for_key(key, obj, default)
-    elif callable(key):
-        return key(obj)
-    else:
-        return _get_value_for_keys(key.split('.'), obj, default)
+
+    return accessor
+
+
+@lru_cache(maxsize=ACCESSORS_CACHE_SIZE)
+def _attributes_only(cls):
+    """
+    Whether string keys are always read as attributes on instances of a class:
+    classes without ``__getitem__`` (plain classes, dataclasses, ``__slots__`` classes)
+    and namedtuples (whose fields are attributes, tuples only being indexable by integers).
+    """
+    return not hasattr(cls, '__getitem__') or (issubclass(cls, tuple) and cls.__getitem__ is tuple.__getitem__)
+
+
+@lru_cache(maxsize=ACCESSORS_CACHE_SIZE)
+def _slot_names(cls):
+    """
+    The ``__slots__`` declared along a class hierarchy.
+
+    :return: a tuple of names or ``None`` if there is none
+    """
+    names = []
+    for klass in reversed(cls.__mro__):
+        slots = klass.__dict__.get('__slots__', ())
+        slots = (slots,) if isinstance(slots, str) else slots
+        names.extend(name for name in slots if name not in ('__dict__', '__weakref__'))
+    return tuple(dict.fromkeys(names)) or None
 
 
 def _get_value_for_keys(keys, obj, default):
@@ -76,12 +213,66 @@ def to_marshallable_type(obj):
     if hasattr(obj, '__marshallable__'):
         return obj.__marshallable__()
 
+    if isinstance(obj, tuple) and hasattr(obj, '_asdict'):
+        return obj._asdict()  # namedtuple
+
     if hasattr(obj, '__getitem__'):
         return obj  # it is indexable it is ok
 
+    names = None if hasattr(obj, '__dict__') else _slot_names(type(obj))
+    if names is not None:
+        # ``__slots__`` classes (including slotted dataclasses)
+        return dict((name, getattr(obj, name)) for name in names if hasattr(obj, name))
+
     return dict(obj.__dict__)
 
 
+def _marshallable_values(obj):
+    """Same as :func:`to_marshallable_type` without copying the objects ``__dict__`` (read-only)"""
+    if obj is None or hasattr(obj, '__marshallable__') or hasattr(obj, '__getitem__'):
+        return to_marshallable_type(obj)
+    values = getattr(obj, '__dict__', None)
+    return to_marshallable_type(obj) if values is None else values
+
+
+@lru_cache(maxsize=RFC822_CACHE_SIZE)
+def _format_rfc822(dt):
+    """Format a whole-second datetime in RFC 822 (equal timestamps share the same cache entry)"""
+    return formatdate(timegm(dt.utctimetuple()))
+
+
+def _make_loader(loader):
+    if loader is None or isinstance(loader, Loader):
+        return loader
+    return Loader(loader)
+
+
+def _format_names(src_str):
+    """
+    Get the top-level names referenced by a format string (including nested format specs).
+
+    :return: a tuple of names or ``None`` if the format string is invalid or uses positional arguments
+    """
+    names = []
+    try:
+        parsed = list(Formatter().parse(src_str))
+    except ValueError:
+        return None
+    for _, field_name, format_spec, _ in parsed:
+        if field_name is None:
+            continue
+        name = _FORMAT_NAME.match(field_name).group()
+        if not name or name.isdigit():
+            return None
+        names.append(name)
+        if format_spec and '{' in format_spec:
+            nested = _format_names(format_spec)
+            if nested is None:
+                return None
+            names.extend(nested)
+    return tuple(dict.fromkeys(names))
+
+
 class Raw(object):
     """
     Raw provides a base field class from which others should extend. It
@@ -107,6 +298,9 @@ class Raw(object):
     __schema_format__ = None
     #: An optional JSON/Swagger schema example
     __schema_example__ = None
+    #: Whether or not the custom :meth:`format` can run outside of the request context
+    #: (ie. be offloaded to an executor)
+    context_free = False
 
     def __init__(self, default=None, attribute=None, title=None, description=None,
                  required=None, readonly=None, example=None, mask=None, **kwargs):
@@ -136,6 +330,22 @@ class Raw(object):
         """
         return value
 
+    def format_many(self, values):
+        """
+        Formats a batch of values at once (used by the column-wise marshalling).
+        Calls :meth:`format` on each value by default - field classes
+        may override this to avoid per-value dispatch.
+
+        Only overrides defined along with or after :meth:`format`
+        in the class hierarchy are used, so overriding :meth:`format` alone is always safe.
+
+        :param list values: The values to format (never ``None``)
+        :raises MarshallingError: In case of formatting problem
+        :rtype: list
+        """
+        fmt = self.format
+        return [fmt(value) for value in values]
+
     def output(self, key, obj, **kwargs):
         """
         Pulls the value for the given key from the object, applies the
@@ -192,6 +402,9 @@ class Nested(Raw):
     :param bool skip_none: Optional key will be used to eliminate inner fields
                            which value is None or the inner field's key not
                            exist in data
+    :param key: An optional attribute holding the key of the nested object to load with ``loader``
+    :param loader: An optional :class:`~loaders.Loader` (or async batch function)
+                   loading the nested objects by key
     :param kwargs: If ``default`` keyword argument is present, a nested
         dictionary will be marshaled as its value if nested dictionary is
         all-null keys (e.g. lets you return an empty JSON object instead of
@@ -199,11 +412,13 @@ class Nested(Raw):
     """
     __schema_type__ = None
 
-    def __init__(self, model, allow_null=False, skip_none=False, as_list=False, **kwargs):
+    def __init__(self, model, allow_null=False, skip_none=False, as_list=False, key=None, loader=None, **kwargs):
         self.model = model
         self.as_list = as_list
         self.allow_null = allow_null
         self.skip_none = skip_none
+        self.key = key
+        self.loader = _make_loader(loader)
         super(Nested, self).__init__(**kwargs)
 
     @property
@@ -251,11 +466,16 @@ class List(Raw):
     See :ref:`list-field` for more information.
 
     :param cls_or_instance: The field type the list will contain.
+    :param key: An optional attribute holding the keys of the items to load with ``loader``
+    :param loader: An optional :class:`~loaders.Loader` (or async batch function)
+                   loading the items by key
     """
     def __init__(self, cls_or_instance, **kwargs):
         self.min_items = kwargs.pop('min_items', None)
         self.max_items = kwargs.pop('max_items', None)
         self.unique = kwargs.pop('unique', None)
+        self.key = kwargs.pop('key', None)
+        self.loader = _make_loader(kwargs.pop('loader', None))
         super(List, self).__init__(**kwargs)
         error_msg = 'The type of the list elements must be a subclass of fields.Raw'
         if isinstance(cls_or_instance, type):
@@ -268,6 +488,44 @@ class List(Raw):
             self.container = cls_or_instance
 
     def format(self, value):
+        kernel = self._kernel
+        if kernel is not None and type(value) in _SEQUENCE_TYPES:
+            formatted = kernel(value)
+            if formatted is not None:
+                return formatted
+        return self._format_items(value)
+
+    @cached_property
+    def _kernel(self):
+        """
+        A batch formatter for lists of primitive values,
+        mapping the container formatter directly over the values.
+
+        ``None`` if the container needs the per-item ``output()``.
+        """
+        # ugly local import to avoid dependency loop
+        from .marshalling import _format_many
+
+        container = self.container
+        if container.attribute is not None or container.mask or type(container).output is not Raw.output:
+            return None
+        format_many = _format_many(container)
+        # Dicts items are looked up by index by the per-item path (except for Raw)
+        raw = type(container) is Raw
+
+        def kernel(values):
+            types = set(map(type, values))
+            if type(None) in types or (not raw and any(issubclass(t, dict) for t in types)):
+                return None
+            try:
+                return format_many(values)
+            except MarshallingError:
+                # Let the per-item path report the faulty item
+                return None
+
+        return kernel
+
+    def _format_items(self, value):
         # Convert all instances in typed list to container type
         if isinstance(value, set):
             value = list(value)
@@ -306,10 +564,17 @@ class List(Raw):
     def clone(self, mask=None):
         kwargs = self.__dict__.copy()
         model = kwargs.pop('container')
+        kwargs.pop('_kernel', None)
         if mask:
             model = mask.apply(model)
         return self.__class__(model, **kwargs)
 
+    def __getstate__(self):
+        # The kernel is bound to the current container
+        state = self.__dict__.copy()
+        state.pop('_kernel', None)
+        return state
+
 
 class StringMixin(object):
     __schema_type__ = 'string'
@@ -371,6 +636,12 @@ class String(StringMixin, Raw):
         except ValueError as ve:
             raise MarshallingError(ve)
 
+    def format_many(self, values):
+        try:
+            return list(map(str, values))
+        except ValueError as ve:
+            raise MarshallingError(ve)
+
     def schema(self):
         enum = self._v('enum')
         schema = super(String, self).schema()
@@ -397,6 +668,12 @@ class Integer(NumberMixin, Raw):
         except ValueError as ve:
             raise MarshallingError(ve)
 
+    def format_many(self, values):
+        try:
+            return list(map(int, values))
+        except ValueError as ve:
+            raise MarshallingError(ve)
+
 
 class Float(NumberMixin, Raw):
     """
@@ -411,6 +688,12 @@ class Float(NumberMixin, Raw):
         except ValueError as ve:
             raise MarshallingError(ve)
 
+    def format_many(self, values):
+        try:
+            return list(map(float, values))
+        except ValueError as ve:
+            raise MarshallingError(ve)
+
 
 class Arbitrary(NumberMixin, Raw):
     """
@@ -440,6 +723,16 @@ class Fixed(NumberMixin, Raw):
             raise MarshallingError('Invalid Fixed precision number.')
         return str(dvalue.quantize(self.precision, rounding=ROUND_HALF_EVEN))
 
+    def format_many(self, values):
+        precision = self.precision
+        formatted = []
+        for value in values:
+            dvalue = Decimal(value)
+            if not dvalue.is_normal() and dvalue != ZERO:
+                raise MarshallingError('Invalid Fixed precision number.')
+            formatted.append(str(dvalue.quantize(precision, rounding=ROUND_HALF_EVEN)))
+        return formatted
+
 
 class Boolean(Raw):
     """
@@ -452,6 +745,9 @@ class Boolean(Raw):
     def format(self, value):
         return boolean(value)
 
+    def format_many(self, values):
+        return list(map(boolean, values))
+
 
 class DateTime(MinMaxMixin, Raw):
     """
@@ -484,18 +780,58 @@ class DateTime(MinMaxMixin, Raw):
             raise ValueError('Unsupported DateTime format')
 
     def format(self, value):
-        try:
-            value = self.parse(value)
-            if self.dt_format == 'iso8601':
-                return self.format_iso8601(value)
-            elif self.dt_format == 'rfc822':
-                return self.format_rfc822(value)
-            else:
-                raise MarshallingError(
-                    'Unsupported date format %s' % self.dt_format
-                )
-        except (AttributeError, ValueError) as e:
-            raise MarshallingError(e)
+        return self.formatter(value)
+
+    def format_many(self, values):
+        return list(map(self.formatter, values))
+
+    @cached_property
+    def formatter(self):
+        """
+        The values formatter, chosen once according to ``dt_format``.
+
+        Native :class:`~datetime.datetime` and :class:`~datetime.date` values are formatted directly
+        unless :meth:`parse` or the format method are overridden.
+        """
+        if self.dt_format == 'iso8601':
+            fmt = self.format_iso8601
+        elif self.dt_format == 'rfc822':
+            fmt = self.format_rfc822
+        else:
+            fmt = None
+        parse = self.parse
+
+        def generic(value):
+            if fmt is None:
+                raise MarshallingError('Unsupported date format %s' % self.dt_format)
+            try:
+                return fmt(parse(value))
+            except (AttributeError, ValueError) as e:
+                raise MarshallingError(e)
+
+        if fmt is None or type(self).parse is not DateTime.parse:
+            return generic
+        if fmt.__func__ is DateTime.format_iso8601:
+            def format_iso8601(value):
+                cls = type(value)
+                if cls is datetime:
+                    return value.isoformat()
+                elif cls is date:
+                    return value.isoformat() + 'T00:00:00'
+                return generic(value)
+
+            return format_iso8601
+        elif fmt.__func__ is DateTime.format_rfc822:
+            def format_rfc822(value):
+                cls = type(value)
+                if cls is datetime:
+                    return _format_rfc822(value.replace(microsecond=0) if value.microsecond else value)
+                elif cls is date:
+                    return _format_rfc822(datetime(value.year, value.month, value.day))
+                return generic(value)
+
+            return format_rfc822
+        return generic
 
     def format_rfc822(self, dt):
         """
@@ -504,7 +840,7 @@ class DateTime(MinMaxMixin, Raw):
         :param datetime dt: The datetime to transform
         :return: A RFC 822 formatted date string
         """
-        return formatdate(timegm(dt.utctimetuple()))
+        return _format_rfc822(dt.replace(microsecond=0) if dt.microsecond else dt)
 
     def format_iso8601(self, dt):
         """
@@ -551,6 +887,22 @@ class Date(DateTime):
         else:
             raise ValueError('Unsupported Date format')
 
+    @cached_property
+    def formatter(self):
+        generic = super(Date, self).formatter
+        if type(self).parse is not Date.parse or type(self).format_iso8601 is not DateTime.format_iso8601:
+            return generic
+
+        def format_iso8601(value):
+            cls = type(value)
+            if cls is date:
+                return value.isoformat()
+            elif cls is datetime:
+                return value.date().isoformat()
+            return generic(value)
+
+        return format_iso8601
+
 
 class Url(StringMixin, Raw):
     """
@@ -567,9 +919,48 @@ class Url(StringMixin, Raw):
         self.scheme = scheme
 
     def output(self, key, obj, **kwargs):
+        return self.builder()(obj)
+
+    def builder(self):
+        """
+        Resolve the endpoint rules, the scheme and the host for the current context.
+
+        The returned function only substitutes an object variables into the precompiled rules
+        (falling back on :func:`~quart.url_for` for unsupported routing features).
+
+        :return: a function building the url of an object
+        :rtype: callable
+        """
+        endpoint = self.endpoint if self.endpoint is not None else request.endpoint
+        adapter, candidates = _url_candidates(endpoint)
+        if candidates is None:
+            return lambda obj: self.build(endpoint, obj)
+        prefix = ''
+        if self.absolute:
+            scheme = self.scheme if self.scheme is not None else adapter.scheme
+            prefix = '{0}://{1}'.format(scheme, adapter.server_name)
+
+        def build(obj):
+            data = _marshallable_values(obj)
+            if isinstance(data, dict):
+                for path, converters, defaults in candidates:
+                    if all(name in data for name, _ in converters) and all(
+                            data[name] == value for name, value in defaults if name in data):
+                        try:
+                            url = path.format(**dict((name, to_url(data[name])) for name, to_url in converters))
+                        except TypeError as te:
+                            raise MarshallingError(te)
+                        if '?' in url or '#' in url or ';' in url:
+                            url = urlparse(url).path
+                        return prefix + url
+            return self.build(endpoint, obj)
+
+        return build
+
+    def build(self, endpoint, obj):
+        """Build an object url with :func:`~quart.url_for`"""
         try:
             data = to_marshallable_type(obj)
-            endpoint = self.endpoint if self.endpoint is not None else request.endpoint
             o = urlparse(url_for(endpoint, _external=self.absolute, **data))
             if self.absolute:
                 scheme = self.scheme if self.scheme is not None else o.scheme
@@ -579,6 +970,46 @@ class Url(StringMixin, Raw):
             raise MarshallingError(te)
 
 
+def _url_candidates(endpoint):
+    app_context = _app_ctx_stack.top
+    request_context = _request_ctx_stack.top
+    if request_context is not None:
+        adapter = request_context.url_adapter
+    else:
+        adapter = getattr(app_context, 'url_adapter', None)
+    if adapter is None or not endpoint or endpoint.startswith('.'):
+        return adapter, None
+    # URL defaults functions may alter the url values
+    preprocessors = app_context.app.url_value_preprocessors
+    if preprocessors.get(None) or ('.' in endpoint and preprocessors.get(endpoint.rsplit('.', 1)[0])):
+        return adapter, None
+    rules = adapter.map.endpoints.get(endpoint)
+    if not rules:
+        return adapter, None
+    return adapter, _compile_url_rules(adapter.map, endpoint, len(rules))
+
+
+@lru_cache(maxsize=URL_RULES_CACHE_SIZE)
+def _compile_url_rules(url_map, endpoint, count):
+    """
+    Precompile an endpoint rules (in build order) into path templates.
+
+    The rules count is part of the cache key to handle late registered rules.
+    """
+    candidates = []
+    for rule in url_map.endpoints[endpoint]:
+        builder = getattr(rule, '_builder', None)
+        converters = getattr(rule, '_converters', None)
+        if url_map.host_matching or rule.host or builder is None or converters is None:
+            return None
+        candidates.append((
+            builder.split('|', 1)[1],
+            tuple((name, converter.to_url) for name, converter in converters.items()),
+            tuple(rule.defaults.items()),
+        ))
+    return tuple(candidates)
+
+
 class FormattedString(StringMixin, Raw):
     """
     FormattedString is used to interpolate other values from
@@ -602,9 +1033,17 @@ class FormattedString(StringMixin, Raw):
     def __init__(self, src_str, **kwargs):
         super(FormattedString, self).__init__(**kwargs)
         self.src_str = str(src_str)
+        #: The top-level names referenced by the format string (``None`` if they can't be extracted)
+        self.names = _format_names(self.src_str)
 
     def output(self, key, obj, **kwargs):
+        names = self.names
         try:
+            if names is not None:
+                data = _marshallable_values(obj)
+                if isinstance(data, dict):
+                    # Only fetch the referenced values
+                    return self.src_str.format_map({name: data[name] for name in names})
             data = to_marshallable_type(obj)
             return self.src_str.format(**data)
         except (TypeError, IndexError) as error:
@@ -661,18 +1100,54 @@ class Polymorph(Nested):
             elif self.default is not None:
                 return self.default
 
-        # Handle mappings
-        if not hasattr(value, '__class__'):
-            raise ValueError('Polymorph field only accept class instances')
+        return self.marshaller(value, ordered)(value)
+
+    def marshaller(self, value, ordered=False):
+        """
+        Get the compiled marshaller of the model mapped to a value class.
+
+        The mapping is resolved once per class (and ``ordered`` flag) and cached.
+        Unknown or ambiguous classes are also detected once.
+
+        :param value: the value to marshal
+        :param bool ordered: Wether or not to preserve order
+        :rtype: ~marshalling.Marshaller
+        :raises ValueError: if the value class is unknown or ambiguous
+        """
+        cls = type(value)
+        key = (cls, ordered)
+        try:
+            marshaller = self._dispatch[key]
+        except KeyError:
+            marshaller = self._resolve(value, ordered)
+            # Proxies overriding ``__class__`` are resolved each time
+            if value.__class__ is cls:
+                self._dispatch[key] = marshaller
+        if isinstance(marshaller, str):
+            raise ValueError(marshaller)
+        return marshaller
+
+    @cached_property
+    def _dispatch(self):
+        return {}
+
+    def _resolve(self, value, ordered):
+        # ugly local import to avoid dependency loop
+        from .marshalling import compile_marshaller
 
         candidates = [fields for cls, fields in self.mapping.items() if isinstance(value, cls)]
 
         if len(candidates) <= 0:
-            raise ValueError('Unknown class: ' + value.__class__.__name__)
+            return 'Unknown class: ' + value.__class__.__name__
         elif len(candidates) > 1:
-            raise ValueError('Unable to determine a candidate for: ' + value.__class__.__name__)
-        else:
-            return marshal(value, candidates[0].resolved, mask=self.mask, ordered=ordered)
+            return 'Unable to determine a candidate for: ' + value.__class__.__name__
+        return compile_marshaller(candidates[0].resolved, mask=self.mask, ordered=ordered)
+
+    def __getstate__(self):
+        # Compiled marshallers are not copied along with the field
+        state = self.__dict__.copy()
+        state.pop('_dispatch', None)
+        return state
 
     def resolve_ancestor(self, models):
         """
@@ -692,7 +1167,7 @@ class Polymorph(Nested):
     def clone(self, mask=None):
         data = self.__dict__.copy()
         mapping = data.pop('mapping')
-        for field in ('allow_null', 'model'):
+        for field in ('allow_null', 'model', '_dispatch'):
             data.pop(field, None)
 
         data['mask'] = mask
@@ -703,14 +1178,11 @@ class Wildcard(Raw):
     """
     Field for marshalling list of "unkown" fields.
 
+    The field key is a case insensitive glob matched against the object keys
+    (or public attributes) which are not declared by other fields of the model.
+
     :param cls_or_instance: The field type the list will contain.
     """
-    exclude = set()
-    # cache the flat object
-    _flat = None
-    _obj = None
-    _cache = set()
-    _last = None
 
     def __init__(self, cls_or_instance, **kwargs):
         super(Wildcard, self).__init__(**kwargs)
@@ -726,65 +1198,36 @@ class Wildcard(Raw):
 
     def _flatten(self, obj):
         if obj is None:
-            return None
-        if obj == self._obj and self._flat is not None:
-            return self._flat
+            return []
         if isinstance(obj, dict):
-            self._flat = [x for x in obj.items()]
-        else:
-
-            def __match_attributes(attribute):
-                attr_name, attr_obj = attribute
-                if inspect.isroutine(attr_obj) or \
-                        (attr_name.startswith('__') and attr_name.endswith('__')):
-                    return False
-                return True
-
-            attributes = inspect.getmembers(obj)
-            self._flat = [x for x in attributes if __match_attributes(x)]
-
-        self._cache = set()
-        self._obj = obj
-        return self._flat
+            return list(obj.items())
+        return [
+            (name, value) for name, value in inspect.getmembers(obj)
+            if not inspect.isroutine(value) and not (name.startswith('__') and name.endswith('__'))
+        ]
 
-    @property
-    def key(self):
-        return self._last
-
-    def reset(self):
-        self.exclude = set()
-        self._flat = None
-        self._obj = None
-        self._cache = set()
-        self._last = None
-
-    def output(self, key, obj, ordered=False):
-        value = None
-        reg = fnmatch.translate(key)
-
-        if self._flatten(obj):
-            while True:
-                try:
-                    # we are using pop() so that we don't
-                    # loop over the whole object every time dropping the
-                    # complexity to O(n)
-                    (objkey, val) = self._flat.pop()
-                    if objkey not in self._cache and \
-                            objkey not in self.exclude and \
-                            re.match(reg, objkey, re.IGNORECASE):
-                        value = val
-                        self._cache.add(objkey)
-                        self._last = objkey
-                        break
-                except IndexError:
-                    break
+    def items(self, key, obj, exclude=()):
+        """
+        Marshal all the object keys matching the glob in a single pass.
 
-        if value is None:
-            if self.default is not None:
-                return self.container.format(self.default)
-            return None
+        :param str key: The glob (ie. the field key)
+        :param obj: The object to marshal
+        :param exclude: The keys to ignore (ie. the other fields keys)
+        :return: a list of ``(key, value)`` tuples, ``[(glob, default)]`` if nothing match
+        """
+        match = _compile_glob(key)
+        fmt = self.container.format
+        default = None if self.default is None else fmt(self.default)
+        # Keys are matched in reverse order for backward compatibility
+        items = [
+            (name, default if value is None else fmt(value))
+            for name, value in reversed(self._flatten(obj))
+            if name not in exclude and match(name)
+        ]
+        return items or [(key, default)]
 
-        return self.container.format(value)
+    def output(self, key, obj, ordered=False, **kwargs):
+        return self.items(key, obj)[0][1]
 
     def schema(self):
         schema = super(Wildcard, self).schema()
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+import asyncio
+
+from collections.abc import Mapping
+from weakref import WeakKeyDictionary
+
+from quart import g, has_app_context
+
+from .utils import current_task
+
+__all__ = ('Loader',)
+
+
+class Loader(object):
+    """
+    Batch the loading of objects by key (DataLoader style).
+
+    Keys requested while marshalling are collected, de-duplicated
+    and loaded with a single ``batch`` call (per ``max_batch_size`` keys).
+    Loaded objects are cached for the current request
+    (or for the current task outside of an application context).
+
+    >>> async def load_users(ids):
+    ...     return await db.users.find(ids)  # Same order as ids or a dict by id
+    >>> users = Loader(load_users)
+    >>> model = api.model('Article', {
+    ...     'owner': fields.Nested(user, key='owner_id', loader=users),
+    ...     'readers': fields.List(fields.Nested(user), key='reader_ids', loader=users),
+    ... })
+
+    :param batch: an async function loading a list of keys
+                  and returning the objects in the same order or a dict of objects by key
+    :param int max_batch_size: an optional maximum number of keys loaded at once
+    """
+    def __init__(self, batch, max_batch_size=None):
+        self.batch = batch
+        self.max_batch_size = max_batch_size
+        self._tasks = WeakKeyDictionary()
+        # The event loop only keeps weak references to tasks
+        self._running = set()
+
+    def __deepcopy__(self, memo):
+        # Copied models share their loaders (and caches)
+        return self
+
+    def load(self, key):
+        """
+        Load an object by key.
+
+        :param key: the object key
+        :return: a future resolved with the object (``None`` if not found)
+        :rtype: asyncio.Future
+        """
+        cache, queue = self._state()
+        future = cache.get(key)
+        if future is None:
+            loop = asyncio.get_event_loop()
+            future = cache[key] = loop.create_future()
+            queue.append(key)
+            if len(queue) == 1:
+                # Keys requested until the next loop iteration are loaded together
+                loop.call_soon(self._dispatch, cache, queue)
+        return future
+
+    def load_many(self, keys):
+        """
+        Load some objects by keys.
+
+        :param keys: the objects keys
+        :return: a future resolved with the objects list
+        :rtype: asyncio.Future
+        """
+        return asyncio.gather(*[self.load(key) for key in keys])
+
+    def getter(self, key, many=False):
+        """
+        Get a field attribute loading the object(s) which key(s) are read from ``key``.
+
+        :param key: the key (or keys) attribute (string, integer or callable)
+        :param bool many: whether ``key`` holds a list of keys
+        :return: a ``getter(obj)`` function returning a future (``None`` without key)
+        """
+        # ugly local import to avoid dependency loop
+        from .fields import compile_accessor
+
+        get = compile_accessor(key)
+
+        def load(obj):
+            value = get(obj)
+            if value is None:
+                return None
+            return self.load_many(value) if many else self.load(value)
+
+        return load
+
+    def clear(self):
+        """Clear the cache of the current request (or task)"""
+        cache, _ = self._state()
+        cache.clear()
+
+    def _state(self):
+        if has_app_context():
+            states = g.setdefault('restplus_loaders', {})
+        else:
+            task = current_task()
+            if task is None:
+                raise RuntimeError('Loaders must be used from an asyncio task')
+            states = self._tasks.setdefault(task, {})
+        state = states.get(self)
+        if state is None:
+            state = states[self] = ({}, [])
+        return state
+
+    def _dispatch(self, cache, queue):
+        keys = queue[:]
+        del queue[:]
+        size = self.max_batch_size or len(keys)
+        for i in range(0, len(keys), size):
+            task = asyncio.ensure_future(self._load(keys[i:i + size], cache))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _load(self, keys, cache):
+        try:
+            values = await self.batch(keys)
+            if isinstance(values, Mapping):
+                values = [values.get(key) for key in keys]
+            else:
+                values = list(values)
+            if len(values) != len(keys):
+                raise ValueError('Loaded {0} values for {1} keys'.format(len(values), len(keys)))
+        except Exception as e:
+            for key in keys:
+                # Failed keys may be loaded again
+                future = cache.pop(key, None)
+                if future is not None and not future.done():
+                    future.set_exception(e)
+            return
+        for key, value in zip(keys, values):
+            future = cache.get(key)
+            if future is not None and not future.done():
+                future.set_result(value)
@@ -1,13 +1,62 @@
 # -*- coding: utf-8 -*-
 import asyncio
+import inspect
+import json
+import random
+import time
 
 from collections import OrderedDict
-from functools import wraps
+from collections.abc import Iterator
+from functools import partial, wraps
+from http import HTTPStatus
+from json.encoder import encode_basestring_ascii
+from urllib.parse import parse_qsl, urlencode
 
-from quart import request, current_app, has_app_context
+from cached_property import cached_property
+from quart import request, current_app, has_app_context, has_request_context, redirect, Response
 
-from .mask import Mask, apply as apply_mask
-from .utils import unpack
+from .mask import Mask, apply as apply_mask, parse as parse_mask, canonical as canonical_mask
+from .offload import offloader
+from .profiling import MarshallingProfiler, PROFILE_RATE
+from .representations import output_json, output_json_stream, json_encoder, STREAM_CHUNK_SIZE
+from .utils import unpack, LRUCache
+
+try:
+    from contextvars import ContextVar
+except ImportError:  # pragma: no cover
+    from .utils import TaskVar as ContextVar  # Python 3.6
+
+#: The maximum number of compiled marshallers kept in memory
+MARSHALLERS_CACHE_SIZE = 512
+
+#: The ``RESTPLUS_JSON`` settings compatible with the direct serialization
+COMPACT_JSON_SETTINGS = frozenset(['default'])
+
+#: The default maximum number of masked marshallers kept in memory
+#: (overridden per application by the ``RESTPLUS_MASK_CACHE_SIZE`` configuration)
+MASKED_MARSHALLERS_CACHE_SIZE = 128
+
+#: The default minimum number of items to marshal cooperatively in ``marshal_with``
+#: (overridden by the ``RESTPLUS_MARSHAL_ASYNC_MIN_ITEMS`` configuration)
+MARSHAL_ASYNC_MIN_ITEMS = 1000
+
+#: The default number of items marshalled between two time budget checks
+#: (overridden by the ``RESTPLUS_MARSHAL_ASYNC_CHUNK_SIZE`` configuration)
+MARSHAL_ASYNC_CHUNK_SIZE = 100
+
+#: The default maximum time (in seconds) spent marshalling before yielding to the event loop
+#: (overridden by the ``RESTPLUS_MARSHAL_ASYNC_BUDGET`` configuration)
+MARSHAL_ASYNC_BUDGET = 0.01
+
+#: The default maximum number of field values awaited concurrently
+#: (overridden by the ``RESTPLUS_MARSHAL_ASYNC_CONCURRENCY`` configuration)
+MARSHAL_ASYNC_CONCURRENCY = 10
+
+_marshallers = LRUCache(MARSHALLERS_CACHE_SIZE)
+_masked_marshallers = LRUCache(MASKED_MARSHALLERS_CACHE_SIZE)
+
+_compact_dumps = json.JSONEncoder(separators=(',', ':')).encode
+_INFINITY = float('inf')
 
 
 def make(cls):
@@ -16,102 +65,875 @@ def make(cls):
     return cls
 
 
-def marshal(data, fields, envelope=None, skip_none=False, mask=None, ordered=False):
-    """Takes raw data (in the form of a dict, list, object) and a dict of
-    fields to output and filters the data based on those fields.
+class _Deferred(object):
+    """
+    Defer a nested marshaller lookup to its first use
+    so that recursive fields dicts can be compiled.
+    """
+    def __init__(self, fields, skip_none, ordered, profiler=None, resolve=False):
+        self.args = (fields, skip_none, ordered, profiler, resolve)
+        self.marshaller = None
 
-    :param data: the actual object(s) from which the fields are taken from
-    :param fields: a dict of whose keys will make up the final serialized
-                   response output
-    :param envelope: optional key that will be used to envelop the serialized
-                     response
-    :param bool skip_none: optional key will be used to eliminate fields
-                           which value is None or the field's key not
-                           exist in data
-    :param bool ordered: Wether or not to preserve order
+    def get(self):
+        if self.marshaller is None:
+            fields, skip_none, ordered, profiler, resolve = self.args
+            self.marshaller = compile_marshaller(fields, skip_none=skip_none, ordered=ordered, profiler=profiler,
+                                                 resolve=resolve)
+        return self.marshaller
 
+    def __call__(self, data):
+        return (self.marshaller or self.get())(data)
 
-    >>> from quart_restplus import fields, marshal
-    >>> data = { 'a': 100, 'b': 'foo', 'c': None }
-    >>> mfields = { 'a': fields.Raw, 'c': fields.Raw, 'd': fields.Raw }
 
-    >>> marshal(data, mfields)
-    {'a': 100, 'c': None, 'd': None}
+def _is_list(value):
+    """Whether a value is a list of objects (namedtuples are marshalled as objects)"""
+    return _is_list_type(type(value))
 
-    >>> marshal(data, mfields, envelope='data')
-    {'data': {'a': 100, 'c': None, 'd': None}}
 
-    >>> marshal(data, mfields, skip_none=True)
-    {'a': 100}
+def _is_list_type(cls):
+    if cls is list or cls is tuple:
+        return True
+    return issubclass(cls, (list, tuple)) and not hasattr(cls, '_fields')
 
-    >>> marshal(data, mfields, ordered=True)
-    OrderedDict([('a', 100), ('c', None), ('d', None)])
 
-    >>> marshal(data, mfields, envelope='data', ordered=True)
-    OrderedDict([('data', OrderedDict([('a', 100), ('c', None), ('d', None)]))])
+def _has_lists(data):
+    """Whether a list of objects contains nested lists"""
+    return any(_is_list_type(cls) for cls in set(map(type, data)))
 
-    >>> marshal(data, mfields, skip_none=True, ordered=True)
-    OrderedDict([('a', 100)])
 
+class Marshaller(object):
     """
-    out, has_wildcards = _marshal(data, fields, envelope, skip_none, mask, ordered)
+    A marshalling plan compiled once from a model or a fields dict.
+
+    Inheritance, default model mask, fields instanciation,
+    value getters and defaults are resolved at compile time
+    so marshalling an object only extracts and formats its values.
+    :class:`~fields.Nested` fields and lists of nested models are compiled too.
+    :class:`~fields.Wildcard` fields expand into all the matching keys
+    not declared by other fields.
+
+    Lists of at least :attr:`columnar_threshold` objects are marshalled column by column:
+    each field extracts the values of all objects at once and formats them
+    with a single :meth:`~fields.Raw.format_many` call.
+
+    :meth:`dumps` writes JSON straight from the objects without building the output dicts.
 
-    if has_wildcards:
+    Prefer :func:`compile_marshaller` which caches compiled plans.
+
+    :param fields: a dict of whose keys will make up the final serialized response output
+    :param envelope: optional key that will be used to envelop the serialized response
+    :param bool skip_none: optional key will be used to eliminate fields
+                           which value is None or the field's key not
+                           exist in data
+    :param bool ordered: Wether or not to preserve order
+    :param MarshallingProfiler profiler: an optional profiler recording the fields costs
+    :param str name: an optional name (default to the model name)
+    :param bool resolve: whether or not the fields values may be awaitables (see :meth:`resolve`)
+    """
+
+    #: The minimum list size to switch to the column-wise execution
+    columnar_threshold = 16
+
+    def __init__(self, fields, envelope=None, skip_none=False, ordered=False, profiler=None, name=None,
+                 resolve=False):
         # ugly local import to avoid dependency loop
         from .fields import Wildcard
 
+        mask = getattr(fields, '__mask__', None)
+        self.name = name or getattr(fields, 'name', None)
+        self.envelope = envelope
+        self.skip_none = skip_none
+        self.ordered = ordered
+        self.profiler = profiler
+        self.resolving = resolve
+        self.fields = getattr(fields, 'resolved', fields)
+        if mask:
+            self.fields = apply_mask(self.fields, mask, skip=True)
+        self.wildcards = set(k for k, v in self.fields.items() if isinstance(make(v), Wildcard))
+        self.declared = frozenset(k for k in self.fields if k not in self.wildcards)
+        self.steps = []
+        self.columns = []
+        self.writers = []
+        self.plan = []
+        self.resolvables = []
+        self.coroutines = False
+        # Resolved values are only available in the current context
+        self.context_free = not resolve
+        for key, value in self.fields.items():
+            output, column, writer = self._compile(key, value)
+            column = column or _default_column(output)
+            self.steps.append((key, output))
+            self.columns.append(column)
+            self.writers.append(writer or _value_writer(output, column))
+        self.prefixes = [encode_basestring_ascii(str(key)) + ':' for key in self.fields]
+        self.template = '{' + ','.join(p.replace('%', '%%') + '%s' for p in self.prefixes) + '}'
+        if profiler is not None:
+            self._profile(profiler)
+
+    def _profile(self, profiler):
+        name = self.name or 'fields'
+        timed = profiler.timed
+        self.steps = [(key, timed(name, key, output)) for key, output in self.steps]
+        self.columns = [timed(name, key, column, many=True) for key, column in zip(self.fields, self.columns)]
+        self.writers = [
+            (timed(name, key, write, text=True), timed(name, key, write_many, many=True, text=True))
+            for key, (write, write_many) in zip(self.fields, self.writers)
+        ]
+
+    def __call__(self, data):
+        return self.envelop(self.marshal_many(data) if _is_list(data) else self.marshal_one(data))
+
+    def envelop(self, out):
+        """Wrap marshalled data into the envelope (if any)"""
+        if self.envelope:
+            out = OrderedDict([(self.envelope, out)]) if self.ordered else {self.envelope: out}
+        return out
+
+    def marshal_many(self, data):
+        """Marshal a list or a tuple of objects (without envelope)"""
+        if not self.wildcards and len(data) >= self.columnar_threshold and not _has_lists(data):
+            return self.marshal_columns(data)
+        one = self.marshal_one
+        return [self.marshal_many(d) if _is_list(d) else one(d) for d in data]
+
+    def marshal_one(self, obj):
+        """Marshal a single object (without envelope)"""
+        if self.wildcards:
+            return self._marshal_wildcards(obj)
+        elif self.skip_none:
+            items = ((k, output(obj)) for k, output in self.steps)
+            items = ((k, v) for k, v in items if v is not None and v != {})
+            return OrderedDict(items) if self.ordered else dict(items)
+        elif self.ordered:
+            return OrderedDict([(k, output(obj)) for k, output in self.steps])
+        return {k: output(obj) for k, output in self.steps}
+
+    def _marshal_wildcards(self, obj):
         items = []
-        keys = []
-        for dkey, val in fields.items():
-            key = dkey
-            if isinstance(val, dict):
-                value = marshal(data, val, skip_none=skip_none, ordered=ordered)
+        for key, output in self.steps:
+            if key in self.wildcards:
+                items.extend(output(obj))
             else:
-                field = make(val)
-                is_wildcard = isinstance(field, Wildcard)
-                # exclude already parsed keys from the wildcard
-                if is_wildcard:
-                    field.reset()
-                    if keys:
-                        field.exclude |= set(keys)
-                        keys = []
-                value = field.output(dkey, data)
-                if is_wildcard:
-
-                    def _append(k, v):
-                        if skip_none and (v is None or v == OrderedDict() or v == {}):
-                            return
-                        items.append((k, v))
-
-                    key = field.key or dkey
-                    _append(key, value)
-                    while True:
-                        value = field.output(dkey, data, ordered=ordered)
-                        if value is None or \
-                            value == field.container.format(field.default):
-                            break
-                        key = field.key
-                        _append(key, value)
-                    continue
-
-            keys.append(key)
-            if skip_none and (value is None or value == OrderedDict() or value == {}):
+                items.append((key, output(obj)))
+        if self.skip_none:
+            items = [(k, v) for k, v in items if v is not None and v != {}]
+        return OrderedDict(items) if self.ordered else dict(items)
+
+    def marshal_columns(self, data):
+        """Marshal a list of objects column by column (without envelope)"""
+        factory = OrderedDict if self.ordered else dict
+        if not self.steps:
+            return [factory() for _ in data]
+        keys = [key for key, _ in self.steps]
+        rows = zip(*[column(data) for column in self.columns])
+        if self.skip_none:
+            return [factory((k, v) for k, v in zip(keys, row) if v is not None and v != {}) for row in rows]
+        return [factory(zip(keys, row)) for row in rows]
+
+    def dumps(self, data, dump=None):
+        """
+        Serialize data into a compact JSON string without building the output dicts.
+
+        Values produced by builtin fields are encoded directly,
+        :class:`~fields.Nested` fields and lists of nested models are written recursively.
+        Other values (custom fields, masked or raw complex values...) are encoded with ``dump``.
+
+        :param data: the actual object(s) from which the fields are taken from
+        :param callable dump: the fallback encoder turning a value into a JSON string
+                              (default to a compact :mod:`json` encoder)
+        :rtype: str
+        """
+        dump = dump or _compact_dumps
+        out = self.write(data, dump)
+        if self.envelope:
+            out = '{' + encode_basestring_ascii(str(self.envelope)) + ':' + out + '}'
+        return out
+
+    def write(self, data, dump):
+        """Write an object or a list of objects as JSON (without envelope)"""
+        if _is_list(data):
+            return '[' + ','.join(self.write_many(data, dump)) + ']'
+        return self.write_one(data, dump)
+
+    def write_many(self, data, dump):
+        """Write a list of objects as a list of JSON strings"""
+        if not self.wildcards and len(data) >= self.columnar_threshold and not _has_lists(data):
+            return self.write_columns(data, dump)
+        one = self.write_one
+        return [self.write(d, dump) if _is_list(d) else one(d, dump) for d in data]
+
+    def write_one(self, obj, dump):
+        """Write a single object as JSON"""
+        if self.wildcards:
+            return dump(self._marshal_wildcards(obj))
+        elif self.skip_none:
+            items = ((prefix, write(obj, dump)) for prefix, (write, _) in zip(self.prefixes, self.writers))
+            return '{' + ','.join(p + t for p, t in items if t != 'null' and t != '{}') + '}'
+        return self.template % tuple(write(obj, dump) for write, _ in self.writers)
+
+    def write_columns(self, data, dump):
+        """Write a list of objects column by column as a list of JSON strings"""
+        if not self.writers:
+            return ['{}' for _ in data]
+        rows = zip(*[write_many(data, dump) for _, write_many in self.writers])
+        if self.skip_none:
+            prefixes = self.prefixes
+            return [
+                '{' + ','.join(p + t for p, t in zip(prefixes, row) if t != 'null' and t != '{}') + '}'
+                for row in rows
+            ]
+        template = self.template
+        return [template % row for row in rows]
+
+    @cached_property
+    def offloadable(self):
+        """
+        Whether or not this plan can run outside of the request context (ie. in an executor).
+
+        Fields with a custom ``output()`` method (like :class:`~fields.Url`) may require the request context.
+        """
+        return self._offloadable(set())
+
+    def _offloadable(self, seen):
+        if not self.context_free:
+            return False
+        seen = seen | {id(self)}
+        for _, _, nested in self.plan:
+            if nested is not None:
+                marshaller = nested.get()
+                if id(marshaller) not in seen and not marshaller._offloadable(seen):
+                    return False
+        return True
+
+    @cached_property
+    def asynchronous(self):
+        """Whether or not some fields (or nested fields) attributes are coroutine functions or loaders"""
+        return self._asynchronous(set())
+
+    def _asynchronous(self, seen):
+        if self.coroutines:
+            return True
+        seen = seen | {id(self)}
+        for _, _, nested in self.plan:
+            if nested is not None:
+                marshaller = nested.get()
+                if id(marshaller) not in seen and marshaller._asynchronous(seen):
+                    return True
+        return False
+
+    async def resolve(self, data, limit=None):
+        """
+        Await the awaitable fields values of some data (including nested models values).
+
+        Values are collected for all the objects at once and awaited concurrently
+        (at most ``limit`` at a time). Nested models values are collected
+        once their parent values are resolved.
+
+        Compiled with ``resolve=True``, the marshaller reads the resolved values
+        while :data:`resolved` is set to the returned mapping.
+
+        :param data: the object(s) to resolve
+        :param int limit: the maximum number of concurrently awaited values
+        :return: the resolved values keyed by object identity and field attribute
+        :rtype: dict
+        """
+        resolved = {}
+        semaphore = asyncio.Semaphore(limit) if limit else None
+        pending = [(self, data)]
+        while pending:
+            awaiting = OrderedDict()
+            for marshaller, objs in pending:
+                marshaller._collect(objs, awaiting, resolved)
+            pending = []
+            if not awaiting:
+                break
+            values = await asyncio.gather(*(_limited(awaitable, semaphore) for _, awaitable, _ in awaiting.values()))
+            for (key, (obj, _, nested)), value in zip(awaiting.items(), values):
+                resolved[key] = (obj, value)
+                if nested is not None and value is not None:
+                    pending.append((nested.get(), value))
+        return resolved
+
+    def _collect(self, data, awaiting, resolved):
+        if _is_list(data):
+            for obj in data:
+                self._collect(obj, awaiting, resolved)
+            return
+        for attribute, getter, nested in self.resolvables:
+            if getter is None:
+                # Inline fields
+                nested.get()._collect(data, awaiting, resolved)
+                continue
+            key = (id(data), attribute)
+            if key in resolved or key in awaiting:
+                # Already collected through another field or path
                 continue
-            items.append((key, value))
+            value = getter(data)
+            if inspect.isawaitable(value):
+                awaiting[key] = (data, value, nested)
+            elif nested is not None and value is not None:
+                # Marshal the very nested objects which values are resolved
+                resolved[key] = (data, value)
+                nested.get()._collect(value, awaiting, resolved)
+
+    @cached_property
+    def projection(self):
+        """
+        The dotted attributes paths read by this plan (see :func:`requested_fields`).
 
-        items = tuple(items)
+        Nested models attributes are prefixed by their parent attribute,
+        ``fields.FormattedString`` fields give their referenced names.
+        Callable attributes, ``fields.Url`` and ``fields.ClassName`` fields can't be projected and are omitted.
 
-        out = OrderedDict(items) if ordered else dict(items)
+        :rtype: tuple
+        """
+        return tuple(self._projection(set()))
 
-        if envelope:
-            out = OrderedDict([(envelope, out)]) if ordered else {envelope: out}
+    def _projection(self, seen):
+        # ugly local import to avoid dependency loop
+        from .fields import Wildcard, FormattedString, Polymorph, Url, ClassName
+
+        seen = seen | {id(self)}
+        nested_by_key = dict((key, nested) for key, _, nested in self.plan)
+        paths = OrderedDict()
+        for key, value in self.fields.items():
+            field = value if isinstance(value, dict) else make(value)
+            if isinstance(field, dict):
+                nested = nested_by_key[key].get()
+                attribute = None
+            elif isinstance(field, Wildcard):
+                paths['*'] = True
+                continue
+            elif isinstance(field, FormattedString):
+                paths.update((name, True) for name in field.names or ())
+                continue
+            elif isinstance(field, (Url, ClassName)):
+                continue
+            else:
+                attribute = key if field.attribute is None else field.attribute
+                if getattr(field, 'loader', None) is not None:
+                    # Nested objects are loaded by key
+                    attribute = attribute if field.key is None else field.key
+                    nested = None
+                elif isinstance(field, Polymorph):
+                    nested = [compile_marshaller(model) for model in field.mapping.values()]
+                else:
+                    nested = nested_by_key[key]
+                    nested = nested and nested.get()
+            if callable(attribute):
+                continue
+            prefix = '' if attribute is None else '{0}.'.format(attribute)
+            subpaths = []
+            for marshaller in (nested if isinstance(nested, list) else [nested]):
+                if marshaller is not None and id(marshaller) not in seen:
+                    subpaths.extend(marshaller._projection(seen))
+            if subpaths:
+                paths.update((prefix + path, True) for path in subpaths)
+            elif attribute is not None:
+                paths[str(attribute)] = True
+        return list(paths)
+
+    def explain(self):
+        """
+        Dump the compiled plan in a human readable form (for debugging purpose).
 
-        return out
+        :rtype: str
+        """
+        return '\n'.join(self._explain(0, set()))
+
+    def _explain(self, depth, seen):
+        indent = '    ' * depth
+        seen = seen | {id(self)}
+        yield '{0}{1}'.format(indent, self)
+        for key, description, nested in self.plan:
+            yield '{0}    {1}: {2}'.format(indent, key, description)
+            if nested is not None:
+                marshaller = nested.get()
+                if id(marshaller) in seen:
+                    yield '{0}        <recursive {1}>'.format(indent, marshaller)
+                else:
+                    for line in marshaller._explain(depth + 2, seen):
+                        yield line
+
+    def __repr__(self):
+        return 'Marshaller({0}, envelope={1!r}, skip_none={2}, ordered={3})'.format(
+            self.name or 'fields', self.envelope, self.skip_none, self.ordered
+        )
+
+    def _compile(self, key, value):
+        # ugly local import to avoid dependency loop
+        from .fields import (
+            Raw, Nested, List, Wildcard, FormattedString, ClassName, Url, Polymorph, compile_accessor
+        )
+
+        if isinstance(value, dict):
+            nested = _Deferred(value, self.skip_none, self.ordered, self.profiler, self.resolving)
+            self.resolvables.append((None, None, nested))
+            self.plan.append((key, 'inline fields', nested))
+            writer = (
+                lambda obj, dump: nested.get().write(obj, dump),
+                lambda objs, dump: nested.get().write_many(objs, dump),
+            )
+            return nested, None, writer
+
+        field = make(value)
+        if isinstance(field, Wildcard):
+            return self._compile_wildcard(key, field)
+        attribute = key if field.attribute is None else field.attribute
+        loader = getattr(field, 'loader', None)
+        if loader is not None:
+            attribute = loader.getter(attribute if field.key is None else field.key, many=isinstance(field, List))
+        if loader is not None or inspect.iscoroutinefunction(attribute):
+            self.coroutines = True
+        raw_getter = getter = compile_accessor(attribute)
+        read = compile_accessor(attribute, many=True)
+        if self.resolving:
+            getter = _resolving_getter(getter, attribute)
+            read = _resolving_reader(getter)
+        output = type(field).output
+        if output is Raw.output:
+            compiled = self._compile_raw(key, field, getter, read)
+        elif output is Nested.output:
+            compiled = self._compile_nested(key, field, getter, read)
+        elif output is List.output:
+            compiled = self._compile_list(key, field, getter, read)
+        elif output is Url.output:
+            return self._compile_url(key, field)
+        elif output is Polymorph.output:
+            compiled = self._compile_polymorph(key, field, getter)
+        else:
+            compiled = None
+        if compiled is not None:
+            if self.resolving:
+                # Values of nested models (the plan entry marshaller) are resolved too
+                self.resolvables.append((attribute, raw_getter, self.plan[-1][2]))
+            return compiled
+
+        self.plan.append((key, '{0}.output()'.format(field.__class__.__name__), None))
+        ordered = self.ordered
+        if output not in (FormattedString.output, ClassName.output):
+            self.context_free = False
+
+        def generic(obj):
+            return field.output(key, obj, ordered=ordered)
+
+        return generic, None, None
+
+    def _compile_url(self, key, field):
+        self.plan.append((key, 'Url({0})'.format(field.endpoint or 'request.endpoint'), None))
+        self.context_free = False
+
+        def output(obj):
+            return field.builder()(obj)
+
+        def column(objs):
+            build = field.builder()
+            return [build(obj) for obj in objs]
+
+        return output, column, None
+
+    def _compile_polymorph(self, key, field, getter):
+        allow_null = field.allow_null
+        default = field.default
+        ordered = self.ordered
+        self.plan.append((key, 'Polymorph({0})'.format(', '.join(
+            getattr(model, 'name', 'fields') for model in field.mapping.values()
+        )), None))
+        # The mapped models are only known at runtime
+        self.context_free = False
+
+        def output(obj):
+            value = getter(obj)
+            if value is None:
+                if allow_null:
+                    return None
+                elif default is not None:
+                    return default
+            return field.marshaller(value, ordered)(value)
+
+        return output, None, None
+
+    def _compile_wildcard(self, key, field):
+        declared = self.declared
+        self.plan.append((key, 'Wildcard({0})'.format(field.container.__class__.__name__), None))
+
+        def output(obj):
+            return field.items(key, obj, exclude=declared)
+
+        return output, None, None
+
+    def _compile_raw(self, key, field, getter, read):
+        from .fields import Raw, MarshallingError
+
+        fmt = None if type(field).format is Raw.format else field.format
+        format_many = _format_many(field)
+        if not _context_free(field):
+            self.context_free = False
+        mask = field.mask
+        default = field.default
+        dynamic_default = callable(default)
+
+        def none_value():
+            value = default() if dynamic_default else default
+            return (fmt(value) if fmt else value) if value else value
+
+        self.plan.append((key, '{0}{1}{2}'.format(
+            field.__class__.__name__,
+            '' if fmt else ' (raw)',
+            ' (masked)' if mask else '',
+        ), None))
+
+        if fmt is None and not mask:
+            def output(obj):
+                value = getter(obj)
+                return none_value() if value is None else value
+        else:
+            def output(obj):
+                value = getter(obj)
+                if value is None:
+                    return none_value()
+                if fmt is None:
+                    data = value
+                else:
+                    try:
+                        data = fmt(value)
+                    except MarshallingError as e:
+                        msg = 'Unable to marshal field "{0}" value "{1}": {2}'.format(key, value, str(e))
+                        raise MarshallingError(msg)
+                return mask.apply(data) if mask else data
+
+        def column(objs):
+            values = read(objs)
+            present = [value for value in values if value is not None]
+            if fmt is not None and present:
+                try:
+                    formatted = iter(format_many(present))
+                except MarshallingError:
+                    # Format again value by value to report the faulty one
+                    return [output(obj) for obj in objs]
+            else:
+                formatted = iter(present)
+            if mask:
+                formatted = (mask.apply(data) for data in formatted)
+            if len(present) == len(values):
+                return list(formatted)
+            return [none_value() if value is None else next(formatted) for value in values]
+
+        return output, column, None
+
+    def _compile_nested(self, key, field, getter, read):
+        nested = field.nested
+        allow_null = field.allow_null
+        default = field.default
+        marshal_nested = _Deferred(nested, field.skip_none, self.ordered, self.profiler, self.resolving)
+        self.plan.append((key, 'Nested({0})'.format(getattr(nested, 'name', 'fields')), marshal_nested))
+
+        def output_value(value):
+            if value is None:
+                if allow_null:
+                    return None
+                elif default is not None:
+                    return default
+            return marshal_nested(value)
+
+        def output(obj):
+            return output_value(getter(obj))
+
+        def column(objs):
+            values = read(objs)
+            if any(value is None for value in values):
+                return [output_value(value) for value in values]
+            return marshal_nested.get().marshal_many(values)
+
+        def write_value(value, dump):
+            if value is None:
+                if allow_null:
+                    return 'null'
+                elif default is not None:
+                    return _dump_value(default, dump)
+            return marshal_nested.get().write(value, dump)
+
+        def write(obj, dump):
+            return write_value(getter(obj), dump)
+
+        def write_many(objs, dump):
+            values = read(objs)
+            if any(value is None for value in values):
+                return [write_value(value, dump) for value in values]
+            return marshal_nested.get().write_many(values, dump)
+
+        return output, column, (write, write_many)
+
+    def _compile_list(self, key, field, getter, read):
+        from .fields import Nested, List, is_indexable_but_not_string
+
+        container = field.container
+        fmt = field.format
+        description = 'List({0})'.format(container.__class__.__name__)
+        if not _context_free(field):
+            self.context_free = False
+        nested = None
+        is_nested = type(container).output is Nested.output and container.attribute is None
+        # List.format() does not forward ``ordered`` to nested items
+        if is_nested and type(field).format is List.format:
+            nested = _Deferred(container.nested, container.skip_none, False, self.profiler, self.resolving)
+            description = 'List(Nested({0}))'.format(getattr(container.nested, 'name', 'fields'))
+            allow_null = container.allow_null
+            default = container.default
+
+            def item(value):
+                if value is None:
+                    if allow_null:
+                        return None
+                    elif default is not None:
+                        return default
+                return nested(value)
+
+            def format_nested(value):
+                if isinstance(value, (list, tuple, set)):
+                    return [item(v) for v in value]
+                return field.format(value)
+
+            fmt = format_nested
+
+        self.plan.append((key, description, nested))
+
+        def output(obj):
+            value = getter(obj)
+            # we cannot really test for external dict behavior
+            if is_indexable_but_not_string(value) and not isinstance(value, dict):
+                return fmt(value)
+            if value is None:
+                return field._v('default')
+            return [marshal(value, container.nested)]
+
+        if nested is None:
+            return output, None, None
+
+        def column(objs):
+            values = read(objs)
+            if not all(_is_list(value) for value in values):
+                return [output(obj) for obj in objs]
+            flat = [item for value in values for item in value]
+            if any(item is None for item in flat):
+                return [output(obj) for obj in objs]
+            flat = iter(nested.get().marshal_many(flat))
+            return [[next(flat) for _ in value] for value in values]
+
+        def write(obj, dump):
+            value = getter(obj)
+            if _is_list(value) and not any(item is None for item in value):
+                return '[' + ','.join(nested.get().write_many(value, dump)) + ']'
+            return _dump_value(output(obj), dump)
+
+        def write_many(objs, dump):
+            values = read(objs)
+            if not all(_is_list(value) for value in values):
+                return [write(obj, dump) for obj in objs]
+            flat = [item for value in values for item in value]
+            if any(item is None for item in flat):
+                return [write(obj, dump) for obj in objs]
+            flat = iter(nested.get().write_many(flat, dump))
+            return ['[' + ','.join([next(flat) for _ in value]) + ']' for value in values]
+
+        return output, column, (write, write_many)
+
+
+#: The ``marshal_with`` decorator of the running handler
+_current = ContextVar('marshal_with', default=None)
+
+#: The values resolved for the current marshalling (see :meth:`Marshaller.resolve`)
+resolved = ContextVar('resolved', default=None)
+
+
+def _resolving_getter(getter, attribute):
+    def resolved_getter(obj, default=None):
+        values = resolved.get()
+        if values:
+            entry = values.get((id(obj), attribute))
+            if entry is not None and entry[0] is obj:
+                return entry[1]
+        return getter(obj, default)
+
+    return resolved_getter
+
+
+def _resolving_reader(getter):
+    def read(objs, default=None):
+        return [getter(obj, default) for obj in objs]
+
+    return read
+
+
+async def _limited(awaitable, semaphore):
+    if semaphore is None or isinstance(awaitable, asyncio.Future):
+        # Futures (ie. batched loads) are already scheduled
+        return await awaitable
+    async with semaphore:
+        return await awaitable
+
+
+def _default_column(output):
+    def column(objs):
+        return [output(obj) for obj in objs]
+    return column
 
-    return out
 
+def _value_writer(output, column):
+    def write(obj, dump):
+        return _dump_value(output(obj), dump)
 
-def _marshal(data, fields, envelope=None, skip_none=False, mask=None, ordered=False):
+    def write_many(objs, dump):
+        dumpers = _DUMPERS
+        return [(dumpers.get(type(value)) or dump)(value) for value in column(objs)]
+
+    return write, write_many
+
+
+def _dump_float(value):
+    if value != value or value == _INFINITY or value == -_INFINITY:
+        return _compact_dumps(value)
+    return float.__repr__(value)
+
+
+_DUMPERS = {
+    str: encode_basestring_ascii,
+    int: int.__repr__,
+    float: _dump_float,
+    bool: lambda value: 'true' if value else 'false',
+    type(None): lambda value: 'null',
+}
+
+
+def _dump_value(value, dump):
+    """Encode a value as JSON, builtin scalar types being encoded directly"""
+    dumper = _DUMPERS.get(type(value))
+    return dumper(value) if dumper else dump(value)
+
+
+def _context_free(field):
+    """
+    Whether a field formatting can run outside of the application and request contexts.
+
+    Builtin formatters can. Custom :meth:`~fields.Raw.format` and :meth:`~fields.Raw.format_many`
+    overrides may require the contexts, unless the field class opts in with ``context_free = True``.
+    """
+    from .fields import Raw, List, Nested, FormattedString, ClassName
+
+    if field.context_free:
+        return True
+    mro = type(field).__mro__
+    for name in ('format', 'format_many'):
+        owner = next(cls for cls in mro if name in cls.__dict__)
+        if owner.__module__ != Raw.__module__:
+            return False
+    if isinstance(field, List):
+        # Items are formatted by the container
+        output = type(field.container).output
+        if output is Nested.output:
+            return True
+        if output not in (Raw.output, List.output, FormattedString.output, ClassName.output):
+            return False
+        return _context_free(field.container)
+    return True
+
+
+def _format_many(field):
+    """
+    Get a field batch formatter.
+
+    :meth:`~fields.Raw.format_many` is only trusted if it has been defined
+    along with or after :meth:`~fields.Raw.format` in the field class hierarchy.
+    """
+    mro = type(field).__mro__
+    format_owner = next(cls for cls in mro if 'format' in cls.__dict__)
+    format_many_owner = next(cls for cls in mro if 'format_many' in cls.__dict__)
+    if issubclass(format_many_owner, format_owner):
+        return field.format_many
+    fmt = field.format
+    return lambda values: [fmt(value) for value in values]
+
+
+def compile_marshaller(fields, envelope=None, skip_none=False, mask=None, ordered=False, profiler=None,
+                       resolve=False):
+    """
+    Get the compiled :class:`Marshaller` for a given fields dict or model.
+
+    Compiled marshallers are cached by fields identity.
+    Masked marshallers are cached in a distinct bounded cache,
+    keyed by fields identity and the normalized mask.
+
+    >>> from quart_restplus import fields
+    >>> from quart_restplus.marshalling import compile_marshaller
+    >>> mfields = { 'a': fields.Raw, 'b': fields.Integer }
+    >>> print(compile_marshaller(mfields).explain())
+    Marshaller(fields, envelope=None, skip_none=False, ordered=False)
+        a: Raw (raw)
+        b: Integer
+
+    :param fields: a dict of whose keys will make up the final serialized response output
+    :param envelope: optional key that will be used to envelop the serialized response
+    :param bool skip_none: optional key will be used to eliminate fields
+                           which value is None or the field's key not
+                           exist in data
+    :param mask: an optional mask overriding the model one
+    :param bool ordered: Wether or not to preserve order
+    :param MarshallingProfiler profiler: an optional profiler recording the fields costs
+                                         (profiled marshallers are cached by the profiler)
+    :param bool resolve: whether or not the fields values may be awaitables
+                         (see :meth:`Marshaller.resolve`)
+    :rtype: Marshaller
+    """
+    if mask:
+        mask = mask if isinstance(mask, Mask) else Mask(mask, skip=True)
+        cache = _masked_cache()
+        key = (id(fields), str(mask), envelope, skip_none, ordered, resolve)
+    else:
+        cache = _marshallers
+        key = (id(fields), envelope, skip_none, ordered, resolve)
+    if profiler is not None:
+        cache = profiler.cache
+
+    snapshot = tuple(fields.items())
+    cached = cache.get(key)
+    if cached is not None and cached[0] is fields and cached[1] == snapshot:
+        return cached[2]
+    if mask:
+        marshaller = Marshaller(apply_mask(getattr(fields, 'resolved', fields), mask, skip=True),
+                                envelope, skip_none, ordered, profiler, getattr(fields, 'name', None), resolve)
+    else:
+        marshaller = Marshaller(fields, envelope, skip_none, ordered, profiler, resolve=resolve)
+    # Keep a reference on fields so its id can't be reused while cached
+    cache.set(key, (fields, snapshot, marshaller))
+    return marshaller
+
+
+def _masked_cache():
+    # Masked marshallers are cached per application (sized by its configuration)
+    if has_app_context():
+        cache = current_app.extensions.get('restplus', {}).get('masked_marshallers')
+        if cache is not None:
+            return cache
+    return _masked_marshallers
+
+
+def cache_info():
+    """
+    Report the compiled marshallers caches statistics.
+
+    The ``masked`` cache is the current application one
+    (or the process-wide one outside of an application context).
+
+    :return: the ``marshallers`` and ``masked`` caches :class:`~utils.CacheInfo`
+    :rtype: dict
+    """
+    return {
+        'marshallers': _marshallers.info(),
+        'masked': _masked_cache().info(),
+    }
+
+
+def marshal(data, fields, envelope=None, skip_none=False, mask=None, ordered=False, profiler=None):
     """Takes raw data (in the form of a dict, list, object) and a dict of
     fields to output and filters the data based on those fields.
 
@@ -124,6 +946,7 @@ def _marshal(data, fields, envelope=None, skip_none=False, mask=None, ordered=Fa
                            which value is None or the field's key not
                            exist in data
     :param bool ordered: Wether or not to preserve order
+    :param MarshallingProfiler profiler: an optional profiler recording the fields costs
 
 
     >>> from quart_restplus import fields, marshal
@@ -148,47 +971,68 @@ def _marshal(data, fields, envelope=None, skip_none=False, mask=None, ordered=Fa
     >>> marshal(data, mfields, skip_none=True, ordered=True)
     OrderedDict([('a', 100)])
 
-    """
-    # ugly local import to avoid dependency loop
-    from .fields import Wildcard
-
-    mask = mask or getattr(fields, '__mask__', None)
-    fields = getattr(fields, 'resolved', fields)
-    if mask:
-        fields = apply_mask(fields, mask, skip=True)
+    .. seealso:: :func:`compile_marshaller`
 
-    if isinstance(data, (list, tuple)):
-        out = [marshal(d, fields, skip_none=skip_none, ordered=ordered) for d in data]
-        if envelope:
-            out = OrderedDict([(envelope, out)]) if ordered else {envelope: out}
-        return out, False
+    :raises TypeError: if some fields attributes are coroutine functions or loaders
+                       (use :func:`marshal_async` instead)
+    """
+    marshaller = compile_marshaller(fields, envelope, skip_none, mask, ordered, profiler)
+    if marshaller.asynchronous and resolved.get() is None:
+        raise TypeError('Some fields attributes are coroutine functions or loaders, '
+                        'use marshal_async() (or marshal_with()) to marshal them')
+    return marshaller(data)
 
-    has_wildcards = {'present': False}
 
-    def __format_field(key, val):
-        field = make(val)
-        if isinstance(field, Wildcard):
-            has_wildcards['present'] = True
-        value = field.output(key, data, ordered=ordered)
-        return (key, value)
+async def marshal_async(data, fields, envelope=None, skip_none=False, mask=None, ordered=False,
+                        chunk_size=None, budget=None, limit=None):
+    """
+    Same as :func:`marshal` but gives the event loop back while marshalling large lists.
 
-    items = (
-        (k, marshal(data, v, skip_none=skip_none, ordered=ordered))
-        if isinstance(v, dict)
-        else __format_field(k, v)
-        for k, v in fields.items()
-    )
+    Lists are marshalled by chunks of ``chunk_size`` items
+    and the event loop is given back each time the marshalling
+    has been running for ``budget`` seconds.
 
-    if skip_none:
-        items = ((k, v) for k, v in items
-                 if v is not None and v != OrderedDict() and v != {})
+    Awaitable fields values (ie. coroutine functions attributes or properties
+    returning awaitables) are awaited concurrently beforehand (see :meth:`Marshaller.resolve`).
 
-    out = OrderedDict(items) if ordered else dict(items)
+    :param int chunk_size: The number of items marshalled between two time checks
+                           (default to ``RESTPLUS_MARSHAL_ASYNC_CHUNK_SIZE``)
+    :param float budget: The maximum time in seconds spent marshalling before yielding
+                         (default to ``RESTPLUS_MARSHAL_ASYNC_BUDGET``)
+    :param int limit: The maximum number of values awaited concurrently
+                      (default to ``RESTPLUS_MARSHAL_ASYNC_CONCURRENCY``)
 
-    if envelope:
-        out = OrderedDict([(envelope, out)]) if ordered else {envelope: out}
+    Ex::
 
-    return out, has_wildcards['present']
+        data = await marshal_async(items, model, envelope='items', budget=0.005)
+    """
+    marshaller = compile_marshaller(fields, envelope, skip_none, mask, ordered, resolve=True)
+    token = resolved.set(await marshaller.resolve(data, limit or _concurrency()))
+    try:
+        return await _marshal_cooperatively(marshaller, data, chunk_size, budget)
+    finally:
+        resolved.reset(token)
+
+
+def _concurrency():
+    config = current_app.config if has_app_context() else {}
+    return config.get('RESTPLUS_MARSHAL_ASYNC_CONCURRENCY', MARSHAL_ASYNC_CONCURRENCY)
+
+
+async def _marshal_cooperatively(marshaller, data, chunk_size=None, budget=None):
+    if not _is_list(data):
+        return marshaller(data)
+    config = current_app.config if has_app_context() else {}
+    chunk_size = chunk_size or config.get('RESTPLUS_MARSHAL_ASYNC_CHUNK_SIZE', MARSHAL_ASYNC_CHUNK_SIZE)
+    budget = budget or config.get('RESTPLUS_MARSHAL_ASYNC_BUDGET', MARSHAL_ASYNC_BUDGET)
+    out = []
+    start = time.perf_counter()
+    for i in range(0, len(data), chunk_size):
+        out.extend(marshaller.marshal_many(data[i:i + chunk_size]))
+        if time.perf_counter() - start >= budget:
+            await asyncio.sleep(0)
+            start = time.perf_counter()
+    return marshaller.envelop(out)
 
 
 class marshal_with(object):
@@ -221,44 +1065,328 @@ class marshal_with(object):
     >>> get()
     OrderedDict([('a', 100)])
 
+    With ``stream=True``, lists, iterators and asynchronous iterators
+    are marshalled item by item while a chunked JSON array is sent to the client.
+
+    With ``direct=True`` (or the ``RESTPLUS_DIRECT_SERIALIZATION`` configuration),
+    the JSON response is written straight from the returned objects (see :meth:`Marshaller.dumps`)
+    when compact JSON is negotiated (see :meth:`direct_allowed`).
+
+    With ``profile=True`` (or for a ``RESTPLUS_PROFILE_RATE`` sample of the requests),
+    the fields marshalling costs are recorded (see :class:`~profiling.MarshallingProfiler`),
+    logged and exposed in the ``RESTPLUS_PROFILE_HEADER`` response header (if set).
+
+    With ``resolve=True`` (or the ``RESTPLUS_RESOLVE_AWAITABLES`` configuration),
+    awaitable fields values are awaited concurrently before marshalling (see :meth:`Marshaller.resolve`).
+    Models with coroutine functions attributes are always resolved.
+
+    With a ``memo`` (see :class:`~memo.MarshallingMemo`), objects (and lists items)
+    are only marshalled once per identity and version.
+
     see :meth:`quart_restplus.marshal`
     """
 
-    def __init__(self, fields, envelope=None, skip_none=False, mask=None, ordered=False):
+    def __init__(self, fields, envelope=None, skip_none=False, mask=None, ordered=False, stream=False,
+                 direct=None, profile=None, resolve=None, memo=None):
         """
         :param fields: a dict of whose keys will make up the final
                        serialized response output
         :param envelope: optional key that will be used to envelop the serialized
                          response
+        :param bool stream: whether or not to stream collections as a JSON array
+        :param bool direct: whether or not to write the JSON response without intermediate dicts
+                            (default to the ``RESTPLUS_DIRECT_SERIALIZATION`` configuration)
+        :param bool profile: whether or not to profile the fields marshalling
+                             (default to a ``RESTPLUS_PROFILE_RATE`` sampling)
+        :param bool resolve: whether or not to await the awaitable fields values
+                             (default to the ``RESTPLUS_RESOLVE_AWAITABLES`` configuration)
+        :param MarshallingMemo memo: an optional memo of the marshalled objects
         """
         self.fields = fields
         self.envelope = envelope
         self.skip_none = skip_none
         self.ordered = ordered
         self.mask = Mask(mask, skip=True)
+        self.stream = stream
+        self.direct = direct
+        self.profile = profile
+        self.resolve = resolve
+        self.memo = memo
 
     def __call__(self, f):
         @wraps(f)
         async def wrapper(*args, **kwargs):
-            resp = f(*args, **kwargs)
-            while asyncio.iscoroutine(resp):
-                resp = await resp
+            if has_request_context():
+                response = canonical_mask_redirect()
+                if response is not None:
+                    return response
+            token = _current.set(self)
+            try:
+                resp = f(*args, **kwargs)
+                while inspect.isawaitable(resp):
+                    resp = await resp
+            finally:
+                _current.reset(token)
             mask = self.mask
+            direct = self.direct
+            resolve = self.resolve
+            profiler = None
             if has_app_context():
-                mask_header = current_app.config['RESTPLUS_MASK_HEADER']
-                mask = request.headers.get(mask_header) or mask
-            if isinstance(resp, tuple):
+                if has_request_context():
+                    mask = client_mask() or mask
+                if direct is None:
+                    direct = current_app.config.get('RESTPLUS_DIRECT_SERIALIZATION', False)
+                profiler = self.profiler()
+                if resolve is None:
+                    resolve = current_app.config.get('RESTPLUS_RESOLVE_AWAITABLES', False)
+            marshaller = compile_marshaller(self.fields, self.envelope, self.skip_none, mask, self.ordered, profiler)
+            if resolve or (self.resolve is None and marshaller.asynchronous):
+                marshaller = compile_marshaller(self.fields, self.envelope, self.skip_none, mask, self.ordered,
+                                                profiler, resolve=True)
+            if self.stream:
+                data, code, headers = unpack(resp)
+                if is_streamable(data):
+                    return self.stream_response(data, code, headers, mask, marshaller.resolving)
+            if direct and has_app_context() and self.direct_allowed(args[0] if args else None):
+                data, code, headers = unpack(resp)
+                resp = await self.direct_response(marshaller, data, code, headers)
+                if profiler is not None:
+                    self.report(profiler, resp.headers, f.__qualname__)
+                return resp
+            marshal = marshaller if self.memo is None else partial(self.memo.marshal, marshaller)
+            if isinstance(resp, tuple) or profiler is not None:
                 data, code, headers = unpack(resp)
-                return (
-                    marshal(data, self.fields, self.envelope, self.skip_none, mask, self.ordered),
-                    code,
-                    headers
-                )
+                data = await _run(marshaller, marshal, data)
+                if profiler is not None:
+                    headers = dict(headers)
+                    self.report(profiler, headers, f.__qualname__)
+                return data, code, headers
             else:
-                return marshal(resp, self.fields, self.envelope, self.skip_none, mask, self.ordered)
+                return await _run(marshaller, marshal, resp)
 
         return wrapper
 
+    def direct_allowed(self, resource=None):
+        """
+        Whether the response can be written directly for the current request.
+
+        The response must be negotiated as ``application/json`` with the default representation
+        and the JSON settings must allow a compact output (no debug indentation, no custom settings),
+        otherwise the response goes through the API representations.
+
+        :param resource: the decorated method resource (if any)
+        """
+        # ugly local import to avoid dependency loop
+        from .resource import Resource
+
+        settings = current_app.config.get('RESTPLUS_JSON') or {}
+        if current_app.debug or any(key not in COMPACT_JSON_SETTINGS for key in settings):
+            return False
+        if not isinstance(resource, Resource) or not has_request_context():
+            return True
+        accept = request.accept_mimetypes
+        representations = resource.representations or {}
+        if representations and accept.best_match(representations, default=None) in representations:
+            return False
+        api = resource.api
+        if api is None:
+            return True
+        mediatype = accept.best_match(api.representations, default=api.default_mediatype)
+        return mediatype == 'application/json' and api.representations.get(mediatype) is output_json
+
+    def requested_fields(self):
+        """
+        Get the dotted attributes paths marshalled for the current request
+        (see :attr:`Marshaller.projection`).
+
+        :raises ParseError: when the client mask is unparseable/invalid or exceeds the limits
+        :rtype: list
+        """
+        mask = (client_mask() if has_request_context() else None) or self.mask
+        return list(compile_marshaller(self.fields, None, self.skip_none, mask, self.ordered).projection)
+
+    def profiler(self):
+        """Get a profiler if the current request is profiled"""
+        if self.profile is False:
+            return None
+        rate = current_app.config.get('RESTPLUS_PROFILE_RATE', PROFILE_RATE)
+        if self.profile or (rate and random.random() < rate):
+            return MarshallingProfiler()
+
+    def report(self, profiler, headers, name=None):
+        """
+        Log a request profile and expose it in the response headers.
+
+        :param str name: the profiled function name (logged outside of a request)
+        """
+        report = profiler.format()
+        if has_request_context():
+            current_app.logger.info('Marshalling profile for %s %s: %s', request.method, request.path, report)
+        else:
+            current_app.logger.info('Marshalling profile for %s: %s', name, report)
+        header = current_app.config.get('RESTPLUS_PROFILE_HEADER')
+        if header:
+            headers[header] = report
+
+    def stream_response(self, data, code, headers, mask, resolve=False):
+        """
+        Build a response streaming the marshalled items as a JSON array.
+
+        Items are marshalled by chunks of ``RESTPLUS_STREAM_CHUNK_SIZE`` items
+        and the awaitable values of each chunk are resolved before it is marshalled.
+        Streamed responses are not profiled.
+
+        :param bool resolve: whether or not to await the awaitable fields values
+        """
+        marshaller = compile_marshaller(self.fields, None, self.skip_none, mask, self.ordered, resolve=resolve)
+        marshal = marshaller if self.memo is None else partial(self.memo.marshal, marshaller)
+        chunk_size = current_app.config.get('RESTPLUS_STREAM_CHUNK_SIZE', STREAM_CHUNK_SIZE)
+        concurrency = _concurrency()
+
+        async def marshal_chunk(chunk):
+            if not marshaller.resolving:
+                return marshal(chunk)
+            token = resolved.set(await marshaller.resolve(chunk, concurrency))
+            try:
+                return marshal(chunk)
+            finally:
+                resolved.reset(token)
+
+        async def iterate():
+            for item in data:
+                yield item
+
+        async def marshal_items():
+            chunk = []
+            async for item in (data if hasattr(data, '__aiter__') else iterate()):
+                chunk.append(item)
+                if len(chunk) >= chunk_size:
+                    for output in await marshal_chunk(chunk):
+                        yield output
+                    chunk = []
+            if chunk:
+                for output in await marshal_chunk(chunk):
+                    yield output
+
+        return output_json_stream(marshal_items(), code, headers, self.envelope)
+
+    async def direct_response(self, marshaller, data, code, headers):
+        """Build a JSON response written straight from the data"""
+        encode = json_encoder()
+        dumps = marshaller.dumps if self.memo is None else partial(self.memo.dumps, marshaller)
+        dumped = await _run(marshaller, dumps, data, lambda value: encode(value).decode('utf-8'))
+        resp = Response(dumped.encode('utf-8') + b'\n', code, mimetype='application/json')
+        resp.headers.extend(headers or {})
+        return resp
+
+
+async def _run(marshaller, func, data, *args):
+    """
+    Run a marshalling function.
+
+    Awaitable values are resolved first if the marshaller allows it.
+    Large lists are offloaded to the executor if the plan allows it,
+    otherwise marshalled cooperatively (see :func:`marshal_async`).
+    """
+    if marshaller.resolving:
+        token = resolved.set(await marshaller.resolve(data, _concurrency()))
+        try:
+            return await _run_resolved(marshaller, func, data, *args)
+        finally:
+            resolved.reset(token)
+    return await _run_resolved(marshaller, func, data, *args)
+
+
+async def _run_resolved(marshaller, func, data, *args):
+    if not _is_list(data) or not has_app_context():
+        return func(data, *args)
+    current = offloader()
+    if current is not None and marshaller.offloadable and current.should_offload(items=len(data)):
+        return await current.run(func, data, *args)
+    min_items = current_app.config.get('RESTPLUS_MARSHAL_ASYNC_MIN_ITEMS')
+    if func is marshaller and min_items is not None and len(data) >= min_items:
+        return await _marshal_cooperatively(marshaller, data)
+    return func(data, *args)
+
+
+def requested_fields():
+    """
+    Get the dotted attributes paths the response of the current ``marshal_with`` handler will read.
+
+    The projection is the model (with its default mask) restricted by the client (or default) mask:
+    nested models attributes are prefixed by their parent attribute (or loader key).
+
+    >>> @api.marshal_with(article)
+    ... async def get(self, id):
+    ...     # With X-Fields: title,owner{name} -> ['title', 'owner.name']
+    ...     return await db.articles.get(id, only=requested_fields())
+
+    :return: the dotted paths or ``None`` outside of a ``marshal_with`` handler
+    :rtype: list
+    """
+    current = _current.get()
+    return None if current is None else current.requested_fields()
+
+
+def client_mask():
+    """
+    Parse the mask requested by the client in the ``RESTPLUS_MASK_QUERY_PARAM`` query parameter
+    (if enabled) or in the ``RESTPLUS_MASK_HEADER`` header (if any).
+
+    The query parameter takes precedence so responses cached by URL are consistent.
+    Client masks are bounded by the ``RESTPLUS_MASK_MAX_LENGTH``, ``RESTPLUS_MASK_MAX_FIELDS``
+    and ``RESTPLUS_MASK_MAX_DEPTH`` configurations.
+
+    :raises ParseError: when the mask is unparseable/invalid or exceeds the limits
+    :rtype: ~mask.FrozenMask
+    """
+    config = current_app.config
+    param = config.get('RESTPLUS_MASK_QUERY_PARAM')
+    value = (param and request.args.get(param)) or request.headers.get(config['RESTPLUS_MASK_HEADER'])
+    return _parse_client_mask(value) if value else None
+
+
+def _parse_client_mask(value):
+    config = current_app.config
+    return parse_mask(value, skip=True,
+                      max_length=config.get('RESTPLUS_MASK_MAX_LENGTH'),
+                      max_fields=config.get('RESTPLUS_MASK_MAX_FIELDS'),
+                      max_depth=config.get('RESTPLUS_MASK_MAX_DEPTH'))
+
+
+def canonical_mask_redirect():
+    """
+    Redirect ``GET`` and ``HEAD`` requests with a non canonical query parameter mask
+    to the URL with the canonical mask (see :func:`~mask.canonical`)
+    so equivalent masks share the same URL (and cache entries).
+
+    :raises ParseError: when the mask is unparseable/invalid or exceeds the limits
+    :return: a permanent redirection response or ``None`` if the request URL is canonical
+    """
+    config = current_app.config
+    param = config.get('RESTPLUS_MASK_QUERY_PARAM')
+    if not param or not config.get('RESTPLUS_MASK_QUERY_REDIRECT') or request.method not in ('GET', 'HEAD'):
+        return None
+    value = request.args.get(param)
+    if not value:
+        return None
+    normalized = canonical_mask(_parse_client_mask(value))
+    if value == normalized:
+        return None
+    query = []
+    for key, arg in parse_qsl(request.query_string.decode('ascii'), keep_blank_values=True):
+        if key != param:
+            query.append((key, arg))
+        elif normalized is not None:
+            query.append((key, normalized))
+            normalized = None
+    return redirect('{0}?{1}'.format(request.path, urlencode(query, safe='{},*')), HTTPStatus.MOVED_PERMANENTLY)
+
+
+def is_streamable(data):
+    """Whether data is a collection that can be streamed"""
+    return isinstance(data, (list, tuple, Iterator)) or hasattr(data, '__aiter__')
+
 
 class marshal_with_field(object):
     """
@@ -5,12 +5,33 @@ import re
 from collections import OrderedDict
 from inspect import isclass
 
+from quart import current_app, has_app_context
+
 from .errors import RestError
+from .utils import LRUCache
 
 log = logging.getLogger(__name__)
 
 LEXER = re.compile(r'\{|\}|\,|[\w_:\-\*]+')
 
+#: The default maximum number of parsed masks kept in memory
+#: (overridden per application by the ``RESTPLUS_MASK_PARSE_CACHE_SIZE`` configuration)
+MASKS_CACHE_SIZE = 256
+
+#: The default maximum length of a client mask
+#: (overridden by the ``RESTPLUS_MASK_MAX_LENGTH`` configuration)
+MASK_MAX_LENGTH = 2048
+
+#: The default maximum number of fields of a client mask
+#: (overridden by the ``RESTPLUS_MASK_MAX_FIELDS`` configuration)
+MASK_MAX_FIELDS = 256
+
+#: The default maximum nesting depth of a client mask
+#: (overridden by the ``RESTPLUS_MASK_MAX_DEPTH`` configuration)
+MASK_MAX_DEPTH = 8
+
+_masks = LRUCache(MASKS_CACHE_SIZE)
+
 
 class MaskError(RestError):
     """Raised when an error occurs on mask"""
@@ -40,7 +61,7 @@ class Mask(OrderedDict):
             self.skip = skip
             super(Mask, self).__init__(**kwargs)
 
-    def parse(self, mask):
+    def parse(self, mask, max_fields=None, max_depth=None):
         """
         Parse a fields mask.
         Expect something in the form::
@@ -54,7 +75,9 @@ class Mask(OrderedDict):
         All extras characters will be ignored.
 
         :param str mask: the mask string to parse
-        :raises ParseError: when a mask is unparseable/invalid
+        :param int max_fields: an optional maximum number of fields
+        :param int max_depth: an optional maximum nesting depth
+        :raises ParseError: when a mask is unparseable/invalid or exceeds the limits
 
         """
         if not mask:
@@ -64,11 +87,15 @@ class Mask(OrderedDict):
         fields = self
         previous = None
         stack = []
+        count = 0
 
-        for token in LEXER.findall(mask):
+        for match in LEXER.finditer(mask):
+            token = match.group()
             if token == '{':
                 if previous not in fields:
                     raise ParseError('Unexpected opening bracket')
+                if max_depth is not None and len(stack) >= max_depth:
+                    raise ParseError('Mask exceeds the maximum depth ({0})'.format(max_depth))
                 fields[previous] = Mask(skip=self.skip)
                 stack.append(fields)
                 fields = fields[previous]
@@ -80,6 +107,9 @@ class Mask(OrderedDict):
                 if previous in (',', '{', None):
                     raise ParseError('Unexpected comma')
             else:
+                count += 1
+                if max_fields is not None and count > max_fields:
+                    raise ParseError('Mask exceeds the maximum number of fields ({0})'.format(max_fields))
                 fields[token] = True
 
             previous = token
@@ -163,6 +193,100 @@ class Mask(OrderedDict):
         ]))
 
 
+class FrozenMask(Mask):
+    """
+    An immutable parsed mask, safely shared between requests (see :func:`parse`).
+
+    :param dict mask: the parsed mask
+    :param bool skip: If ``True``, missing fields won't appear in result
+    """
+    def __init__(self, mask=None, skip=False):
+        super(FrozenMask, self).__init__(skip=skip)
+        for key, value in (mask or {}).items():
+            if isinstance(value, dict):
+                value = value if isinstance(value, FrozenMask) else FrozenMask(value, getattr(value, 'skip', skip))
+            OrderedDict.__setitem__(self, key, value)
+        self._str = super(FrozenMask, self).__str__()
+
+    def _immutable(self, *args, **kwargs):
+        raise MaskError('Parsed masks are immutable')
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = parse = _immutable
+
+    def __str__(self):
+        return self._str
+
+    def __reduce__(self):
+        return (FrozenMask, (OrderedDict(self), self.skip))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+def parse(mask, skip=False, max_length=None, max_fields=None, max_depth=None):
+    """
+    Parse a mask string into a cached :class:`FrozenMask`.
+
+    Parsed masks are cached by mask string (and parsing options) in a bounded cache
+    (the current application one or a process-wide one outside of an application context).
+
+    :param str mask: the mask string to parse
+    :param bool skip: If ``True``, missing fields won't appear in result
+    :param int max_length: an optional maximum length of the mask string
+    :param int max_fields: an optional maximum number of fields
+    :param int max_depth: an optional maximum nesting depth
+    :raises ParseError: when a mask is unparseable/invalid or exceeds the limits
+    :rtype: FrozenMask
+    """
+    key = (mask, skip, max_length, max_fields, max_depth)
+    cache = _cache()
+    parsed = cache.get(key)
+    if parsed is None:
+        if max_length is not None and len(mask) > max_length:
+            raise ParseError('Mask exceeds the maximum length ({0})'.format(max_length))
+        parsed = Mask(skip=skip)
+        parsed.parse(mask, max_fields, max_depth)
+        parsed = cache.set(key, FrozenMask(parsed, skip))
+    return parsed
+
+
+def canonical(mask):
+    """
+    Get the canonical string of a mask: fields sorted by name (the star token last),
+    without spaces nor external brackets.
+
+    Equivalent masks share the same canonical string (ie. ``b, a{d,c}`` and ``{a{c,d},b}`` give ``a{c,d},b``).
+
+    :param Mask mask: the parsed mask
+    :rtype: str
+    """
+    return ','.join(
+        key + '{' + canonical(value) + '}' if isinstance(value, dict) else key
+        for key, value in sorted(mask.items(), key=lambda item: (item[0] == '*', item[0]))
+    )
+
+
+def _cache():
+    if has_app_context():
+        cache = current_app.extensions.get('restplus', {}).get('masks')
+        if cache is not None:
+            return cache
+    return _masks
+
+
+def cache_info():
+    """
+    Report the parsed masks cache statistics
+    (of the current application or of the process-wide cache outside of an application context).
+
+    :rtype: ~utils.CacheInfo
+    """
+    return _cache().info()
+
+
 def apply(data, mask, skip=False):
     """
     Apply a fields mask to the data.
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+from json.encoder import encode_basestring_ascii
+
+from .fields import compile_accessor
+from .marshalling import _is_list, _has_lists, _compact_dumps
+from .utils import LRUCache
+
+__all__ = ('MarshallingMemo',)
+
+#: The default maximum number of memoized objects
+MEMO_SIZE = 4096
+
+
+class MarshallingMemo(object):
+    """
+    Memoize marshalled objects by identity and version.
+
+    Each object is marshalled once per compiled marshaller (ie. per model, mask and options),
+    identity key and version: lists reuse the memoized items and only marshal the others.
+
+    >>> articles_memo = MarshallingMemo(key='id', version='updated_at', ttl=3600)
+    >>> @api.marshal_list_with(article, memo=articles_memo)
+    ... async def get(self):
+    ...     return await db.articles.page()
+
+    Memoized outputs are shared: they must not be modified.
+
+    :param key: the object identity attribute (objects without identity are not memoized)
+    :param version: an optional object version attribute (ex: ``updated_at``),
+                    without version objects are memoized until evicted
+    :param int maxsize: the maximum number of memoized outputs
+    :param float ttl: an optional time to live (in seconds) of the memoized outputs
+    """
+    def __init__(self, key='id', version=None, maxsize=MEMO_SIZE, ttl=None):
+        self.key = key
+        self.version = version
+        self.cache = LRUCache(maxsize, ttl)
+        self._key = compile_accessor(key)
+        self._version = None if version is None else compile_accessor(version)
+
+    def marshal(self, marshaller, data):
+        """
+        Marshal an object or a list of objects, reusing the memoized outputs.
+
+        :param Marshaller marshaller: the compiled marshaller
+        :param data: the actual object(s) from which the fields are taken from
+        """
+        if _is_list(data):
+            return marshaller.envelop(self._many(marshaller, data, 'dict', marshaller.marshal_many))
+        return marshaller.envelop(self._many(marshaller, [data], 'dict', marshaller.marshal_many)[0])
+
+    def dumps(self, marshaller, data, dump=None):
+        """
+        Serialize an object or a list of objects into a compact JSON string,
+        reusing the memoized JSON fragments (see :meth:`~marshalling.Marshaller.dumps`).
+
+        :param Marshaller marshaller: the compiled marshaller
+        :param data: the actual object(s) from which the fields are taken from
+        :param callable dump: the fallback encoder turning a value into a JSON string
+        :rtype: str
+        """
+        dump = dump or _compact_dumps
+
+        def write_many(objs):
+            return marshaller.write_many(objs, dump)
+
+        if _is_list(data):
+            out = '[' + ','.join(self._many(marshaller, data, 'json', write_many)) + ']'
+        else:
+            out = self._many(marshaller, [data], 'json', write_many)[0]
+        if marshaller.envelope:
+            out = '{' + encode_basestring_ascii(str(marshaller.envelope)) + ':' + out + '}'
+        return out
+
+    def _many(self, marshaller, objs, kind, produce):
+        if _has_lists(objs):
+            return produce(objs)
+        cache = self.cache
+        out = []
+        misses = []
+        keys = []
+        for i, obj in enumerate(objs):
+            key = self._identify(marshaller, kind, obj)
+            value = None if key is None else cache.get(key)
+            if value is None:
+                misses.append(i)
+                keys.append(key)
+            out.append(value)
+        if misses:
+            values = produce([objs[i] for i in misses])
+            for i, key, value in zip(misses, keys, values):
+                out[i] = value if key is None else cache.set(key, value)
+        return out
+
+    def _identify(self, marshaller, kind, obj):
+        identity = self._key(obj)
+        if identity is None:
+            return None
+        version = None if self._version is None else self._version(obj)
+        return (marshaller, kind, identity, version)
+
+    def info(self):
+        """
+        Report the memo statistics
+
+        :rtype: ~utils.CacheInfo
+        """
+        return self.cache.info()
+
+    def clear(self):
+        """Forget all the memoized outputs"""
+        self.cache.clear()
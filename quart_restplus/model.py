@@ -1,6 +1,5 @@
 # -*- coding: utf-8 -*-
 import copy
-import re
 import warnings
 
 from http import HTTPStatus
@@ -11,12 +10,9 @@ from .mask import Mask
 from .errors import abort
 
 from jsonschema import Draft4Validator
-from jsonschema.exceptions import ValidationError
 
 from .utils import not_none
-
-
-RE_REQUIRED = re.compile(r'u?\'(?P<name>.*)\' is a required property', re.I | re.U)
+from .validation import CompiledValidator, VALIDATION_BACKENDS, RE_REQUIRED
 
 
 def instance(cls):
@@ -66,6 +62,22 @@ class ModelBase(object):
 
     @property
     def __schema__(self):
+        """
+        The model JSON schema.
+
+        The schema is built once and cached until the model is mutated
+        (fields, parents or mask changes).
+        """
+        snapshot = self._snapshot()
+        cached = self.__dict__.get('_cached_schema')
+        if cached is None or cached[0] != snapshot:
+            cached = self._cached_schema = (snapshot, self._build_schema())
+        return cached[1]
+
+    def _snapshot(self):
+        return (tuple(parent.name for parent in self.__parents__), self._schema)
+
+    def _build_schema(self):
         schema = self._schema
 
         if self.__parents__:
@@ -91,13 +103,48 @@ class ModelBase(object):
         model.__parents__ = parents[:-1]
         return model
 
-    def validate(self, data, resolver=None, format_checker=None):
-        validator = Draft4Validator(self.__schema__, resolver=resolver, format_checker=format_checker)
-        try:
-            validator.validate(data)
-        except ValidationError:
-            abort(HTTPStatus.BAD_REQUEST, message='Input payload validation failed',
-                  errors=dict(self.format_error(e) for e in validator.iter_errors(data)))
+    def validator(self, resolver=None, format_checker=None, backend='jsonschema'):
+        """
+        Get the JSON schema validator of this model.
+
+        The validator is cached along with the schema
+        (and rebuilt when the model, the resolver or the format checker changes).
+
+        :param RefResolver resolver: an optional JSON references resolver
+        :param FormatChecker format_checker: an optional formats checker
+        :param str backend: the validation backend, ``jsonschema`` or ``compiled``
+                            (see :class:`~validation.CompiledValidator`)
+        :raises ValueError: if the backend is unknown
+        :rtype: Draft4Validator or CompiledValidator
+        """
+        if backend not in VALIDATION_BACKENDS:
+            raise ValueError('Unknown validation backend "{0}"'.format(backend))
+        schema = self.__schema__
+        validators = self.__dict__.setdefault('_cached_validators', {})
+        cached = validators.get(backend)
+        if cached is None or cached[0] is not schema or cached[1] is not resolver or cached[2] is not format_checker:
+            factory = CompiledValidator if backend == 'compiled' else Draft4Validator
+            validator = factory(schema, resolver=resolver, format_checker=format_checker)
+            cached = validators[backend] = (schema, resolver, format_checker, validator)
+        return cached[3]
+
+    def errors(self, data, resolver=None, format_checker=None, backend='jsonschema'):
+        """
+        Validate some data against the model schema.
+
+        :param str backend: the validation backend (see :data:`~validation.VALIDATION_BACKENDS`)
+        :return: the error messages by dotted path (empty if the data is valid)
+        :rtype: dict
+        """
+        validator = self.validator(resolver, format_checker, backend)
+        if backend == 'compiled':
+            return validator.errors(data)
+        return dict(self.format_error(e) for e in validator.iter_errors(data))
+
+    def validate(self, data, resolver=None, format_checker=None, backend='jsonschema'):
+        errors = self.errors(data, resolver, format_checker, backend)
+        if errors:
+            abort(HTTPStatus.BAD_REQUEST, message='Input payload validation failed', errors=errors)
 
     def format_error(self, error):
         path = list(error.path)
@@ -134,6 +181,10 @@ class RawModel(ModelBase):
             return self.__class__.clone(name, self, *parents)
         self.clone = instance_clone
 
+    def _snapshot(self):
+        # Fields are compared by identity (as for compiled marshallers)
+        return (tuple(self.items()), tuple(parent.name for parent in self.__parents__), self.__mask__)
+
     @property
     def _schema(self):
         properties = self.wrapper()
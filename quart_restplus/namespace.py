@@ -9,7 +9,7 @@ from quart import request
 from quart.views import http_method_funcs
 
 from .errors import abort
-from .marshalling import marshal, marshal_with
+from .marshalling import marshal, marshal_with, requested_fields
 from .model import Model, OrderedModel, SchemaModel
 from .reqparse import RequestParser
 from .utils import merge
@@ -252,6 +252,10 @@ class Namespace(object):
         """A shortcut to the :func:`marshal` helper"""
         return marshal(*args, **kwargs)
 
+    def requested_fields(self):
+        """A shortcut to the :func:`~marshalling.requested_fields` helper"""
+        return requested_fields()
+
     def errorhandler(self, exception):
         """A decorator to register an error handler for a given exception"""
         if inspect.isclass(exception) and issubclass(exception, Exception):
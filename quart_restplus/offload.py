@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+import asyncio
+
+from collections import namedtuple
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from quart import current_app, has_app_context
+
+__all__ = ('Offloader', 'OffloadInfo', 'maybe_offload', 'offload_info')
+
+#: The default minimum number of items to offload marshalling and JSON encoding
+#: (overridden by the ``RESTPLUS_OFFLOAD_MIN_ITEMS`` configuration)
+OFFLOAD_MIN_ITEMS = 1000
+
+#: The default minimum request body size (in bytes) to offload payload validation
+#: (overridden by the ``RESTPLUS_OFFLOAD_MIN_BYTES`` configuration)
+OFFLOAD_MIN_BYTES = 1024 * 1024
+
+OffloadInfo = namedtuple('OffloadInfo', ('inline', 'offloaded', 'running', 'max_workers'))
+
+
+class Offloader(object):
+    """
+    Run CPU-bound steps (marshalling, JSON encoding and payload validation)
+    in an executor when their input exceeds a threshold, keeping the event loop responsive.
+
+    Offloaded functions run outside of the request context.
+    They are closures over compiled marshallers and encoders which can not be pickled,
+    so process pools are not supported.
+
+    :param executor: a :class:`~concurrent.futures.Executor` or ``'thread'`` to create a thread pool
+    :param int max_workers: the created thread pool size
+    :param int min_items: the minimum number of items to offload marshalling and encoding
+    :param int min_bytes: the minimum request body size (in bytes) to offload validation
+    :raises ValueError: if the executor is not supported
+    """
+    def __init__(self, executor='thread', max_workers=None, min_items=OFFLOAD_MIN_ITEMS,
+                 min_bytes=OFFLOAD_MIN_BYTES):
+        if executor == 'thread':
+            executor = ThreadPoolExecutor(max_workers, thread_name_prefix='restplus-offload')
+        elif isinstance(executor, ProcessPoolExecutor):
+            raise ValueError('Process pools can not be used as offload executor, use a thread pool instead')
+        elif not isinstance(executor, Executor):
+            raise ValueError('Unsupported offload executor "{0}"'.format(executor))
+        self.executor = executor
+        self.min_items = min_items
+        self.min_bytes = min_bytes
+        # Counters are only updated from the event loop
+        self.inline = 0
+        self.offloaded = 0
+        self.running = 0
+
+    def should_offload(self, items=None, size=None):
+        """
+        Check if a step input exceeds the thresholds (counting inline runs otherwise).
+
+        :param int items: the number of items to process
+        :param int size: the size in bytes of the input to process
+        :rtype: bool
+        """
+        many = items is not None and self.min_items is not None and items >= self.min_items
+        large = size is not None and self.min_bytes is not None and size >= self.min_bytes
+        offload = many or large
+        if not offload:
+            self.inline += 1
+        return offload
+
+    async def run(self, func, *args):
+        """Run a function in the executor and await its result"""
+        self.offloaded += 1
+        self.running += 1
+        try:
+            return await asyncio.get_event_loop().run_in_executor(self.executor, func, *args)
+        finally:
+            self.running -= 1
+
+    def info(self):
+        """
+        Get the offloading statistics.
+
+        :rtype: OffloadInfo
+        """
+        max_workers = getattr(self.executor, '_max_workers', None)
+        return OffloadInfo(self.inline, self.offloaded, self.running, max_workers)
+
+    def shutdown(self, wait=True):
+        """Shutdown the executor"""
+        self.executor.shutdown(wait=wait)
+
+
+def make_offloader(config):
+    """
+    Build the offloader from an application configuration.
+
+    :param dict config: the application configuration
+    :return: an :class:`Offloader` or ``None`` if ``RESTPLUS_OFFLOAD_EXECUTOR`` is not set
+    :raises ValueError: if the executor is not supported (ie. a process pool)
+    """
+    executor = config.get('RESTPLUS_OFFLOAD_EXECUTOR')
+    if not executor:
+        return None
+    return Offloader(
+        executor,
+        max_workers=config.get('RESTPLUS_OFFLOAD_WORKERS'),
+        min_items=config.get('RESTPLUS_OFFLOAD_MIN_ITEMS', OFFLOAD_MIN_ITEMS),
+        min_bytes=config.get('RESTPLUS_OFFLOAD_MIN_BYTES', OFFLOAD_MIN_BYTES),
+    )
+
+
+def offloader():
+    """Get the current application offloader (``None`` if offloading is disabled)"""
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('restplus', {}).get('offloader')
+
+
+async def maybe_offload(func, *args, items=None, size=None):
+    """
+    Run a function in the current application offloader if its input exceeds the thresholds,
+    inline otherwise.
+
+    :param int items: the number of items to process
+    :param int size: the size in bytes of the input to process
+    """
+    current = offloader()
+    if current is not None and current.should_offload(items=items, size=size):
+        return await current.run(func, *args)
+    return func(*args)
+
+
+def offload_info():
+    """
+    Get the current application offloading statistics.
+
+    :return: an :class:`OffloadInfo` or ``None`` if offloading is disabled
+    """
+    current = offloader()
+    return current.info() if current is not None else None
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+import json
+import time
+
+from collections import OrderedDict, namedtuple
+
+from .utils import LRUCache
+
+__all__ = ('MarshallingProfiler', 'FieldCost')
+
+#: The default sampling rate of profiled ``marshal_with`` requests
+#: (overridden by the ``RESTPLUS_PROFILE_RATE`` configuration)
+PROFILE_RATE = 0.
+
+FieldCost = namedtuple('FieldCost', ('model', 'field', 'calls', 'time', 'bytes'))
+
+_encode = json.JSONEncoder(separators=(',', ':'), default=str).encode
+
+
+def _value_size(value):
+    return len(_encode(value))
+
+
+class MarshallingProfiler(object):
+    """
+    Record the marshalling cost of each field of the marshalled models:
+    call count, cumulative time (including nested models) and output bytes (as compact JSON).
+
+    >>> profiler = MarshallingProfiler()
+    >>> data = marshal(people, person, profiler=profiler)
+    >>> profiler.report(1)
+    [FieldCost(model='Person', field='address', calls=100, time=0.0123, bytes=5400)]
+
+    Profiled marshallers are compiled for each profiler and are not shared:
+    profilers are meant to be used for a single request or a single benchmark.
+    """
+    def __init__(self):
+        self.stats = OrderedDict()
+        #: The profiled marshallers cache (see :func:`~marshalling.compile_marshaller`)
+        self.cache = LRUCache(None)
+
+    def record(self, model, field, calls, elapsed, size):
+        """
+        Record some field marshalling costs.
+
+        :param str model: the model name
+        :param str field: the field key
+        :param int calls: the number of marshalled values
+        :param float elapsed: the elapsed time in seconds
+        :param int size: the output size in bytes
+        """
+        stat = self.stats.get((model, field))
+        if stat is None:
+            stat = self.stats[(model, field)] = [0, 0., 0]
+        stat[0] += calls
+        stat[1] += elapsed
+        stat[2] += size
+
+    def timed(self, model, field, func, many=False, text=False):
+        """
+        Wrap a marshalling function to record its costs.
+
+        :param str model: the model name
+        :param str field: the field key
+        :param callable func: the marshalling function
+        :param bool many: whether the function returns a list of values (one per object)
+        :param bool text: whether the function returns JSON text
+        """
+        record = self.record
+        size = len if text else _value_size
+
+        def wrapper(*args):
+            start = time.perf_counter()
+            value = func(*args)
+            elapsed = time.perf_counter() - start
+            if many:
+                record(model, field, len(value), elapsed, sum(size(v) for v in value))
+            else:
+                record(model, field, 1, elapsed, size(value))
+            return value
+
+        return wrapper
+
+    def report(self, limit=None):
+        """
+        Get the fields costs, the most expensive first.
+
+        :param int limit: the maximum number of fields to report
+        :rtype: list of FieldCost
+        """
+        costs = sorted(
+            (FieldCost(model, field, calls, elapsed, size)
+             for (model, field), (calls, elapsed, size) in self.stats.items()),
+            key=lambda cost: cost.time, reverse=True
+        )
+        return costs[:limit] if limit else costs
+
+    def format(self, limit=5):
+        """
+        Format the most expensive fields costs in the ``Server-Timing`` header format.
+
+        :param int limit: the maximum number of fields to report
+        :rtype: str
+        """
+        return ', '.join(
+            '{0}.{1};dur={2:.3f};desc="{3} calls, {4} bytes"'.format(
+                cost.model, cost.field, cost.time * 1000, cost.calls, cost.bytes
+            )
+            for cost in self.report(limit)
+        )
+
+    def reset(self):
+        """Reset the recorded costs"""
+        self.stats.clear()
@@ -1,27 +1,205 @@
 # -*- coding: utf-8 -*-
+import json
+
+from collections import OrderedDict
+from datetime import date, datetime, time
+from decimal import Decimal
+from uuid import UUID
+
+from quart import make_response, current_app, has_request_context, stream_with_context, Response
+
+from .offload import maybe_offload
+
 try:
-    from ujson import dumps
-except ImportError:
-    from json import dumps
+    import ujson
+except ImportError:  # pragma: no cover
+    ujson = None
 
-from quart import make_response, current_app
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
 
+#: The default number of items encoded per streamed chunk
+#: (overridden by the ``RESTPLUS_STREAM_CHUNK_SIZE`` configuration)
+STREAM_CHUNK_SIZE = 100
 
-async def output_json(data, code, headers=None):
-    """Makes a Quart response with a JSON encoded body"""
+#: The registered JSON encoders factories by name
+JSON_ENCODERS = OrderedDict()
+
+
+def json_default(obj):
+    """
+    Encode some common non JSON native types.
+
+    - :class:`~datetime.datetime`, :class:`~datetime.date` and :class:`~datetime.time`
+      are encoded in ISO 8601
+    - :class:`~uuid.UUID` and :class:`~decimal.Decimal` are encoded as strings
+
+    :raises TypeError: if the object type is not supported
+    """
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    elif isinstance(obj, (UUID, Decimal)):
+        return str(obj)
+    raise TypeError('Object of type {0} is not JSON serializable'.format(obj.__class__.__name__))
+
+
+def register_json_encoder(name):
+    """
+    A decorator registering a JSON encoder factory.
+
+    The factory receives the ``RESTPLUS_JSON`` settings and
+    a ``native_types`` flag asking for :func:`json_default` types support.
+    It must return a function encoding data into :class:`bytes`.
+
+    :param str name: the encoder name (to be used in ``RESTPLUS_JSON_ENCODER``)
+    """
+    def wrapper(factory):
+        JSON_ENCODERS[name] = factory
+        return factory
+    return wrapper
+
+
+@register_json_encoder('json')
+def stdlib_encoder(settings, native_types=False):
+    """The standard library :mod:`json` encoder"""
+    settings = dict(settings)
+    if native_types:
+        settings.setdefault('default', json_default)
+    cls = settings.pop('cls', None) or json.JSONEncoder
+    dumps = cls(**settings).encode
+    return lambda data: dumps(data).encode('utf-8')
+
+
+if ujson is not None:
+    @register_json_encoder('ujson')
+    def ujson_encoder(settings, native_types=False):
+        """The `ujson <https://github.com/ultrajson/ultrajson>`_ encoder"""
+        if native_types:
+            settings = dict(settings, default=settings.get('default', json_default))
+        dumps = ujson.dumps
+        return lambda data: dumps(data, **settings).encode('utf-8')
+
+
+if orjson is not None:
+    @register_json_encoder('orjson')
+    def orjson_encoder(settings, native_types=False):
+        """
+        The `orjson <https://github.com/ijl/orjson>`_ encoder.
 
-    settings = current_app.config.get('RESTPLUS_JSON', {})
+        ``datetime`` and ``UUID`` are always natively encoded,
+        ``indent`` is always 2 spaces and ``sort_keys`` is supported.
+        """
+        option = settings.get('option', 0) | orjson.OPT_NON_STR_KEYS
+        if settings.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        if settings.get('sort_keys'):
+            option |= orjson.OPT_SORT_KEYS
+        default = settings.get('default', json_default if native_types else None)
+        dumps = orjson.dumps
+        return lambda data: dumps(data, default=default, option=option)
 
+
+def make_json_encoder(config, debug=False):
+    """
+    Build the JSON encoder from an application configuration.
+
+    The encoder is chosen by ``RESTPLUS_JSON_ENCODER``
+    (default to ``ujson`` if installed, ``json`` otherwise)
+    and configured with ``RESTPLUS_JSON`` settings and ``RESTPLUS_JSON_NATIVE_TYPES``.
+    In debug mode, the output is indented if no indent is set.
+
+    :param dict config: the application configuration
+    :param bool debug: whether to build the debug mode encoder
+    :raises ValueError: if the encoder is unknown
+    :return: a function encoding data into bytes
+    """
+    name = config.get('RESTPLUS_JSON_ENCODER') or ('ujson' if 'ujson' in JSON_ENCODERS else 'json')
+    if name not in JSON_ENCODERS:
+        raise ValueError('Unknown JSON encoder "{0}"'.format(name))
+    settings = dict(config.get('RESTPLUS_JSON', {}))
     # If we're in debug mode, and the indent is not set, we set it to a
     # reasonable value here.  Note that this won't override any existing value
     # that was set.
-    if current_app.debug:
+    if debug:
         settings.setdefault('indent', 4)
+    return JSON_ENCODERS[name](settings, native_types=config.get('RESTPLUS_JSON_NATIVE_TYPES', False))
+
+
+def json_encoder():
+    """Get the current application JSON encoder (resolved at initialization)"""
+    encoders = current_app.extensions.get('restplus', {}).get('json_encoders')
+    if encoders is None:
+        return make_json_encoder(current_app.config, current_app.debug)
+    return encoders[bool(current_app.debug)]
+
+
+def cardinality(data):
+    """Count the items of a list or of the lists of an (enveloped) dict"""
+    if isinstance(data, (list, tuple)):
+        return len(data)
+    elif isinstance(data, dict):
+        return sum(len(value) for value in data.values() if isinstance(value, (list, tuple)))
+    return 0
+
+
+async def output_json(data, code, headers=None):
+    """Makes a Quart response with a JSON encoded body"""
 
     # always end the json dumps with a new line
-    # see https://github.com/mitsuhiko/quart/pull/1262
-    dumped = dumps(data, **settings) + "\n"
+    # see https://github.com/mitsuhiko/flask/pull/1262
+    dumped = await maybe_offload(json_encoder(), data, items=cardinality(data)) + b'\n'
 
     resp = await make_response(dumped, code)
     resp.headers.extend(headers or {})
     return resp
+
+
+def output_json_stream(items, code, headers=None, envelope=None):
+    """
+    Makes a Quart response streaming a JSON array.
+
+    Items are consumed and encoded while the response is sent,
+    by chunks of ``RESTPLUS_STREAM_CHUNK_SIZE`` items.
+
+    :param items: an iterable or an asynchronous iterable of serializable items
+    :param int code: the HTTP status code
+    :param headers: optional response headers
+    :param str envelope: optional key that will be used to envelop the streamed array
+    """
+    encode = json_encoder()
+    chunk_size = current_app.config.get('RESTPLUS_STREAM_CHUNK_SIZE', STREAM_CHUNK_SIZE)
+    prefix = b'{' + encode(envelope) + b':[' if envelope else b'['
+    suffix = b']}\n' if envelope else b']\n'
+
+    def encode_chunk(chunk, first):
+        body = b','.join(encode(item) for item in chunk)
+        return body if first else b',' + body
+
+    async def generate():
+        yield prefix
+        chunk = []
+        first = True
+        if hasattr(items, '__aiter__'):
+            async for item in items:
+                chunk.append(item)
+                if len(chunk) >= chunk_size:
+                    yield encode_chunk(chunk, first)
+                    chunk, first = [], False
+        else:
+            for item in items:
+                chunk.append(item)
+                if len(chunk) >= chunk_size:
+                    yield encode_chunk(chunk, first)
+                    chunk, first = [], False
+        if chunk:
+            yield encode_chunk(chunk, first)
+        yield suffix
+
+    if has_request_context():
+        generate = stream_with_context(generate)
+
+    resp = Response(generate(), code, mimetype='application/json')
+    resp.headers.extend(headers or {})
+    return resp
@@ -1,10 +1,11 @@
 # -*- coding: utf-8 -*-
-import asyncio
+import inspect
 
-from quart import request, Response
+from quart import request, current_app, Response
 from quart.views import MethodView
 
 from .model import ModelBase
+from .offload import maybe_offload
 from .utils import unpack
 
 
@@ -40,7 +41,7 @@ class Resource(MethodView):
         await self.validate_payload(handler)
 
         resp = handler(*args, **kwargs)
-        while asyncio.iscoroutine(resp):
+        while inspect.isawaitable(resp):
             resp = await resp
 
         if isinstance(resp, Response):
@@ -65,12 +66,20 @@ class Resource(MethodView):
         """
         # TODO: proper content negotiation
         data = await request.get_json()
-        if collection:
-            data = data if isinstance(data, list) else [data]
-            for obj in data:
-                expect.validate(obj, self.api.refresolver, self.api.format_checker)
-        else:
-            expect.validate(data, self.api.refresolver, self.api.format_checker)
+        resolver, format_checker = self.api.refresolver, self.api.format_checker
+        backend = current_app.config.get('RESTPLUS_VALIDATION_BACKEND', 'jsonschema')
+
+        def validate():
+            if collection:
+                for obj in (data if isinstance(data, list) else [data]):
+                    expect.validate(obj, resolver, format_checker, backend)
+            else:
+                expect.validate(data, resolver, format_checker, backend)
+
+        size = request.content_length
+        if size is None:
+            size = len(await request.get_data())
+        await maybe_offload(validate, size=size)
 
     async def validate_payload(self, func):
         """Perform a payload validation on expected model if necessary"""
@@ -10,6 +10,7 @@ from quart import current_app
 from quart.routing import _parse_rule, VariablePart
 
 from . import fields
+from .mask import Mask, canonical as canonical_mask
 from .model import Model, ModelBase
 from .reqparse import RequestParser
 from .utils import merge, not_none, not_none_sorted
@@ -429,6 +430,13 @@ class Swagger(object):
             if isinstance(mask, str):
                 param['default'] = mask
             params.append(param)
+            query_param = current_app.config.get('RESTPLUS_MASK_QUERY_PARAM')
+            if query_param:
+                param = dict(param, name=query_param, description='An optional fields mask (in canonical form)')
+                param['in'] = 'query'
+                if isinstance(mask, str):
+                    param['default'] = canonical_mask(Mask(mask))
+                params.append(param)
 
         return params
 
@@ -1,14 +1,25 @@
 # -*- coding: utf-8 -*-
+import asyncio
 import re
+import threading
+import time
+import weakref
 
 from http import HTTPStatus
-from collections import OrderedDict
+from collections import OrderedDict, namedtuple
 from copy import deepcopy
 
 FIRST_CAP_RE = re.compile('(.)([A-Z][a-z]+)')
 ALL_CAP_RE = re.compile('([a-z0-9])([A-Z])')
 
-__all__ = ('merge', 'camel_to_dash', 'default_id', 'not_none', 'not_none_sorted', 'unpack')
+CacheInfo = namedtuple('CacheInfo', ('hits', 'misses', 'evictions', 'maxsize', 'currsize'))
+
+__all__ = (
+    'merge', 'camel_to_dash', 'default_id', 'not_none', 'not_none_sorted', 'unpack', 'LRUCache', 'CacheInfo',
+    'current_task', 'TaskVar',
+)
+
+_MISSING = object()
 
 
 def merge(first, second):
@@ -143,3 +154,138 @@ def unquote_etag(etag):
     if etag[:1] == etag[-1:] == '"':
         etag = etag[1:-1]
     return etag, weak
+
+
+class LRUCache(object):
+    """
+    A small thread-safe bounded mapping evicting the least recently used entries.
+
+    :param int maxsize: the maximum number of entries to keep.
+        ``None`` means unbounded and ``0`` disables caching.
+    :param float ttl: an optional time to live of the entries (in seconds).
+        Expired entries are evicted when read.
+    """
+    def __init__(self, maxsize=128, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = self.misses = self.evictions = 0
+        self._data = OrderedDict()
+        self._expires = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            if self.ttl is not None and self._expires[key] <= time.monotonic():
+                del self._data[key]
+                del self._expires[key]
+                self.misses += 1
+                self.evictions += 1
+                return default
+            self.hits += 1
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if self.maxsize == 0:
+            return value
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if self.ttl is not None:
+                self._expires[key] = time.monotonic() + self.ttl
+            self._evict()
+        return value
+
+    def resize(self, maxsize):
+        """Change the cache size, evicting entries if necessary"""
+        with self._lock:
+            self.maxsize = maxsize
+            self._evict()
+
+    def _evict(self):
+        if self.maxsize is not None:
+            while len(self._data) > self.maxsize:
+                key, _ = self._data.popitem(last=False)
+                self._expires.pop(key, None)
+                self.evictions += 1
+
+    def info(self):
+        """
+        Report the cache statistics
+
+        :rtype: CacheInfo
+        """
+        return CacheInfo(self.hits, self.misses, self.evictions, self.maxsize, len(self._data))
+
+    def clear(self):
+        """Empty the cache and reset its statistics"""
+        with self._lock:
+            self._data.clear()
+            self._expires.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+
+def current_task():
+    """
+    Get the running asyncio task (Python 3.6 and 3.7+ compatible).
+
+    :return: the current :class:`asyncio.Task` or ``None`` outside of a task
+    """
+    try:
+        if hasattr(asyncio, 'current_task'):
+            return asyncio.current_task()
+        return asyncio.Task.current_task()
+    except RuntimeError:  # No event loop
+        return None
+
+
+class TaskVar(object):
+    """
+    A minimal :class:`contextvars.ContextVar` replacement for Python 3.6.
+
+    Values are local to the running asyncio task (or to the thread outside of a task)
+    and are not inherited by the spawned tasks.
+
+    :param str name: the variable name
+    :param default: the value returned when the variable is not set
+    """
+    def __init__(self, name, default=None):
+        self.name = name
+        self.default = default
+        self._tasks = weakref.WeakKeyDictionary()
+        self._local = threading.local()
+
+    def _values(self):
+        task = current_task()
+        if task is None:
+            return self._local.__dict__
+        return self._tasks.setdefault(task, {})
+
+    def get(self):
+        return self._values().get('value', self.default)
+
+    def set(self, value):
+        """Set the value, returning a token restoring the previous one (see :meth:`reset`)"""
+        values = self._values()
+        token = values.get('value', _MISSING)
+        values['value'] = value
+        return token
+
+    def reset(self, token):
+        """Restore the value preceding the :meth:`set` call which returned ``token``"""
+        values = self._values()
+        if token is _MISSING:
+            values.pop('value', None)
+        else:
+            values['value'] = token
@@ -0,0 +1,376 @@
+# -*- coding: utf-8 -*-
+import itertools
+import numbers
+import re
+
+from jsonschema import Draft4Validator, RefResolver
+from jsonschema.exceptions import FormatError, RefResolutionError
+
+__all__ = ('CompiledValidator', 'VALIDATION_BACKENDS')
+
+#: The available payload validation backends
+#: (chosen by the ``RESTPLUS_VALIDATION_BACKEND`` configuration)
+VALIDATION_BACKENDS = ('jsonschema', 'compiled')
+
+RE_REQUIRED = re.compile(r'u?\'(?P<name>.*)\' is a required property', re.I | re.U)
+
+#: The JSON schema types checks (as Draft4Validator: booleans are not numbers)
+TYPES_CHECKS = {
+    'array': 'isinstance({0}, list)',
+    'boolean': 'isinstance({0}, bool)',
+    'integer': '(isinstance({0}, int) and not isinstance({0}, bool))',
+    'null': '{0} is None',
+    'number': '(isinstance({0}, Number) and not isinstance({0}, bool))',
+    'object': 'isinstance({0}, dict)',
+    'string': 'isinstance({0}, str)',
+}
+
+#: The keywords compiled into Python code, others are validated by jsonschema
+COMPILED_KEYWORDS = frozenset((
+    '$ref', 'additionalProperties', 'allOf', 'enum', 'format', 'items', 'maxItems', 'maxLength', 'maximum',
+    'minItems', 'minLength', 'minimum', 'multipleOf', 'pattern', 'properties', 'required', 'type',
+))
+
+
+def error_path(error, prefix=()):
+    """
+    Get the path of a jsonschema validation error
+    (including the missing property name of ``required`` errors).
+
+    :param jsonschema.ValidationError error: the validation error
+    :param tuple prefix: the path of the validated instance
+    :rtype: tuple
+    """
+    path = tuple(prefix) + tuple(error.path)
+    if error.validator == 'required':
+        path += (RE_REQUIRED.match(error.message).group('name'),)
+    return path
+
+
+class CompiledValidator(object):
+    """
+    A JSON schema (draft 4) validator compiled into a specialized Python function.
+
+    ``$ref`` are resolved once, at compilation, and each referenced schema
+    (ie. each model definition) is compiled into its own function.
+    Schemas using a keyword which is not compiled are validated by jsonschema,
+    so the errors are the same as with :class:`jsonschema.Draft4Validator`.
+
+    >>> validator = CompiledValidator(model.__schema__, resolver=api.refresolver)
+    >>> validator.errors({'age': 'x'})
+    {'name': "'name' is a required property", 'age': "'x' is not of type 'integer'"}
+
+    :param dict schema: the JSON schema
+    :param RefResolver resolver: an optional JSON references resolver
+    :param FormatChecker format_checker: an optional formats checker
+    """
+    def __init__(self, schema, resolver=None, format_checker=None):
+        self.schema = schema
+        self.resolver = resolver or RefResolver.from_schema(schema)
+        self.format_checker = format_checker
+        compiler = _Compiler(schema, self.resolver, format_checker)
+        #: The generated Python source code
+        self.source = compiler.compile()
+        self._validate = compiler.namespace['validate']
+
+    def iter_errors(self, instance):
+        """
+        Lazily yield the validation errors of an instance.
+
+        :param instance: the instance to validate
+        :return: ``(key, message)`` tuples, ``key`` being the dotted path of the invalid value
+        """
+        errors = []
+        self._validate(instance, (), errors)
+        for path, message in errors:
+            yield '.'.join(str(p) for p in path), message
+
+    def errors(self, instance):
+        """
+        Validate an instance.
+
+        :param instance: the instance to validate
+        :return: the error messages by dotted path (empty if the instance is valid)
+        :rtype: dict
+        """
+        return dict(self.iter_errors(instance))
+
+
+class _Compiler(object):
+    def __init__(self, schema, resolver, format_checker):
+        self.schema = schema
+        self.resolver = resolver
+        self.format_checker = format_checker
+        self.fallback = Draft4Validator(schema, resolver=resolver, format_checker=format_checker)
+        self.namespace = {
+            'Number': numbers.Number,
+            'FormatError': FormatError,
+            'format_checker': format_checker,
+            'fallback': self._fallback,
+        }
+        self.lines = []
+        self.functions = {}
+        self.pending = []
+        self.counter = itertools.count()
+        self.keywords = {
+            'additionalProperties': self.additional_properties,
+            'allOf': self.all_of,
+            'enum': self.enum,
+            'format': self.format,
+            'items': self.items,
+            'maxItems': self.max_items,
+            'maxLength': self.max_length,
+            'maximum': self.maximum,
+            'minItems': self.min_items,
+            'minLength': self.min_length,
+            'minimum': self.minimum,
+            'multipleOf': self.multiple_of,
+            'pattern': self.pattern,
+            'properties': self.properties,
+            'required': self.required,
+            'type': self.type,
+        }
+
+    def compile(self):
+        self.function('validate', self.schema, None)
+        while self.pending:
+            self.function(*self.pending.pop(0))
+        source = '\n'.join(self.lines)
+        exec(compile(source, '<compiled validator>', 'exec'), self.namespace)
+        return source
+
+    def function(self, name, schema, scope):
+        self.emit(0, 'def {0}(data, path, errors):'.format(name))
+        start = len(self.lines)
+        if scope is not None:
+            # Relative references are resolved from the referenced document
+            self.resolver.push_scope(scope)
+        try:
+            self.compile_schema(schema, 'data', (), 1)
+        finally:
+            if scope is not None:
+                self.resolver.pop_scope()
+        if len(self.lines) == start:
+            self.emit(1, 'pass')
+        self.emit(0, '')
+
+    def emit(self, indent, line):
+        self.lines.append('    ' * indent + line)
+
+    def block(self, indent, *headers):
+        start = len(self.lines)
+        for i, header in enumerate(headers):
+            self.emit(indent + i, header)
+        return start, len(headers)
+
+    def close(self, block):
+        # Drop the headers of an empty block
+        start, size = block
+        if len(self.lines) == start + size:
+            del self.lines[start:]
+
+    def name(self, prefix):
+        return '{0}{1}'.format(prefix, next(self.counter))
+
+    def constant(self, value):
+        name = self.name('c')
+        self.namespace[name] = value
+        return name
+
+    def path(self, parts):
+        if not parts:
+            return 'path'
+        return 'path + ({0},)'.format(', '.join(parts))
+
+    def error(self, indent, var, parts, message):
+        # The instance repr is the first part of all messages
+        message = self.constant('%r' + message.replace('%', '%%'))
+        self.emit(indent, 'errors.append(({0}, {1} % ({2},)))'.format(self.path(parts), message, var))
+
+    def compiled(self, schema):
+        if not isinstance(schema, dict):
+            return False
+        if 'id' in schema:
+            return False
+        if '$ref' in schema:
+            return True
+        for keyword, value in schema.items():
+            if keyword not in Draft4Validator.VALIDATORS:
+                continue
+            if keyword not in COMPILED_KEYWORDS:
+                return False
+            if keyword in ('items', 'additionalProperties', 'properties') and not isinstance(value, dict):
+                return False
+            if keyword in ('allOf', 'required') and not isinstance(value, list):
+                return False
+            if keyword == 'type' and not all(isinstance(t, str) and t in TYPES_CHECKS for t in _as_list(value)):
+                return False
+            if keyword == 'pattern' and not _is_regex(value):
+                return False
+        return True
+
+    def compile_schema(self, schema, var, parts, indent):
+        if not self.compiled(schema):
+            self.emit_fallback(schema, var, parts, indent)
+            return
+        ref = schema.get('$ref')
+        if ref is not None:
+            # As jsonschema, other keywords are ignored along $ref
+            self.ref(ref, var, parts, indent)
+            return
+        for keyword, value in schema.items():
+            compile_keyword = self.keywords.get(keyword)
+            if compile_keyword is not None:
+                compile_keyword(value, schema, var, parts, indent)
+
+    def emit_fallback(self, schema, var, parts, indent):
+        self.emit(indent, 'fallback({0}, {1}, {2}, errors, {3})'.format(
+            var, self.constant(schema), self.path(parts), self.constant(self.resolver.resolution_scope)
+        ))
+
+    def _fallback(self, data, schema, path, errors, scope):
+        self.resolver.push_scope(scope)
+        try:
+            for error in self.fallback.iter_errors(data, schema):
+                errors.append((error_path(error, path), error.message))
+        finally:
+            self.resolver.pop_scope()
+
+    def ref(self, ref, var, parts, indent):
+        try:
+            url, resolved = self.resolver.resolve(ref)
+        except RefResolutionError:
+            # Let jsonschema raise on validation (if ever reached)
+            self.emit_fallback({'$ref': ref}, var, parts, indent)
+            return
+        name = self.functions.get(url)
+        if name is None:
+            name = self.functions[url] = self.name('validate_')
+            self.pending.append((name, resolved, url))
+        self.emit(indent, '{0}({1}, {2}, errors)'.format(name, var, self.path(parts)))
+
+    def type(self, value, schema, var, parts, indent):
+        types = _as_list(value)
+        checks = ' or '.join(TYPES_CHECKS[t].format(var) for t in types)
+        self.emit(indent, 'if not ({0}):'.format(checks))
+        self.error(indent + 1, var, parts, ' is not of type ' + ', '.join(repr(t) for t in types))
+
+    def enum(self, value, schema, var, parts, indent):
+        self.emit(indent, 'if {0} not in {1}:'.format(var, self.constant(value)))
+        self.error(indent + 1, var, parts, ' is not one of {0!r}'.format(value))
+
+    def minimum(self, value, schema, var, parts, indent):
+        if schema.get('exclusiveMinimum', False):
+            operator, comparison = '<=', 'less than or equal to'
+        else:
+            operator, comparison = '<', 'less than'
+        self.emit(indent, 'if {0} and {1} {2} {3}:'.format(
+            TYPES_CHECKS['number'].format(var), var, operator, self.constant(value)
+        ))
+        self.error(indent + 1, var, parts, ' is {0} the minimum of {1!r}'.format(comparison, value))
+
+    def maximum(self, value, schema, var, parts, indent):
+        if schema.get('exclusiveMaximum', False):
+            operator, comparison = '>=', 'greater than or equal to'
+        else:
+            operator, comparison = '>', 'greater than'
+        self.emit(indent, 'if {0} and {1} {2} {3}:'.format(
+            TYPES_CHECKS['number'].format(var), var, operator, self.constant(value)
+        ))
+        self.error(indent + 1, var, parts, ' is {0} the maximum of {1!r}'.format(comparison, value))
+
+    def multiple_of(self, value, schema, var, parts, indent):
+        divisor = self.constant(value)
+        self.emit(indent, 'if {0}:'.format(TYPES_CHECKS['number'].format(var)))
+        if isinstance(value, float):
+            quotient = self.name('q')
+            self.emit(indent + 1, '{0} = {1} / {2}'.format(quotient, var, divisor))
+            self.emit(indent + 1, 'if int({0}) != {0}:'.format(quotient))
+        else:
+            self.emit(indent + 1, 'if {0} % {1}:'.format(var, divisor))
+        self.error(indent + 2, var, parts, ' is not a multiple of {0!r}'.format(value))
+
+    def min_length(self, value, schema, var, parts, indent):
+        self.emit(indent, 'if isinstance({0}, str) and len({0}) < {1}:'.format(var, self.constant(value)))
+        self.error(indent + 1, var, parts, ' is too short')
+
+    def max_length(self, value, schema, var, parts, indent):
+        self.emit(indent, 'if isinstance({0}, str) and len({0}) > {1}:'.format(var, self.constant(value)))
+        self.error(indent + 1, var, parts, ' is too long')
+
+    def min_items(self, value, schema, var, parts, indent):
+        self.emit(indent, 'if isinstance({0}, list) and len({0}) < {1}:'.format(var, self.constant(value)))
+        self.error(indent + 1, var, parts, ' is too short')
+
+    def max_items(self, value, schema, var, parts, indent):
+        self.emit(indent, 'if isinstance({0}, list) and len({0}) > {1}:'.format(var, self.constant(value)))
+        self.error(indent + 1, var, parts, ' is too long')
+
+    def pattern(self, value, schema, var, parts, indent):
+        regex = self.constant(re.compile(value))
+        self.emit(indent, 'if isinstance({0}, str) and not {1}.search({0}):'.format(var, regex))
+        self.error(indent + 1, var, parts, ' does not match {0!r}'.format(value))
+
+    def format(self, value, schema, var, parts, indent):
+        if self.format_checker is None:
+            return
+        self.emit(indent, 'try:')
+        self.emit(indent + 1, 'format_checker.check({0}, {1})'.format(var, self.constant(value)))
+        self.emit(indent, 'except FormatError as e:')
+        self.emit(indent + 1, 'errors.append(({0}, e.message))'.format(self.path(parts)))
+
+    def required(self, value, schema, var, parts, indent):
+        self.emit(indent, 'if isinstance({0}, dict):'.format(var))
+        for name in value:
+            self.emit(indent + 1, 'if {0!r} not in {1}:'.format(name, var))
+            self.emit(indent + 2, 'errors.append(({0}, {1}))'.format(
+                self.path(parts + (repr(name),)), self.constant('{0!r} is a required property'.format(name))
+            ))
+
+    def properties(self, value, schema, var, parts, indent):
+        block = self.block(indent, 'if isinstance({0}, dict):'.format(var))
+        for name, subschema in value.items():
+            item = self.name('d')
+            prop = self.block(indent + 1, 'if {0!r} in {1}:'.format(name, var))
+            self.emit(indent + 2, '{0} = {1}[{2!r}]'.format(item, var, name))
+            self.compile_schema(subschema, item, parts + (repr(name),), indent + 2)
+            self.close((prop[0], 2))
+        self.close(block)
+
+    def additional_properties(self, value, schema, var, parts, indent):
+        properties = self.constant(frozenset(schema.get('properties', {})))
+        key, item = self.name('k'), self.name('d')
+        block = self.block(
+            indent,
+            'if isinstance({0}, dict):'.format(var),
+            'for {0} in set({0} for {0} in {1} if {0} not in {2}):'.format(key, var, properties),
+        )
+        self.emit(indent + 2, '{0} = {1}[{2}]'.format(item, var, key))
+        self.compile_schema(value, item, parts + (key,), indent + 2)
+        self.close((block[0], 3))
+
+    def items(self, value, schema, var, parts, indent):
+        index, item = self.name('i'), self.name('d')
+        block = self.block(
+            indent,
+            'if isinstance({0}, list):'.format(var),
+            'for {0}, {1} in enumerate({2}):'.format(index, item, var),
+        )
+        self.compile_schema(value, item, parts + (index,), indent + 2)
+        self.close(block)
+
+    def all_of(self, value, schema, var, parts, indent):
+        for subschema in value:
+            self.compile_schema(subschema, var, parts, indent)
+
+
+def _as_list(value):
+    return value if isinstance(value, list) else [value]
+
+
+def _is_regex(value):
+    try:
+        re.compile(value)
+    except (re.error, TypeError):
+        return False
+    return True
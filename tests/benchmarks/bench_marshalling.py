@@ -1,5 +1,7 @@
 import pytest
 
+from collections import namedtuple
+
 from faker import Faker
 
 from quart_restplus import marshal, fields
@@ -33,6 +35,39 @@ def family():
     }
 
 
+try:
+    from dataclasses import dataclass
+except ImportError:  # pragma: no cover
+    dataclass = None  # Python 3.6
+
+requires_dataclasses = pytest.mark.skipif(dataclass is None, reason='dataclasses require Python 3.7+')
+
+if dataclass is not None:
+    @dataclass
+    class Person(object):
+        name: str
+        age: int
+else:  # pragma: no cover
+    Person = None
+
+
+class SlottedPerson(object):
+    __slots__ = ('name', 'age')
+
+    def __init__(self, name, age):
+        self.name = name
+        self.age = age
+
+
+TuplePerson = namedtuple('TuplePerson', 'name age')
+
+PEOPLE_CLASSES = [dict, pytest.param(Person, marks=requires_dataclasses), SlottedPerson, TuplePerson]
+
+
+def people(cls, size=1000):
+    return [cls(**person()) for _ in range(size)]
+
+
 def marshal_simple():
     return marshal(person(), person_fields)
 
@@ -64,3 +99,16 @@ class MarshallingBenchmark(object):
 
     def bench_marshal_nested_with_mask(self, app, benchmark):
         benchmark(marshal_nested_with_mask, app)
+
+
+@pytest.mark.benchmark(group='marshalling-objects')
+class ObjectsMarshallingBenchmark(object):
+    @pytest.mark.parametrize('cls', PEOPLE_CLASSES, ids=['dict', 'dataclass', 'slots', 'namedtuple'])
+    def bench_marshal_list(self, benchmark, cls):
+        data = people(cls)
+        benchmark(marshal, data, person_fields)
+
+    @pytest.mark.parametrize('cls', PEOPLE_CLASSES, ids=['dict', 'dataclass', 'slots', 'namedtuple'])
+    def bench_marshal_one(self, benchmark, cls):
+        data = cls(**person())
+        benchmark(marshal, data, person_fields)
@@ -0,0 +1,65 @@
+import pytest
+
+from faker import Faker
+from jsonschema import RefResolver
+
+from quart_restplus import Model, fields
+
+fake = Faker()
+
+person = Model('Person', {
+    'name': fields.String(required=True, min_length=1),
+    'age': fields.Integer(min=0, max=150),
+    'email': fields.String(pattern=r'^[^@]+@[^@]+$'),
+})
+
+family = Model('Family', {
+    'name': fields.String(required=True),
+    'father': fields.Nested(person),
+    'mother': fields.Nested(person),
+    'children': fields.List(fields.Nested(person)),
+})
+
+resolver = RefResolver.from_schema({'definitions': {
+    'Person': person.__schema__,
+    'Family': family.__schema__,
+}})
+
+
+def a_person():
+    return {
+        'name': fake.name(),
+        'age': fake.pyint(max_value=150),
+        'email': fake.email(),
+    }
+
+
+def a_family():
+    return {
+        'name': fake.last_name(),
+        'father': a_person(),
+        'mother': a_person(),
+        'children': [a_person() for _ in range(10)],
+    }
+
+
+def errors(backend, model, data):
+    return model.errors(data, resolver, backend=backend)
+
+
+@pytest.mark.benchmark(group='validation')
+class ValidationBenchmark(object):
+    @pytest.mark.parametrize('backend', ['jsonschema', 'compiled'])
+    def bench_validate_simple(self, benchmark, backend):
+        benchmark(errors, backend, person, a_person())
+
+    @pytest.mark.parametrize('backend', ['jsonschema', 'compiled'])
+    def bench_validate_nested(self, benchmark, backend):
+        benchmark(errors, backend, family, a_family())
+
+    @pytest.mark.parametrize('backend', ['jsonschema', 'compiled'])
+    def bench_validate_invalid(self, benchmark, backend):
+        data = a_family()
+        data['father']['age'] = 'old'
+        data['children'][0].pop('name')
+        benchmark(errors, backend, family, data)
@@ -1,14 +1,16 @@
 # -*- coding: utf-8 -*-
+import copy
 import pytz
 import pytest
 
-from collections import OrderedDict
-from datetime import date, datetime
+from array import array
+from collections import OrderedDict, namedtuple
+from datetime import date, datetime, timedelta, timezone
 from decimal import Decimal
 from functools import partial
 
 from quart import Blueprint
-from quart_restplus import fields, Api
+from quart_restplus import fields, marshal, Api
 
 
 class FieldTestCase(object):
@@ -285,6 +287,13 @@ class TestIntegerField(BaseFieldTestMixin, NumberTestMixin, FieldTestCase):
         field = fields.Integer()
         self.assert_field_raises(field, 'an int')
 
+    def test_format_many(self):
+        assert fields.Integer().format_many([0, '42', 66.6]) == [0, 42, 66]
+
+    def test_format_many_error(self):
+        with pytest.raises(fields.MarshallingError):
+            fields.Integer().format_many([1, 'an int'])
+
 
 class TestBooleanField(BaseFieldTestMixin, FieldTestCase):
     field_class = fields.Boolean
@@ -381,6 +390,12 @@ class TestFixedField(BaseFieldTestMixin, NumberTestMixin, FieldTestCase):
         field = fields.Fixed()
         self.assert_field_raises(field, 'NaN')
 
+    def test_format_many(self):
+        field = fields.Fixed(4)
+        assert field.format_many([PI, 3, '0']) == ['3.1416', '3.0000', '0.0000']
+        with pytest.raises(fields.MarshallingError):
+            field.format_many([PI, 'NaN'])
+
 
 class TestArbitraryField(BaseFieldTestMixin, NumberTestMixin, FieldTestCase):
     field_class = fields.Arbitrary
@@ -514,6 +529,48 @@ class TestDatetimeField(BaseFieldTestMixin, FieldTestCase):
         field = fields.DateTime(dt_format='raw')
         self.assert_field_raises(field, 'xxx')
 
+    @pytest.mark.parametrize('dt_format', ['iso8601', 'rfc822'])
+    def test_format_many(self, dt_format):
+        field = fields.DateTime(dt_format=dt_format)
+        values = [date(2011, 1, 1), datetime(2011, 1, 1, 23, 59, 59)]
+        assert field.format_many(values) == [field.format(value) for value in values]
+
+    def test_format_many_unsupported_format(self):
+        with pytest.raises(fields.MarshallingError):
+            fields.DateTime(dt_format='raw').format_many([datetime.now()])
+
+    def test_rfc822_cache(self):
+        field = fields.DateTime(dt_format='rfc822')
+        fields._format_rfc822.cache_clear()
+        values = [datetime(2011, 1, 1, 23, 59, 59, ms) for ms in range(10)]
+        values.append(datetime(2011, 1, 2, 0, 59, 59, tzinfo=timezone(timedelta(hours=1))))
+
+        assert field.format_many(values) == ['Sat, 01 Jan 2011 23:59:59 -0000'] * 10 + [
+            'Sat, 01 Jan 2011 23:59:59 -0000']
+        info = fields._format_rfc822.cache_info()
+        assert info.misses == 2
+        assert info.hits == 9
+
+    @pytest.mark.parametrize('dt_format', ['iso8601', 'rfc822'])
+    def test_fast_path_skipped_for_custom_methods(self, dt_format):
+        class Custom(fields.DateTime):
+            def parse(self, value):
+                return super(Custom, self).parse(value).replace(year=2000)
+
+        class CustomFormat(fields.DateTime):
+            def format_iso8601(self, dt):
+                return 'iso'
+
+            def format_rfc822(self, dt):
+                return 'rfc'
+
+        assert Custom(dt_format=dt_format).format(datetime(2011, 1, 1)).count('2000') == 1
+        assert CustomFormat(dt_format=dt_format).format(datetime(2011, 1, 1)) == dt_format[:3]
+
+    def test_datetime_subclass(self):
+        value = type('Stamp', (datetime,), {})(2011, 1, 1)
+        assert fields.DateTime().format(value) == '2011-01-01T00:00:00'
+
 
 class TestDateField(BaseFieldTestMixin, FieldTestCase):
     field_class = fields.Date
@@ -639,6 +696,33 @@ class TestFormatedStringField(StringTestMixin, BaseFieldTestMixin, FieldTestCase
         field = fields.FormattedString('/foo/{0[account_sid]}/{0[sid]}/')
         self.assert_field_raises(field, (3, 4))
 
+    @pytest.mark.parametrize('src_str,names', [
+        ('Hello {name}', ('name',)),
+        ('{a.b}/{c[0]}/{a!r}/{{d}}', ('a', 'c')),
+        ('{value:{width}.{precision}}', ('value', 'width', 'precision')),
+        ('{0[sid]}', None),
+        ('{}', None),
+        ('{unclosed', None),
+    ])
+    def test_names(self, src_str, names):
+        assert fields.FormattedString(src_str).names == names
+
+    def test_dotted_and_formatted_values(self, mocker):
+        class Obj(object):
+            def __init__(self):
+                self.sid = 3
+                self.user = mocker.Mock(name='user')
+                self.user.name = 'John'
+
+        field = fields.FormattedString('/{sid}/{user.name}/{sid:03d}')
+        obj = Obj()
+        assert field.output('foo', obj) == '/3/John/003'
+
+    def test_missing_value(self):
+        field = fields.FormattedString('{foo}')
+        with pytest.raises(KeyError):
+            field.output('foo', {'bar': 42})
+
 
 class TestUrlField(StringTestMixin, BaseFieldTestMixin, FieldTestCase):
     field_class = partial(fields.Url, 'endpoint')
@@ -754,6 +838,59 @@ class TestUrlField(StringTestMixin, BaseFieldTestMixin, FieldTestCase):
         async with app.test_request_context('/foo/foo'):
             assert 'https://localhost/foo/42' == field.output('foo', obj)
 
+    async def test_builder_matches_url_for(self, app):
+        app.add_url_rule('/items/<int:id>/<name>', 'item', view_func=lambda **kw: kw)
+        field = fields.Url('item', absolute=True)
+        objs = [{'id': 1, 'name': 'one'}, {'id': 2, 'name': 'a;b'}, {'id': 3, 'name': 'a?b', 'extra': 'x'}]
+
+        async with app.test_request_context('/'):
+            build = field.builder()
+            for obj in objs:
+                assert build(obj) == field.build('item', obj)
+
+    async def test_builder_rules_defaults(self, app):
+        def view(page):
+            return page
+
+        app.add_url_rule('/items/', 'items', view_func=view, defaults={'page': 1})
+        app.add_url_rule('/items/page/<int:page>', 'items', view_func=view)
+        field = fields.Url('items')
+
+        async with app.test_request_context('/'):
+            assert field.output('url', {}) == '/items/'
+            assert field.output('url', {'page': 1}) == '/items/'
+            assert field.output('url', {'page': 2}) == '/items/page/2'
+
+    async def test_builder_late_rules(self, app):
+        def view(**kwargs):
+            return kwargs
+
+        app.add_url_rule('/<foo>', 'foobar', view_func=view)
+        field = fields.Url('foobar')
+
+        async with app.test_request_context('/'):
+            assert field.output('url', {'foo': 42}) == '/42'
+        app.add_url_rule('/<foo>/<bar>', 'foobar', view_func=view)
+        async with app.test_request_context('/'):
+            assert field.output('url', {'foo': 42, 'bar': 1}) == '/42/1'
+
+    async def test_builder_falls_back_on_url_defaults(self, app):
+        app.add_url_rule('/<lang>/<foo>', 'foobar', view_func=lambda x: x)
+        app.url_value_preprocessors[None].append(lambda endpoint, values: values.setdefault('lang', 'en'))
+        field = fields.Url('foobar')
+
+        async with app.test_request_context('/'):
+            assert field.output('url', {'foo': 42}) == '/en/42'
+
+    async def test_marshal_many(self, app):
+        app.add_url_rule('/<foo>', 'foobar', view_func=lambda x: x)
+        model = {'url': fields.Url('foobar', absolute=True)}
+
+        async with app.test_request_context('/'):
+            assert marshal([{'foo': i} for i in range(20)], model) == [
+                {'url': 'http://localhost/{0}'.format(i)} for i in range(20)
+            ]
+
 
 class TestNestedField(FieldTestCase):
     def test_defaults(self, api):
@@ -906,6 +1043,43 @@ class TestListField(BaseFieldTestMixin, FieldTestCase):
         data = [1, 2, 'a']
         self.assert_field(field, data, data)
 
+    @pytest.mark.parametrize('value', [
+        [1, 2, 3],
+        (1, 2, 3),
+        range(1, 4),
+        array('i', [1, 2, 3]),
+        ['1', 2.0, 3],
+    ])
+    def test_primitive_kernel(self, value, mocker):
+        field = fields.List(fields.Integer)
+        output = mocker.spy(field.container, 'output')
+
+        assert field.format(value) == [1, 2, 3]
+        assert not output.called
+
+    def test_primitive_kernel_falls_back_on_none_items(self):
+        field = fields.List(fields.Integer(default=0))
+        assert field.format([1, None, 3]) == [1, 0, 3]
+
+    def test_primitive_kernel_falls_back_on_dict_items(self):
+        # Dict items are looked up by index
+        field = fields.List(fields.String)
+        assert field.format(['a', {1: 'b'}]) == ['a', 'b']
+
+    def test_primitive_kernel_reports_faulty_item(self):
+        field = fields.List(fields.Fixed)
+        with pytest.raises(fields.MarshallingError, match='Unable to marshal field "1"'):
+            field.format([1, 'nan'])
+
+    def test_primitive_kernel_skipped_for_custom_output(self, mocker):
+        class Custom(fields.Integer):
+            def output(self, key, obj, **kwargs):
+                return 42
+
+        field = fields.List(Custom)
+        assert field._kernel is None
+        assert field.format([1, 2]) == [42, 42]
+
 
 class TestWildcardField(BaseFieldTestMixin, FieldTestCase):
     field_class = partial(fields.Wildcard, fields.String)
@@ -1026,6 +1200,41 @@ class TestWildcardField(BaseFieldTestMixin, FieldTestCase):
         assert expected7 == result7
         assert expected8 == result8
 
+    def test_wildcard_shared_instance(self, api):
+        wild = fields.Wildcard(fields.String)
+        model1 = api.model('SharedWildcard1', {'*': wild})
+        model2 = api.model('SharedWildcard2', {'id': fields.Integer, 'j*': wild})
+
+        data = [{'id': i, 'John': i, 'bob': i} for i in range(3)]
+
+        assert api.marshal(data, model1) == [{'id': str(i), 'John': str(i), 'bob': str(i)} for i in range(3)]
+        assert api.marshal(data, model2) == [{'id': i, 'John': str(i)} for i in range(3)]
+
+    def test_wildcard_excludes_declared_fields(self, api):
+        mod = OrderedDict()
+        mod['*'] = fields.Wildcard(fields.String)
+        mod['bob'] = fields.Integer
+        model = api.model('WildcardFirst', mod)
+
+        result = api.marshal({'John': 12, 'bob': '42'}, model, ordered=True)
+
+        assert result == OrderedDict([('John', '12'), ('bob', 42)])
+
+    def test_wildcard_none_value(self, api):
+        model = api.model('WildcardNone', {'*': fields.Wildcard(fields.String, default='x')})
+
+        result = api.marshal({'John': None, 'bob': 42}, model)
+
+        assert result == {'John': 'x', 'bob': '42'}
+
+    def test_wildcard_items(self):
+        field = fields.Wildcard(fields.Integer)
+        data = {'John': '12', 'bob': 42, 'Jane': 68}
+
+        assert sorted(field.items('j*', data)) == [('Jane', 68), ('John', 12)]
+        assert field.items('j*', data, exclude={'John'}) == [('Jane', 68)]
+        assert field.items('x*', data) == [('x*', None)]
+
     def test_clone(self, api):
         wild1 = fields.Wildcard(fields.String)
         wild2 = wild1.clone()
@@ -1326,6 +1535,62 @@ class TestPolymorph(FieldTestCase):
             'extra2': 'extra2'
         }}
 
+    def test_polymorph_dispatch_cache(self, api, mocker):
+        parent = api.model('Person', {'name': fields.String})
+        child = api.inherit('Child', parent, {'extra': fields.String})
+        other = api.inherit('Other', parent, {'other': fields.String})
+
+        class Child(object):
+            name = 'child'
+            extra = 'extra'
+
+        class GrandChild(Child):
+            pass
+
+        class Other(object):
+            name = 'other'
+
+        field = fields.Polymorph({Child: child, Other: other})
+        thing = api.model('Thing', {'owner': field})
+        resolve = mocker.spy(field, '_resolve')
+
+        data = [{'owner': GrandChild()} for _ in range(20)] + [{'owner': Child()}]
+        assert api.marshal(data, thing) == [{'owner': {'name': 'child', 'extra': 'extra'}}] * 21
+        assert resolve.call_count == 2
+        assert field.marshaller(GrandChild()) is field.marshaller(Child())
+
+    def test_polymorph_unknown_class_is_detected_once(self, api, mocker):
+        parent = api.model('Person', {'name': fields.String})
+        child = api.inherit('Child', parent, {'extra': fields.String})
+
+        other = api.inherit('Other', parent, {'other': fields.String})
+
+        class Child(object):
+            pass
+
+        field = fields.Polymorph({Child: child, str: other})
+        resolve = mocker.spy(field, '_resolve')
+
+        for _ in range(2):
+            with pytest.raises(ValueError, match='Unknown class: int'):
+                field.output('owner', {'owner': 42})
+        assert resolve.call_count == 1
+
+    def test_polymorph_dispatch_cache_is_not_copied(self, api):
+        parent = api.model('Person', {'name': fields.String})
+        child = api.inherit('Child', parent, {'extra': fields.String})
+
+        other = api.inherit('Other', parent, {'other': fields.String})
+
+        class Child(object):
+            name = 'child'
+
+        field = fields.Polymorph({Child: child, str: other})
+        field.marshaller(Child())
+
+        assert '_dispatch' not in field.clone().__dict__
+        assert '_dispatch' not in copy.deepcopy(field).__dict__
+
 
 class TestCustomField(FieldTestCase):
     def test_custom_field(self):
@@ -1337,6 +1602,41 @@ class TestCustomField(FieldTestCase):
         assert field.__schema__ == {'type': 'integer', 'format': 'int64'}
 
 
+try:
+    from dataclasses import dataclass
+except ImportError:  # pragma: no cover
+    dataclass = None  # Python 3.6
+
+requires_dataclasses = pytest.mark.skipif(dataclass is None, reason='dataclasses require Python 3.7+')
+
+if dataclass is not None:
+    @dataclass
+    class DataPoint(object):
+        x: int
+        y: int
+else:  # pragma: no cover
+    DataPoint = None
+
+
+class SlottedPoint(object):
+    __slots__ = ('x', 'y')
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+
+class SlottedPoint3D(SlottedPoint):
+    __slots__ = ('z',)
+
+    def __init__(self, x, y, z=None):
+        super(SlottedPoint3D, self).__init__(x, y)
+        self.z = z
+
+
+TuplePoint = namedtuple('TuplePoint', 'x y')
+
+
 class TestFieldsHelpers(object):
     def test_to_dict(self):
         expected = data = {'foo': 42}
@@ -1381,3 +1681,61 @@ class TestFieldsHelpers(object):
 
         obj = Test('hi')
         assert fields.get_value('value', obj) == 'hi'
+
+    def test_get_value_dotted(self, mocker):
+        assert fields.get_value('foo.bar', {'foo': {'bar': 42}}) == 42
+        assert fields.get_value('foo.bar', {'foo': mocker.Mock(bar=42)}) == 42
+        assert fields.get_value('foo.bar', {}, 'default') == 'default'
+
+    def test_get_value_dict_falls_back_to_attributes(self):
+        obj = {}
+        assert fields.get_value('keys', obj) == obj.keys
+
+    def test_get_value_index(self):
+        assert fields.get_value(1, ['a', 'b']) == 'b'
+
+    def test_get_value_callable(self):
+        assert fields.get_value(lambda obj: obj['foo'] * 2, {'foo': 21}) == 42
+
+    @pytest.mark.parametrize('key', ['foo', 'foo.bar', 'value'])
+    def test_compile_accessor_same_as_get_value(self, key):
+        accessor = fields.compile_accessor(key)
+        for obj in ({'foo': {'bar': 1}}, [{'bar': 2}], OrderedDict(foo=3), 'string', None):
+            assert accessor(obj, 'default') == fields.get_value(key, obj, 'default')
+
+    @pytest.mark.parametrize('cls', [
+        pytest.param(DataPoint, marks=requires_dataclasses),
+        SlottedPoint,
+        TuplePoint,
+    ], ids=['dataclass', 'slots', 'namedtuple'])
+    def test_get_value_attributes(self, cls):
+        obj = cls(42, None)
+        assert fields.get_value('x', obj) == 42
+        assert fields.get_value('y', obj, 'default') is None
+        assert fields.get_value('z', obj, 'default') == 'default'
+
+    def test_to_dict_namedtuple(self):
+        assert fields.to_marshallable_type(TuplePoint(1, 2)) == {'x': 1, 'y': 2}
+
+    def test_to_dict_slots(self):
+        assert fields.to_marshallable_type(SlottedPoint(1, 2)) == {'x': 1, 'y': 2}
+
+    def test_to_dict_inherited_slots(self):
+        assert fields.to_marshallable_type(SlottedPoint3D(1, 2, 3)) == {'x': 1, 'y': 2, 'z': 3}
+
+    @pytest.mark.parametrize('objs', [
+        [{'x': 1}, {'x': 2}],
+        [{'x': 1}, {}],
+        [SlottedPoint(1, 2), SlottedPoint(2, 3), object()],
+        [TuplePoint(1, 2), {'x': 2}, None],
+        [],
+    ])
+    def test_compile_accessor_many(self, objs):
+        many = fields.compile_accessor('x', many=True)
+        assert many(objs, 'default') == [fields.get_value('x', obj, 'default') for obj in objs]
+
+    @requires_dataclasses
+    def test_compile_accessor_many_dataclasses(self):
+        objs = [DataPoint(1, 2), DataPoint(2, 3)]
+        many = fields.compile_accessor('x', many=True)
+        assert many(objs, 'default') == [1, 2]
@@ -471,6 +471,69 @@ class TestApplyMask(object):
             mask.apply(model, 'nested{notpossible}')
 
 
+class TestParse(object):
+    def test_cached_and_frozen(self):
+        parsed = mask.parse('{name,nested{a,b}}', skip=True)
+
+        assert isinstance(parsed, mask.FrozenMask)
+        assert parsed == {'name': True, 'nested': {'a': True, 'b': True}}
+        assert parsed.skip and parsed['nested'].skip
+        assert str(parsed) == '{name,nested{a,b}}'
+        assert mask.parse('{name,nested{a,b}}', skip=True) is parsed
+
+    def test_immutable(self):
+        parsed = mask.parse('name,nested{a}')
+
+        with pytest.raises(mask.MaskError):
+            parsed['other'] = True
+        with pytest.raises(mask.MaskError):
+            parsed['nested'].pop('a')
+        assert Mask(parsed) == parsed
+
+    def test_apply(self):
+        data = {'name': 'John', 'age': 42, 'nested': {'a': 1, 'b': 2}}
+
+        assert mask.parse('name,nested{a}').apply(data) == {'name': 'John', 'nested': {'a': 1}}
+
+    def test_max_length(self):
+        with pytest.raises(mask.ParseError):
+            mask.parse('a,b,c', max_length=4)
+        assert mask.parse('a,b,c', max_length=5) == {'a': True, 'b': True, 'c': True}
+
+    def test_max_fields(self):
+        with pytest.raises(mask.ParseError):
+            mask.parse('a,b{c,d}', max_fields=3)
+        assert len(mask.parse('a,b{c,d}', max_fields=4)) == 2
+
+    def test_max_depth(self):
+        with pytest.raises(mask.ParseError):
+            mask.parse('a{b{c}}', max_depth=1)
+        assert mask.parse('a{b{c}}', max_depth=2) == {'a': {'b': {'c': True}}}
+
+    def test_canonical(self):
+        assert mask.canonical(mask.parse('b, a{d,c}')) == 'a{c,d},b'
+        assert mask.canonical(mask.parse('{*,a{c,d},b}')) == 'a{c,d},b,*'
+
+    def test_cache_info(self):
+        mask.parse('cache_info_test')
+        mask.parse('cache_info_test')
+
+        assert mask.cache_info().hits >= 1
+
+    @pytest.mark.config(restplus_mask_parse_cache_size=2)
+    async def test_cache_per_app(self, app, api):
+        async with app.app_context():
+            for value in ('a', 'b', 'c'):
+                mask.parse(value)
+            info = mask.cache_info()
+
+        assert info.maxsize == 2
+        assert info.currsize == 2
+        assert info.evictions == 1
+        # The process-wide cache is neither used nor resized
+        assert mask.cache_info().maxsize == mask.MASKS_CACHE_SIZE
+
+
 class TestMaskAPI(object):
     async def test_marshal_with_honour_field_mask_header(self, app, client):
         api = Api(app)
@@ -1066,3 +1129,119 @@ class TestSwaggerMaskHeader(object):
         definition = specs['definitions']['Test']
         assert 'x-mask' in definition
         assert definition['x-mask'] == '{name,age}'
+
+    @pytest.mark.config(restplus_mask_max_fields=2, restplus_mask_max_depth=1)
+    async def test_marshal_with_mask_limits(self, app, client):
+        api = Api(app)
+
+        model = api.model('Test', {
+            'name': fields.String,
+            'age': fields.Integer,
+            'nested': fields.Nested({'a': fields.Nested({'b': fields.String})}),
+        })
+
+        @api.route('/test/')
+        class TestResource(Resource):
+            @api.marshal_with(model)
+            async def get(self):
+                return {'name': 'John Doe', 'age': 42}
+
+        assert await client.get_json('/test/', headers={'X-Fields': 'name,age'}) == {'name': 'John Doe', 'age': 42}
+
+        data = await client.get_json('/test/', status=400, headers={'X-Fields': 'name,age,nested'})
+        assert 'maximum number of fields' in data['message']
+
+        data = await client.get_json('/test/', status=400, headers={'X-Fields': 'nested{a{b}}'})
+        assert 'maximum depth' in data['message']
+
+    @pytest.mark.config(restplus_mask_max_length=10)
+    async def test_marshal_with_mask_max_length(self, app, client):
+        api = Api(app)
+
+        model = api.model('Test', {'name': fields.String})
+
+        @api.route('/test/')
+        class TestResource(Resource):
+            @api.marshal_with(model)
+            async def get(self):
+                return {'name': 'John Doe'}
+
+        data = await client.get_json('/test/', status=400, headers={'X-Fields': 'name,' + 'x' * 10})
+        assert data['message'].startswith('Mask parse error')
+
+    @pytest.mark.config(restplus_mask_query_param='fields')
+    async def test_marshal_with_query_param_mask(self, app, client):
+        api = Api(app)
+
+        model = api.model('Test', {'name': fields.String, 'age': fields.Integer, 'boolean': fields.Boolean})
+
+        @api.route('/test/')
+        class TestResource(Resource):
+            @api.marshal_with(model)
+            async def get(self):
+                return {'name': 'John Doe', 'age': 42, 'boolean': True}
+
+        assert await client.get_json('/test/?fields=age,name') == {'name': 'John Doe', 'age': 42}
+        # The query parameter takes precedence over the header
+        data = await client.get_json('/test/?fields=age', headers={'X-Fields': 'name'})
+        assert data == {'age': 42}
+        assert await client.get_json('/test/', headers={'X-Fields': 'name'}) == {'name': 'John Doe'}
+
+    @pytest.mark.config(restplus_mask_query_param='fields')
+    async def test_marshal_with_query_param_mask_redirect(self, app, client):
+        api = Api(app)
+
+        model = api.model('Test', {'name': fields.String, 'age': fields.Integer})
+        calls = []
+
+        @api.route('/test/')
+        class TestResource(Resource):
+            @api.marshal_with(model)
+            async def get(self):
+                calls.append(True)
+                return {'name': 'John Doe', 'age': 42}
+
+        response = await client.get('/test/?page=2&fields={name, age}')
+
+        assert response.status_code == 301
+        assert response.headers['Location'] == '/test/?page=2&fields=age,name'
+        assert not calls
+
+        response = await client.get('/test/?fields=age{x')
+        assert response.status_code == 400
+
+    @pytest.mark.config(restplus_mask_query_param='fields', restplus_mask_query_redirect=False)
+    async def test_marshal_with_query_param_mask_without_redirect(self, app, client):
+        api = Api(app)
+
+        model = api.model('Test', {'name': fields.String, 'age': fields.Integer})
+
+        @api.route('/test/')
+        class TestResource(Resource):
+            @api.marshal_with(model)
+            async def get(self):
+                return {'name': 'John Doe', 'age': 42}
+
+        assert await client.get_json('/test/?fields={name}') == {'name': 'John Doe'}
+
+    @pytest.mark.config(restplus_mask_query_param='fields')
+    async def test_marshal_with_expose_mask_query_param(self, app, client):
+        api = Api(app)
+
+        model = api.model('Test', {'name': fields.String, 'age': fields.Integer})
+
+        @api.route('/test/')
+        class TestResource(Resource):
+            @api.marshal_with(model, mask='{name, age}')
+            async def get(self):
+                pass
+
+        specs = await client.get_specs()
+        header, param = specs['paths']['/test/']['get']['parameters']
+
+        assert header['in'] == 'header'
+        assert param['name'] == 'fields'
+        assert param['in'] == 'query'
+        assert param['type'] == 'string'
+        assert param['format'] == 'mask'
+        assert param['default'] == 'age,name'
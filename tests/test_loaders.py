@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import json
+import pytest
+
+from quart_restplus import Resource, fields, marshal, marshal_async
+from quart_restplus.loaders import Loader
+
+
+class Backend(object):
+    def __init__(self, as_dict=True):
+        self.calls = []
+        self.as_dict = as_dict
+
+    async def load(self, ids):
+        self.calls.append(list(ids))
+        await asyncio.sleep(0)
+        users = [{'id': i, 'name': 'user-{0}'.format(i), 'manager_id': i + 100 if i < 100 else None}
+                 for i in ids]
+        if self.as_dict:
+            return {user['id']: user for user in users if user['id'] != 404}
+        return users
+
+
+@pytest.fixture
+def backend():
+    return Backend()
+
+
+class TestLoader(object):
+    async def test_load_batches_and_deduplicates(self, backend):
+        users = Loader(backend.load)
+
+        first, second, again = await asyncio.gather(users.load(1), users.load(2), users.load(1))
+
+        assert first == {'id': 1, 'name': 'user-1', 'manager_id': 101}
+        assert second['id'] == 2
+        assert again is first
+        assert backend.calls == [[1, 2]]
+
+    async def test_load_many(self, backend):
+        users = Loader(backend.load)
+
+        loaded = await users.load_many([3, 1, 3])
+
+        assert [user['id'] for user in loaded] == [3, 1, 3]
+        assert backend.calls == [[3, 1]]
+
+    async def test_cached_for_the_task(self, backend):
+        users = Loader(backend.load)
+
+        await users.load(1)
+        await users.load_many([1, 2])
+
+        assert backend.calls == [[1], [2]]
+
+        users.clear()
+        await users.load(1)
+
+        assert backend.calls == [[1], [2], [1]]
+
+    def test_outside_of_a_task(self, backend):
+        users = Loader(backend.load)
+
+        with pytest.raises(RuntimeError):
+            users.clear()
+
+    async def test_missing_keys(self, backend):
+        users = Loader(backend.load)
+
+        assert await users.load(404) is None
+
+    async def test_ordered_values(self):
+        backend = Backend(as_dict=False)
+        users = Loader(backend.load)
+
+        loaded = await users.load_many([2, 1])
+
+        assert [user['id'] for user in loaded] == [2, 1]
+
+    async def test_max_batch_size(self, backend):
+        users = Loader(backend.load, max_batch_size=2)
+
+        await users.load_many([1, 2, 3])
+
+        assert backend.calls == [[1, 2], [3]]
+
+    async def test_failed_keys_are_loaded_again(self, backend):
+        async def failing(ids):
+            raise ValueError('failure')
+
+        users = Loader(failing)
+
+        with pytest.raises(ValueError):
+            await users.load(1)
+
+        users.batch = backend.load
+        assert (await users.load(1))['id'] == 1
+
+    async def test_mismatching_values(self):
+        async def load(ids):
+            return []
+
+        with pytest.raises(ValueError):
+            await Loader(load).load(1)
+
+
+class TestLoaderFields(object):
+    @pytest.fixture
+    def model(self, backend):
+        users = Loader(backend.load)
+        user = {
+            'id': fields.Integer,
+            'name': fields.String,
+            'manager': fields.Nested({'id': fields.Integer}, key='manager_id', loader=users, allow_null=True),
+        }
+        return {
+            'id': fields.Integer,
+            'owner': fields.Nested(user, key='owner_id', loader=users),
+            'readers': fields.List(fields.Nested(user), key='reader_ids', loader=users),
+        }
+
+    async def test_one_batch_per_level(self, model, backend):
+        data = [{'id': i, 'owner_id': i % 3, 'reader_ids': [1, 2, i]} for i in range(10)]
+
+        output = await marshal_async(data, model)
+
+        assert output[4] == {
+            'id': 4,
+            'owner': {'id': 1, 'name': 'user-1', 'manager': {'id': 101}},
+            'readers': [
+                {'id': 1, 'name': 'user-1', 'manager': {'id': 101}},
+                {'id': 2, 'name': 'user-2', 'manager': {'id': 102}},
+                {'id': 4, 'name': 'user-4', 'manager': {'id': 104}},
+            ],
+        }
+        assert backend.calls == [list(range(10)), list(range(100, 110))]
+
+    async def test_missing_key(self, model, backend):
+        output = await marshal_async({'id': 1, 'owner_id': None, 'reader_ids': None}, model)
+
+        assert output == {'id': 1, 'owner': {'id': None, 'name': None, 'manager': None}, 'readers': None}
+        assert backend.calls == []
+
+    def test_marshal_requires_marshal_async(self, model, backend):
+        with pytest.raises(TypeError) as excinfo:
+            marshal({'id': 1, 'owner_id': 1, 'reader_ids': [2]}, model)
+
+        assert 'marshal_async()' in str(excinfo.value)
+        assert backend.calls == []
+
+    async def test_batch_function(self, backend):
+        model = {'owner': fields.Nested({'name': fields.String}, key='owner_id', loader=backend.load)}
+
+        output = await marshal_async([{'owner_id': 1}, {'owner_id': 2}], model)
+
+        assert output == [{'owner': {'name': 'user-1'}}, {'owner': {'name': 'user-2'}}]
+        assert backend.calls == [[1, 2]]
+
+    async def test_masked_model(self, model, backend):
+        output = await marshal_async({'id': 1, 'owner_id': 2, 'reader_ids': []}, model, mask='owner{name}')
+
+        assert output == {'owner': {'name': 'user-2'}}
+        assert backend.calls == [[2]]
+
+    async def test_cached_for_the_request(self, app, client, api, backend):
+        users = Loader(backend.load)
+        user = api.model('User', {'name': fields.String})
+        model = api.model('Article', {'owner': fields.Nested(user, key='owner_id', loader=users)})
+
+        @api.route('/articles')
+        class Articles(Resource):
+            @api.marshal_list_with(model)
+            async def get(self):
+                return [{'owner_id': 1}, {'owner_id': 2}]
+
+        @api.route('/owners')
+        class Owners(Resource):
+            async def get(self):
+                articles = await marshal_async([{'owner_id': 1}, {'owner_id': 2}], model)
+                await users.load(3)
+                await marshal_async([{'owner_id': 3}], model)
+                return articles
+
+        response = await client.get('/articles')
+
+        assert json.loads(await response.get_data(False)) == [
+            {'owner': {'name': 'user-1'}},
+            {'owner': {'name': 'user-2'}},
+        ]
+        assert backend.calls == [[1, 2]]
+
+        await client.get('/owners')
+
+        # Loaded again for another request, but once per request
+        assert backend.calls == [[1, 2], [1, 2], [3]]
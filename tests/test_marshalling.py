@@ -1,16 +1,27 @@
 # -*- coding: utf-8 -*-
+import asyncio
+import json
 import pytest
 
+from quart import make_response, request
 from quart_restplus import (
     marshal,
+    marshal_async,
     marshal_with,
     marshal_with_field,
     fields,
     Api,
+    Mask,
+    Model,
     Resource
 )
+from quart_restplus.marshalling import (
+    compile_marshaller, cache_info, requested_fields, MASKED_MARSHALLERS_CACHE_SIZE
+)
+from quart_restplus.utils import TaskVar
 
-from collections import OrderedDict
+from collections import OrderedDict, namedtuple
+from datetime import datetime
 
 
 # Add a dummy Resource to verify that the app is properly set.
@@ -436,3 +447,791 @@ class TestMarshalling(object):
         resp = await client.get('/api')
         assert resp.status_code == 200
         assert (await resp.get_data(False)) == '{"foo": 3.0}\n'
+
+
+class TestCompiledMarshaller(object):
+    def test_cached_per_fields(self):
+        model = {'foo': fields.Raw}
+        assert compile_marshaller(model) is compile_marshaller(model)
+        assert compile_marshaller(model) is not compile_marshaller(model, ordered=True)
+        assert compile_marshaller(model) is not compile_marshaller(model, mask='foo')
+
+    def test_recompiled_on_fields_change(self):
+        model = {'foo': fields.Raw}
+        marshaller = compile_marshaller(model)
+        model['bar'] = fields.Raw
+        assert compile_marshaller(model) is not marshaller
+        assert marshal({'foo': 1, 'bar': 2}, model) == {'foo': 1, 'bar': 2}
+
+    def test_model_inheritance_and_mask(self):
+        parent = Model('Parent', {'name': fields.String, 'age': fields.Integer})
+        child = parent.inherit('Child', {'extra': fields.String})
+        child.__mask__ = Mask('name,extra')
+
+        output = marshal({'name': 'foo', 'age': 42, 'extra': 'bar'}, child)
+
+        assert output == {'name': 'foo', 'extra': 'bar'}
+
+    def test_same_output_as_interpreted(self):
+        nested = Model('Nested', {'value': fields.Integer, 'other': fields.String(default='x')})
+        model = Model('Model', {
+            'foo': fields.Raw,
+            'dotted': fields.String(attribute='a.b'),
+            'nested': fields.Nested(nested, allow_null=True),
+            'nesteds': fields.List(fields.Nested(nested)),
+            'strings': fields.List(fields.String),
+        })
+        data = [{
+            'foo': i,
+            'a': {'b': i},
+            'nested': {'value': i} if i % 2 else None,
+            'nesteds': [{'value': i}, None],
+            'strings': {'x'},
+        } for i in range(3)]
+
+        expected = [{
+            'foo': i,
+            'dotted': str(i),
+            'nested': {'value': i, 'other': 'x'} if i % 2 else None,
+            'nesteds': [{'value': i, 'other': 'x'}, {'value': None, 'other': 'x'}],
+            'strings': ['x'],
+        } for i in range(3)]
+
+        assert marshal(data, model) == expected
+        assert marshal(data, model, ordered=True) == expected
+        assert all(isinstance(item, OrderedDict) for item in marshal(data, model, ordered=True))
+        assert marshal(data, model, skip_none=True) == [
+            dict((k, v) for k, v in item.items() if v is not None) for item in expected
+        ]
+        assert marshal(data, model, envelope='data') == {'data': expected}
+
+    def test_recursive_fields(self):
+        model = {'name': fields.String}
+        model['child'] = fields.Nested(model, allow_null=True)
+
+        output = marshal({'name': 'parent', 'child': {'name': 'child'}}, model)
+
+        assert output == {'name': 'parent', 'child': {'name': 'child', 'child': None}}
+        assert '<recursive' in compile_marshaller(model).explain()
+
+    def test_explain(self):
+        nested = Model('Nested', {'value': fields.Integer})
+        model = Model('Model', {'foo': fields.Raw, 'nested': fields.Nested(nested)})
+
+        plan = compile_marshaller(model, envelope='data').explain()
+
+        assert plan.splitlines() == [
+            "Marshaller(Model, envelope='data', skip_none=False, ordered=False)",
+            "    foo: Raw (raw)",
+            "    nested: Nested(Nested)",
+            "        Marshaller(Nested, envelope=None, skip_none=False, ordered=False)",
+            "            value: Integer",
+        ]
+
+    def test_masked_cached_by_normalized_mask(self):
+        model = Model('Model', {'foo': fields.Raw, 'bar': fields.Nested({'baz': fields.Raw, 'qux': fields.Raw})})
+        marshaller = compile_marshaller(model, mask='foo,bar{baz}')
+
+        assert compile_marshaller(model, mask='{foo, bar{baz}}') is marshaller
+        assert compile_marshaller(model, mask=Mask('foo,bar{baz}')) is marshaller
+        assert compile_marshaller(model, mask='foo') is not marshaller
+        assert marshaller({'foo': 1, 'bar': {'baz': 2, 'qux': 3}}) == {'foo': 1, 'bar': {'baz': 2}}
+
+    def test_masked_cache_info(self):
+        model = Model('Model', {'foo': fields.Raw, 'bar': fields.Raw})
+        before = cache_info()['masked']
+
+        marshal({'foo': 1}, model, mask='foo')
+        marshal({'foo': 1}, model, mask='foo')
+
+        after = cache_info()['masked']
+        assert after.misses == before.misses + 1
+        assert after.hits == before.hits + 1
+
+    @pytest.mark.config(restplus_mask_cache_size=2)
+    async def test_masked_cache_per_app(self, app, api):
+        model = Model('Model', {'foo': fields.Raw, 'bar': fields.Raw, 'baz': fields.Raw})
+
+        async with app.app_context():
+            for mask in ('foo', 'bar', 'baz'):
+                compile_marshaller(model, mask=mask)
+            info = cache_info()['masked']
+
+        assert info.maxsize == 2
+        assert info.currsize == 2
+        assert info.evictions == 1
+        # The process-wide cache is neither used nor resized
+        assert cache_info()['masked'].maxsize == MASKED_MARSHALLERS_CACHE_SIZE
+
+
+class TestColumnarMarshalling(object):
+    @pytest.fixture
+    def model(self):
+        nested = Model('Nested', {'value': fields.Integer, 'other': fields.String(default='x')})
+        return Model('Model', {
+            'id': fields.Integer,
+            'name': fields.String(default='anonymous'),
+            'price': fields.Fixed(2),
+            'masked': fields.Raw(attribute='inline', mask=Mask('id')),
+            'created': fields.DateTime(dt_format='rfc822'),
+            'flag': fields.Raw,
+            'nested': fields.Nested(nested, allow_null=True),
+            'nesteds': fields.List(fields.Nested(nested)),
+            'inline': {'id': fields.Integer},
+        })
+
+    def test_same_output_as_row_wise(self, model):
+        data = [{
+            'id': str(i),
+            'name': 'name-{0}'.format(i) if i % 3 else None,
+            'price': i / 3,
+            'created': datetime(2011, 1, 1, i % 24),
+            'flag': None if i % 2 else i,
+            'nested': {'value': i} if i % 2 else None,
+            'nesteds': [{'value': i}] * (i % 3),
+            'inline': {'id': i, 'other': i},
+        } for i in range(40)]
+        data[5]['nesteds'] = [{'value': 5}, None]
+
+        expected = [{
+            'id': i,
+            'name': 'name-{0}'.format(i) if i % 3 else 'anonymous',
+            'price': '{0:.2f}'.format(i / 3),
+            'masked': {'id': i},
+            'created': 'Sat, 01 Jan 2011 {0:02d}:00:00 -0000'.format(i % 24),
+            'flag': None if i % 2 else i,
+            'nested': {'value': i, 'other': 'x'} if i % 2 else None,
+            'nesteds': [{'value': i, 'other': 'x'}] * (i % 3),
+            'inline': {'id': i},
+        } for i in range(40)]
+        expected[5]['nesteds'] = [{'value': 5, 'other': 'x'}, {'value': None, 'other': 'x'}]
+
+        for kwargs in ({}, {'ordered': True}, {'skip_none': True}):
+            marshaller = compile_marshaller(model, **kwargs)
+            assert marshaller.marshal_columns(data) == [marshaller.marshal_one(d) for d in data]
+        assert marshal(data, model) == expected
+        assert marshal(data, model, ordered=True) == expected
+        assert marshal(data, model, skip_none=True) == [
+            dict((k, v) for k, v in item.items() if v is not None) for item in expected
+        ]
+
+    def test_used_above_threshold(self, model, mocker):
+        marshaller = compile_marshaller(model)
+        marshal_columns = mocker.spy(marshaller, 'marshal_columns')
+
+        marshaller([{'id': 1}] * (marshaller.columnar_threshold - 1))
+        assert not marshal_columns.called
+
+        marshaller([{'id': 1}] * marshaller.columnar_threshold)
+        assert marshal_columns.called
+
+    def test_error_reports_faulty_value(self):
+        model = {'id': fields.Integer}
+        data = [{'id': i} for i in range(20)] + [{'id': 'an int'}]
+
+        with pytest.raises(fields.MarshallingError) as excinfo:
+            marshal(data, model)
+
+        assert 'an int' in str(excinfo.value)
+
+    def test_format_only_override_is_honored(self):
+        class Upper(fields.String):
+            def format(self, value):
+                return str(value).upper()
+
+        output = marshal([{'name': 'foo'}] * 20, {'name': Upper})
+
+        assert output == [{'name': 'FOO'}] * 20
+
+
+class TestObjectsMarshalling(object):
+    model = {'x': fields.Integer, 'y': fields.String(default='none')}
+
+    def test_namedtuple_is_an_object(self):
+        Point = namedtuple('Point', 'x y')
+
+        assert marshal(Point(1, 'a'), self.model) == {'x': 1, 'y': 'a'}
+        assert marshal([Point(1, None)] * 20, self.model) == [{'x': 1, 'y': 'none'}] * 20
+
+    def test_slotted_class(self):
+        class Point(object):
+            __slots__ = ('x', 'y')
+
+            def __init__(self, x, y=None):
+                self.x = x
+                self.y = y
+
+        data = [Point(i, str(i) if i % 2 else None) for i in range(20)]
+        assert marshal(data, self.model) == [{'x': i, 'y': str(i) if i % 2 else 'none'} for i in range(20)]
+        assert marshal(data[1], self.model) == {'x': 1, 'y': '1'}
+
+    def test_missing_attributes(self):
+        class Point(object):
+            __slots__ = ('x', 'y')
+
+        data = [Point() for _ in range(20)]
+        assert marshal(data, self.model) == [{'x': None, 'y': 'none'}] * 20
+
+
+class TestCooperativeMarshalling(object):
+    model = {'id': fields.Integer, 'name': fields.String}
+
+    async def test_same_output_as_marshal(self):
+        data = [{'id': i, 'name': str(i)} for i in range(25)]
+
+        for kwargs in ({}, {'envelope': 'items'}, {'ordered': True, 'envelope': 'items'}, {'skip_none': True}):
+            output = await marshal_async(data, self.model, chunk_size=10, **kwargs)
+            assert output == marshal(data, self.model, **kwargs)
+
+        assert await marshal_async(data[0], self.model) == marshal(data[0], self.model)
+
+    async def test_yield_to_event_loop(self, mocker):
+        sleep = mocker.spy(asyncio, 'sleep')
+
+        await marshal_async([{'id': 1}] * 10, self.model, chunk_size=3, budget=1e-9)
+
+        assert sleep.call_count == 4
+
+    async def test_no_yield_within_budget(self, mocker):
+        sleep = mocker.spy(asyncio, 'sleep')
+
+        await marshal_async([{'id': 1}] * 10, self.model, chunk_size=3, budget=60)
+
+        assert not sleep.called
+
+    @pytest.mark.config(restplus_marshal_async_min_items=10, restplus_marshal_async_chunk_size=3,
+                        restplus_marshal_async_budget=1e-9)
+    async def test_marshal_with_above_threshold(self, app, client, api, mocker):
+        @api.route('/items')
+        class Items(Resource):
+            @api.marshal_list_with(self.model, envelope='items')
+            async def get(self):
+                return [{'id': i} for i in range(int(request.args['count']))]
+
+        sleep = mocker.spy(asyncio, 'sleep')
+
+        response = await client.get('/items?count=9')
+        assert not sleep.called
+
+        response = await client.get('/items?count=10')
+        assert sleep.called
+        assert json.loads(await response.get_data(False)) == {'items': [{'id': i, 'name': None} for i in range(10)]}
+
+
+class TestResolvedMarshalling(object):
+    async def test_coroutine_attribute(self):
+        async def name(obj):
+            await asyncio.sleep(0)
+            return 'name-{0}'.format(obj['id'])
+
+        model = {'id': fields.Integer, 'name': fields.String(attribute=name)}
+
+        assert compile_marshaller(model).asynchronous
+        assert await marshal_async([{'id': 1}, {'id': 2}], model) == [
+            {'id': 1, 'name': 'name-1'},
+            {'id': 2, 'name': 'name-2'},
+        ]
+
+    async def test_awaitable_properties(self):
+        class Item(object):
+            def __init__(self, id):
+                self.id = id
+
+            @property
+            def owner(self):
+                async def owner():
+                    return {'name': 'owner-{0}'.format(self.id)}
+                return owner()
+
+        model = {'id': fields.Integer, 'owner': fields.Nested({'name': fields.String})}
+
+        assert not compile_marshaller(model).asynchronous
+        assert await marshal_async(Item(1), model) == {'id': 1, 'owner': {'name': 'owner-1'}}
+
+    async def test_nested_awaitables_are_resolved_by_rounds(self):
+        rounds = []
+
+        async def friends(obj):
+            rounds.append(('friends', obj['id']))
+            return [{'id': obj['id'] * 10 + i} for i in range(2)]
+
+        async def name(obj):
+            rounds.append(('name', obj['id']))
+            return str(obj['id'])
+
+        friend = {'id': fields.Integer, 'name': fields.String(attribute=name)}
+        model = {
+            'id': fields.Integer,
+            'name': fields.String(attribute=name),
+            'friends': fields.List(fields.Nested(friend), attribute=friends),
+            'inline': {'name': fields.String(attribute=name)},
+        }
+
+        output = await marshal_async([{'id': 1}, {'id': 2}], model)
+
+        assert output == [
+            {'id': 1, 'name': '1', 'inline': {'name': '1'},
+             'friends': [{'id': 10, 'name': '10'}, {'id': 11, 'name': '11'}]},
+            {'id': 2, 'name': '2', 'inline': {'name': '2'},
+             'friends': [{'id': 20, 'name': '20'}, {'id': 21, 'name': '21'}]},
+        ]
+        # Each value is awaited once, nested values once their parents are resolved
+        assert sorted(rounds[:4]) == [('friends', 1), ('friends', 2), ('name', 1), ('name', 2)]
+        assert sorted(rounds[4:]) == [('name', 10), ('name', 11), ('name', 20), ('name', 21)]
+
+    def test_marshal_requires_marshal_async(self):
+        async def name(obj):
+            return 'name'
+
+        model = {'id': fields.Integer, 'nested': fields.Nested({'name': fields.String(attribute=name)})}
+
+        with pytest.raises(TypeError) as excinfo:
+            marshal({'id': 1, 'nested': {}}, model)
+
+        assert 'marshal_async()' in str(excinfo.value)
+
+    async def test_concurrency_limit(self):
+        running = []
+        peak = []
+
+        async def name(obj):
+            running.append(obj)
+            peak.append(len(running))
+            await asyncio.sleep(0)
+            running.remove(obj)
+            return 'name'
+
+        model = {'name': fields.String(attribute=name)}
+
+        await marshal_async([{'id': i} for i in range(10)], model, limit=3)
+
+        assert max(peak) == 3
+
+    async def test_compiled_without_resolve(self):
+        async def name(obj):
+            return 'name'
+
+        model = {'name': fields.String(attribute=name)}
+
+        assert not compile_marshaller(model).resolving
+        assert compile_marshaller(model, resolve=True).resolving
+        assert compile_marshaller(model, resolve=True) is not compile_marshaller(model)
+        assert not compile_marshaller(model, resolve=True).offloadable
+
+    async def test_marshal_with_coroutine_attributes(self, app, client, api):
+        async def name(obj):
+            await asyncio.sleep(0)
+            return 'name-{0}'.format(obj['id'])
+
+        model = api.model('Item', {'id': fields.Integer, 'name': fields.String(attribute=name)})
+
+        @api.route('/items')
+        class Items(Resource):
+            @api.marshal_list_with(model, envelope='items')
+            async def get(self):
+                return [{'id': 1}, {'id': 2}]
+
+        response = await client.get('/items')
+
+        assert json.loads(await response.get_data(False)) == {'items': [
+            {'id': 1, 'name': 'name-1'},
+            {'id': 2, 'name': 'name-2'},
+        ]}
+
+    @pytest.mark.config(restplus_resolve_awaitables=True)
+    async def test_marshal_with_resolve_from_config(self, app, client, api):
+        class Item(object):
+            id = 1
+
+            @property
+            async def name(self):
+                return 'name'
+
+        model = api.model('Item', {'id': fields.Integer, 'name': fields.String})
+
+        @api.route('/item')
+        class ItemResource(Resource):
+            @api.marshal_with(model, direct=True)
+            async def get(self):
+                return Item()
+
+        response = await client.get('/item')
+
+        assert (await response.get_data(False)) == '{"id":1,"name":"name"}\n'
+
+    async def test_without_contextvars(self, app, client, api, mocker):
+        # Python 3.6 fallback
+        mocker.patch('quart_restplus.marshalling.resolved', TaskVar('resolved'))
+        mocker.patch('quart_restplus.marshalling._current', TaskVar('marshal_with'))
+        projections = []
+
+        async def name(obj):
+            await asyncio.sleep(0)
+            return 'name-{0}'.format(obj['id'])
+
+        model = api.model('Item', {
+            'id': fields.Integer,
+            'label': fields.String(attribute='title'),
+            'name': fields.String(attribute=name),
+        })
+
+        @api.route('/items')
+        class Items(Resource):
+            @api.marshal_list_with(model)
+            async def get(self):
+                projections.append(requested_fields())
+                return [{'id': 1}, {'id': 2}]
+
+        response = await client.get('/items', headers={'X-Fields': 'label,name'})
+
+        assert json.loads(await response.get_data(False)) == [
+            {'label': None, 'name': 'name-1'},
+            {'label': None, 'name': 'name-2'},
+        ]
+        assert projections == [['title']]
+        assert requested_fields() is None
+
+
+class TestRequestedFields(object):
+    @pytest.fixture
+    def model(self, api):
+        address = api.model('Address', {'city': fields.String, 'zip': fields.String(attribute='postal_code')})
+        return api.model('Person', {
+            'name': fields.String,
+            'age': fields.Integer,
+            'address': fields.Nested(address, attribute='home'),
+            'friends': fields.List(fields.Nested(address)),
+            'label': fields.FormattedString('{name} ({nickname})'),
+            'computed': fields.String(attribute=lambda obj: 'computed'),
+            'inline': {'x': fields.Integer(attribute='a.b')},
+        })
+
+    def test_projection(self, model):
+        assert compile_marshaller(model).projection == (
+            'name', 'age', 'home.city', 'home.postal_code', 'friends.city', 'friends.postal_code',
+            'nickname', 'a.b',
+        )
+
+    def test_masked_projection(self, model):
+        assert compile_marshaller(model, mask='name,address{zip},*').projection == (
+            'name', 'home.postal_code', 'age', 'friends.city', 'friends.postal_code', 'nickname', 'a.b',
+        )
+        assert compile_marshaller(model, mask='name,address{zip}').projection == ('name', 'home.postal_code')
+
+    def test_outside_marshal_with(self):
+        assert requested_fields() is None
+
+    async def test_requested_fields(self, app, client, api, model):
+        projections = []
+
+        @api.route('/person')
+        class Person(Resource):
+            @api.marshal_with(model, mask='name,age')
+            async def get(self):
+                projections.append(api.requested_fields())
+                return {'name': 'John'}
+
+        await client.get('/person')
+        await client.get('/person', headers={'X-Fields': 'name,address{city}'})
+
+        assert projections == [['name', 'age'], ['name', 'home.city']]
+        assert requested_fields() is None
+
+    async def test_model_default_mask(self, app, client, api):
+        model = api.model('Person', {'name': fields.String, 'age': fields.Integer}, mask='name')
+
+        @api.route('/person')
+        class Person(Resource):
+            @api.marshal_with(model)
+            def get(self):
+                return {'name': ','.join(requested_fields())}
+
+        assert await client.get_json('/person') == {'name': 'name'}
+
+
+class TestStreamedMarshalling(object):
+    @pytest.fixture
+    def resource(self, api):
+        model = api.model('Item', {'id': fields.Integer, 'name': fields.String})
+
+        def make_resource(data, **kwargs):
+            @api.route('/items')
+            class Items(Resource):
+                @api.marshal_list_with(model, stream=True, **kwargs)
+                async def get(self):
+                    return data()
+            return Items
+
+        return make_resource
+
+    async def test_stream_list(self, app, client, resource):
+        resource(lambda: [{'id': i, 'name': str(i)} for i in range(3)])
+
+        response = await client.get('/items')
+
+        assert response.status_code == 200
+        assert response.headers['Content-Type'] == 'application/json'
+        assert json.loads(await response.get_data(False)) == [
+            {'id': 0, 'name': '0'}, {'id': 1, 'name': '1'}, {'id': 2, 'name': '2'},
+        ]
+
+    @pytest.mark.config(restplus_stream_chunk_size=2)
+    async def test_stream_generator_with_envelope(self, app, client, resource):
+        resource(lambda: ({'id': i, 'name': None} for i in range(5)), envelope='items', skip_none=True)
+
+        response = await client.get('/items')
+
+        assert json.loads(await response.get_data(False)) == {'items': [{'id': i} for i in range(5)]}
+
+    async def test_stream_async_iterator(self, app, client, resource):
+        async def items():
+            for i in range(3):
+                yield {'id': i, 'name': 'foo', 'other': 'bar'}
+
+        resource(items)
+
+        response = await client.get('/items', headers={'X-Fields': 'id'})
+
+        assert json.loads(await response.get_data(False)) == [{'id': 0}, {'id': 1}, {'id': 2}]
+
+    async def test_stream_empty(self, app, client, resource):
+        resource(lambda: iter([]))
+
+        response = await client.get('/items')
+
+        assert (await response.get_data(False)) == '[]\n'
+
+    async def test_stream_keep_code_and_headers(self, app, client, resource):
+        resource(lambda: ([{'id': 1}], 201, {'X-Test': 'value'}))
+
+        response = await client.get('/items')
+
+        assert response.status_code == 201
+        assert response.headers['X-Test'] == 'value'
+        assert json.loads(await response.get_data(False)) == [{'id': 1, 'name': None}]
+
+    @pytest.mark.config(restplus_stream_chunk_size=2)
+    async def test_stream_resolves_awaitables_by_chunks(self, app, client, api):
+        resolved = []
+
+        async def name(obj):
+            await asyncio.sleep(0)
+            resolved.append(obj['id'])
+            return 'name-{0}'.format(obj['id'])
+
+        model = api.model('Item', {'id': fields.Integer, 'name': fields.String(attribute=name)})
+
+        @api.route('/items')
+        class Items(Resource):
+            @api.marshal_list_with(model, stream=True)
+            async def get(self):
+                async def items():
+                    for i in range(5):
+                        yield {'id': i}
+                return items()
+
+        response = await client.get('/items')
+
+        assert json.loads(await response.get_data(False)) == [{'id': i, 'name': 'name-{0}'.format(i)} for i in range(5)]
+        assert sorted(resolved) == list(range(5))
+
+    @pytest.mark.config(restplus_resolve_awaitables=True)
+    async def test_stream_resolves_awaitable_properties(self, app, client, api):
+        class Item(object):
+            def __init__(self, id):
+                self.id = id
+
+            @property
+            async def name(self):
+                return 'name-{0}'.format(self.id)
+
+        model = api.model('Item', {'id': fields.Integer, 'name': fields.String})
+
+        @api.route('/items')
+        class Items(Resource):
+            @api.marshal_list_with(model, stream=True)
+            async def get(self):
+                return (Item(i) for i in range(3))
+
+        response = await client.get('/items')
+
+        assert json.loads(await response.get_data(False)) == [{'id': i, 'name': 'name-{0}'.format(i)} for i in range(3)]
+
+    async def test_single_object_is_not_streamed(self):
+        @marshal_with({'id': fields.Integer}, stream=True)
+        async def try_me():
+            return {'id': 42}
+
+        assert (await try_me()) == {'id': 42}
+
+
+class TestDirectSerialization(object):
+    @pytest.fixture
+    def model(self):
+        class Custom(fields.Raw):
+            def output(self, key, obj, **kwargs):
+                return {'custom': obj.get('id')}
+
+        nested = Model('Nested', {'value': fields.Integer, 'other': fields.String(default='x')})
+        return Model('Model', {
+            'id': fields.Integer,
+            'name': fields.String,
+            'ratio': fields.Float,
+            'flag': fields.Boolean,
+            'created': fields.DateTime,
+            'raw': fields.Raw,
+            'custom': Custom,
+            'nested': fields.Nested(nested, allow_null=True),
+            'nesteds': fields.List(fields.Nested(nested)),
+            'strings': fields.List(fields.String),
+            'inline': {'id': fields.Integer},
+        })
+
+    @pytest.fixture
+    def data(self):
+        return [{
+            'id': i,
+            'name': 'név "{0}"'.format(i) if i % 3 else None,
+            'ratio': i / 3 if i % 5 else float('nan'),
+            'flag': i % 2,
+            'created': datetime(2011, 1, 1, i % 24),
+            'raw': {'values': [i]} if i % 4 else None,
+            'nested': {'value': i} if i % 2 else None,
+            'nesteds': [{'value': i}] * (i % 3) + ([None] if i == 7 else []),
+            'strings': ['a', 'b'],
+        } for i in range(40)]
+
+    @pytest.mark.parametrize('kwargs', [
+        {}, {'skip_none': True}, {'ordered': True}, {'envelope': 'data'}, {'mask': 'id,nested{value}'},
+    ])
+    def test_same_output_as_marshal(self, model, data, kwargs):
+        marshaller = compile_marshaller(model, **kwargs)
+
+        for value in (data, data[:3], data[1]):
+            expected = json.loads(json.dumps(marshal(value, model, **kwargs)))
+            assert json.loads(marshaller.dumps(value)) == expected
+
+    def test_output(self, model, data):
+        assert json.loads(compile_marshaller(model).dumps(data[1])) == {
+            'id': 1,
+            'name': 'név "1"',
+            'ratio': 1 / 3,
+            'flag': True,
+            'created': '2011-01-01T01:00:00',
+            'raw': {'values': [1]},
+            'custom': {'custom': 1},
+            'nested': {'value': 1, 'other': 'x'},
+            'nesteds': [{'value': 1, 'other': 'x'}],
+            'strings': ['a', 'b'],
+            'inline': {'id': 1},
+        }
+
+    def test_ordered_keys(self):
+        model = OrderedDict([('b', fields.Integer), ('a', fields.String)])
+
+        assert compile_marshaller(model, ordered=True).dumps({'a': 'x', 'b': 1}) == '{"b":1,"a":"x"}'
+
+    def test_fallback_encoder(self):
+        model = {'raw': fields.Raw}
+
+        assert compile_marshaller(model).dumps({'raw': {1, 2}}, lambda value: '"set"') == '{"raw":"set"}'
+
+    async def test_marshal_with_direct(self, app, client, api):
+        model = api.model('Item', {'id': fields.Integer, 'name': fields.String})
+
+        @api.route('/items')
+        class Items(Resource):
+            @api.marshal_list_with(model, direct=True, envelope='items')
+            async def get(self):
+                return [{'id': 1, 'name': 'foo', 'other': 'bar'}], 201, {'X-Test': 'value'}
+
+        response = await client.get('/items', headers={'X-Fields': 'id'})
+
+        assert response.status_code == 201
+        assert response.headers['Content-Type'] == 'application/json'
+        assert response.headers['X-Test'] == 'value'
+        assert (await response.get_data(False)) == '{"items":[{"id":1}]}\n'
+
+    @pytest.mark.config(restplus_direct_serialization=True)
+    async def test_direct_from_config(self, app, client, api):
+        model = api.model('Item', {'id': fields.Integer})
+
+        @api.route('/items')
+        class Items(Resource):
+            @api.marshal_with(model)
+            async def get(self):
+                return {'id': 42}
+
+        response = await client.get('/items')
+
+        assert (await response.get_data(False)) == '{"id":42}\n'
+
+    @pytest.mark.config(restplus_json={'indent': 2})
+    async def test_direct_honors_json_settings(self, app, client, api):
+        model = api.model('Item', {'id': fields.Integer})
+
+        @api.route('/items')
+        class Items(Resource):
+            @api.marshal_with(model, direct=True)
+            async def get(self):
+                return {'id': 42}
+
+        response = await client.get('/items')
+
+        assert (await response.get_data(False)) == '{\n  "id": 42\n}\n'
+
+    async def test_direct_in_debug(self, app, client, api):
+        app.debug = True
+        model = api.model('Item', {'id': fields.Integer})
+
+        @api.route('/items')
+        class Items(Resource):
+            @api.marshal_with(model, direct=True)
+            async def get(self):
+                return {'id': 42}
+
+        response = await client.get('/items')
+
+        assert (await response.get_data(False)) == '{\n    "id": 42\n}\n'
+
+    async def test_direct_honors_representations(self, app, client, api):
+        model = api.model('Item', {'id': fields.Integer})
+
+        @api.representation('application/xml')
+        async def xml(data, code, headers=None):
+            resp = await make_response('<id>{0}</id>'.format(data['id']), code)
+            resp.headers.extend(headers or {})
+            return resp
+
+        @api.route('/items')
+        class Items(Resource):
+            @api.marshal_with(model, direct=True)
+            async def get(self):
+                return {'id': 42}
+
+        response = await client.get('/items', headers={'Accept': 'application/xml'})
+
+        assert response.headers['Content-Type'] == 'application/xml'
+        assert (await response.get_data(False)) == '<id>42</id>'
+
+        response = await client.get('/items', headers={'Accept': 'application/json'})
+
+        assert response.headers['Content-Type'] == 'application/json'
+        assert (await response.get_data(False)) == '{"id":42}\n'
+
+    async def test_direct_honors_json_representation(self, app, client, api):
+        model = api.model('Item', {'id': fields.Integer})
+
+        @api.representation('application/json')
+        async def custom_json(data, code, headers=None):
+            return await make_response(json.dumps({'custom': data}), code)
+
+        @api.route('/items')
+        class Items(Resource):
+            @api.marshal_with(model, direct=True)
+            async def get(self):
+                return {'id': 42}
+
+        response = await client.get('/items')
+
+        assert (await response.get_data(False)) == '{"custom": {"id": 42}}'
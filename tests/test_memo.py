@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+import json
+import pytest
+
+from quart_restplus import Resource, fields
+from quart_restplus.marshalling import compile_marshaller
+from quart_restplus.memo import MarshallingMemo
+
+
+class Article(object):
+    def __init__(self, id, title, version=1):
+        self.id = id
+        self.title = title
+        self.version = version
+
+
+@pytest.fixture
+def model():
+    return {'id': fields.Integer, 'title': fields.String}
+
+
+class TestMarshallingMemo(object):
+    def test_memoize_by_identity(self, model):
+        memo = MarshallingMemo()
+        marshaller = compile_marshaller(model)
+
+        first = memo.marshal(marshaller, Article(1, 'first'))
+        again = memo.marshal(marshaller, Article(1, 'changed'))
+
+        assert first == {'id': 1, 'title': 'first'}
+        assert again is first
+        assert memo.info().hits == 1
+
+    def test_memoize_by_version(self, model):
+        memo = MarshallingMemo(version='version')
+        marshaller = compile_marshaller(model)
+
+        memo.marshal(marshaller, Article(1, 'first'))
+
+        assert memo.marshal(marshaller, Article(1, 'changed', 2)) == {'id': 1, 'title': 'changed'}
+        assert memo.marshal(marshaller, Article(1, 'changed again', 2)) == {'id': 1, 'title': 'changed'}
+
+    def test_lists_reuse_memoized_items(self, model, mocker):
+        memo = MarshallingMemo(version='version')
+        marshaller = compile_marshaller(model, envelope='items')
+        memo.marshal(marshaller, [Article(i, str(i)) for i in range(3)])
+        data = [Article(0, '0'), Article(1, 'changed', 2), Article(2, '2'), Article(3, '3')]
+        expected = marshaller(data)
+        marshal_many = mocker.spy(marshaller, 'marshal_many')
+
+        assert memo.marshal(marshaller, data) == expected
+        marshal_many.assert_called_once_with([data[1], data[3]])
+
+    def test_objects_without_identity(self, model):
+        memo = MarshallingMemo()
+        marshaller = compile_marshaller(model)
+
+        assert memo.marshal(marshaller, [{'title': 'a'}, {'title': 'b'}]) == [
+            {'id': None, 'title': 'a'},
+            {'id': None, 'title': 'b'},
+        ]
+        assert len(memo.cache) == 0
+
+    def test_distinct_masks(self, model):
+        memo = MarshallingMemo()
+        article = Article(1, 'title')
+
+        assert memo.marshal(compile_marshaller(model), article) == {'id': 1, 'title': 'title'}
+        assert memo.marshal(compile_marshaller(model, mask='id'), article) == {'id': 1}
+
+    def test_dumps(self, model):
+        memo = MarshallingMemo()
+        marshaller = compile_marshaller(model, envelope='items')
+        data = [Article(1, 'first'), Article(2, 'second')]
+
+        assert memo.dumps(marshaller, data) == marshaller.dumps(data)
+        assert memo.dumps(marshaller, data) == marshaller.dumps(data)
+        assert memo.info().hits == 2
+        # JSON fragments and dicts are memoized separately
+        assert memo.marshal(marshaller, data) == marshaller(data)
+
+    def test_maxsize(self, model):
+        memo = MarshallingMemo(maxsize=2)
+        marshaller = compile_marshaller(model)
+
+        memo.marshal(marshaller, [Article(i, str(i)) for i in range(3)])
+
+        assert memo.info().currsize == 2
+        assert memo.info().evictions == 1
+
+    def test_clear(self, model):
+        memo = MarshallingMemo()
+        memo.marshal(compile_marshaller(model), Article(1, 'title'))
+        memo.clear()
+
+        assert len(memo.cache) == 0
+
+    @pytest.mark.parametrize('kwargs', [{}, {'direct': True}, {'stream': True}], ids=['dict', 'direct', 'stream'])
+    async def test_marshal_with(self, app, client, api, kwargs):
+        memo = MarshallingMemo(version='version')
+        articles = {1: Article(1, 'first'), 2: Article(2, 'second')}
+        model = api.model('Article', {'id': fields.Integer, 'title': fields.String})
+
+        @api.route('/articles')
+        class Articles(Resource):
+            @api.marshal_list_with(model, envelope='items', memo=memo, **kwargs)
+            async def get(self):
+                return list(articles.values())
+
+        response = await client.get('/articles')
+        assert json.loads(await response.get_data(False)) == {'items': [
+            {'id': 1, 'title': 'first'},
+            {'id': 2, 'title': 'second'},
+        ]}
+
+        articles[2] = Article(2, 'updated', 2)
+        response = await client.get('/articles', headers={'X-Fields': 'title'})
+        assert json.loads(await response.get_data(False)) == {'items': [{'title': 'first'}, {'title': 'updated'}]}
+
+        response = await client.get('/articles')
+        assert json.loads(await response.get_data(False)) == {'items': [
+            {'id': 1, 'title': 'first'},
+            {'id': 2, 'title': 'updated'},
+        ]}
+        assert memo.info().hits == 1
@@ -614,6 +614,79 @@ class TestModel(object):
             model.validate(data, format_checker=FormatChecker())
 
 
+class TestModelCache(object):
+    def test_schema_is_cached(self):
+        model = Model('Person', {'name': fields.String})
+
+        assert model.__schema__ is model.__schema__
+
+    def test_schema_invalidated_on_mutation(self):
+        model = Model('Person', {'name': fields.String})
+        schema = model.__schema__
+
+        model['age'] = fields.Integer(required=True)
+
+        assert model.__schema__ is not schema
+        assert model.__schema__['required'] == ['age']
+        assert set(model.__schema__['properties']) == {'name', 'age'}
+
+        del model['age']
+
+        assert set(model.__schema__['properties']) == {'name'}
+
+    def test_schema_invalidated_on_parents_change(self):
+        parent = Model('Parent', {'name': fields.String})
+        other = Model('Other', {'name': fields.String})
+        child = parent.inherit('Child', {'age': fields.Integer})
+
+        assert child.__schema__['allOf'][0] == {'$ref': '#/definitions/Parent'}
+
+        child.__parents__ = [other]
+
+        assert child.__schema__['allOf'][0] == {'$ref': '#/definitions/Other'}
+
+    def test_schema_model(self):
+        model = SchemaModel('Person', {'type': 'object'})
+        schema = model.__schema__
+
+        assert model.__schema__ is schema
+
+        model._schema = {'type': 'string'}
+
+        assert model.__schema__ == {'type': 'string'}
+
+    def test_validator_is_cached(self):
+        from jsonschema import FormatChecker
+
+        model = Model('Person', {'name': fields.String})
+        checker = FormatChecker()
+        validator = model.validator()
+
+        assert model.validator() is validator
+        assert model.validator(format_checker=checker) is not validator
+        assert model.validator(format_checker=checker) is model.validator(format_checker=checker)
+
+        model['age'] = fields.Integer
+
+        assert model.validator(format_checker=checker).schema is model.__schema__
+
+    def test_validate_in_a_single_pass(self, mocker):
+        from quart.exceptions import BadRequest
+
+        model = Model('Person', {'name': fields.String(required=True), 'age': fields.Integer})
+        iter_errors = mocker.spy(model.validator(), 'iter_errors')
+
+        with pytest.raises(BadRequest) as excinfo:
+            model.validate({'age': 'x'})
+
+        # Nested values are validated by recursive calls
+        assert [call[0][0] for call in iter_errors.call_args_list].count({'age': 'x'}) == 1
+        assert excinfo.value.data['errors'] == {
+            'name': "'name' is a required property",
+            'age': "'x' is not of type 'integer'",
+        }
+
+
 class TestModelSchema(object):
     def test_model_schema(self):
         address = SchemaModel('Address', {
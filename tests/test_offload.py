@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+import json
+import threading
+import pytest
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from quart import request
+
+from quart_restplus import Api, Resource, fields
+from quart_restplus.marshalling import compile_marshaller
+from quart_restplus.offload import Offloader, OffloadInfo, make_offloader, offload_info
+
+
+class TestOffloader(object):
+    def test_thresholds(self):
+        offloader = Offloader(min_items=10, min_bytes=100)
+
+        assert offloader.should_offload(items=10)
+        assert offloader.should_offload(size=100)
+        assert not offloader.should_offload(items=9, size=99)
+        assert not offloader.should_offload()
+        max_workers = offloader.executor._max_workers
+        assert offloader.info() == OffloadInfo(inline=2, offloaded=0, running=0, max_workers=max_workers)
+
+    def test_disabled_thresholds(self):
+        offloader = Offloader(min_items=None, min_bytes=None)
+
+        assert not offloader.should_offload(items=10 ** 6, size=10 ** 9)
+
+    def test_custom_executor(self):
+        executor = ThreadPoolExecutor(2)
+        offloader = Offloader(executor)
+
+        assert offloader.executor is executor
+        assert offloader.info().max_workers == 2
+
+    def test_unsupported_executor(self):
+        with pytest.raises(ValueError):
+            Offloader('unknown')
+
+    def test_process_pool_executor(self):
+        executor = ProcessPoolExecutor(1)
+        try:
+            with pytest.raises(ValueError):
+                make_offloader({'RESTPLUS_OFFLOAD_EXECUTOR': executor})
+        finally:
+            executor.shutdown()
+
+    async def test_run(self):
+        offloader = Offloader()
+
+        thread = await offloader.run(threading.current_thread)
+
+        assert thread is not threading.current_thread()
+        assert offloader.info().offloaded == 1
+        assert offloader.info().running == 0
+
+    def test_disabled_by_default(self):
+        assert make_offloader({}) is None
+
+
+class TestOffloading(object):
+    @pytest.fixture
+    def resource(self, api):
+        model = api.model('Item', {'id': fields.Integer})
+
+        @api.route('/items')
+        class Items(Resource):
+            @api.marshal_list_with(model)
+            async def get(self):
+                return [{'id': i} for i in range(3)]
+
+            @api.expect(model, validate=True)
+            async def post(self):
+                return {}
+
+        return Items
+
+    @pytest.mark.config(restplus_offload_executor='thread', restplus_offload_min_items=3)
+    async def test_offload_marshalling_and_encoding(self, app, client, resource):
+        response = await client.get('/items')
+
+        assert json.loads(await response.get_data(False)) == [{'id': 0}, {'id': 1}, {'id': 2}]
+        async with app.app_context():
+            assert offload_info().offloaded == 2
+
+    @pytest.mark.config(restplus_offload_executor='thread')
+    async def test_small_payloads_stay_inline(self, app, client, resource):
+        await client.get('/items')
+
+        async with app.app_context():
+            info = offload_info()
+        assert info.offloaded == 0
+        assert info.inline == 2
+
+    @pytest.mark.config(restplus_offload_executor='thread', restplus_offload_min_bytes=1)
+    async def test_offload_validation(self, app, client, resource):
+        response = await client.post('/items', data=json.dumps({'id': 'not an int'}),
+                                     headers={'Content-Type': 'application/json'})
+
+        assert response.status_code == 400
+        async with app.app_context():
+            assert offload_info().offloaded == 1
+
+    async def test_disabled(self, app, client, resource):
+        await client.get('/items')
+
+        async with app.app_context():
+            assert offload_info() is None
+
+    def test_process_pool_executor_rejected_on_init(self, app):
+        executor = ProcessPoolExecutor(1)
+        app.config['RESTPLUS_OFFLOAD_EXECUTOR'] = executor
+        try:
+            with pytest.raises(ValueError):
+                Api(app)
+        finally:
+            executor.shutdown()
+
+    def test_request_context_fields_are_not_offloadable(self):
+        assert compile_marshaller({'id': fields.Integer, 'nested': fields.Nested({'id': fields.Integer})}).offloadable
+        assert not compile_marshaller({'url': fields.Url('endpoint')}).offloadable
+        assert not compile_marshaller({'nested': fields.Nested({'url': fields.Url('endpoint')})}).offloadable
+
+        class Host(fields.Raw):
+            def format(self, value):
+                return request.host + str(value)
+
+        class Upper(fields.String):
+            context_free = True
+
+            def format(self, value):
+                return str(value).upper()
+
+        assert not compile_marshaller({'host': Host}).offloadable
+        assert not compile_marshaller({'hosts': fields.List(Host)}).offloadable
+        assert not compile_marshaller({'urls': fields.List(fields.Url('endpoint'))}).offloadable
+        assert compile_marshaller({'name': Upper, 'names': fields.List(fields.String)}).offloadable
+
+    @pytest.mark.config(restplus_offload_executor='thread', restplus_offload_min_items=1)
+    async def test_request_context_formatters_stay_inline(self, app, client, api):
+        class Host(fields.Raw):
+            def format(self, value):
+                return request.host + str(value)
+
+        model = api.model('Host', {'host': Host(attribute='id')})
+
+        @api.route('/hosts')
+        class Hosts(Resource):
+            @api.marshal_list_with(model)
+            async def get(self):
+                return [{'id': i} for i in range(3)]
+
+        response = await client.get('/hosts')
+
+        assert response.status_code == 200
+        assert json.loads(await response.get_data(False)) == [{'host': 'localhost{0}'.format(i)} for i in range(3)]
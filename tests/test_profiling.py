@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+import json
+import pytest
+
+from quart_restplus import Resource, fields, marshal, marshal_with
+from quart_restplus.profiling import MarshallingProfiler, FieldCost
+
+
+@pytest.fixture
+def model(api):
+    address = api.model('Address', {'city': fields.String})
+    return api.model('Person', {
+        'name': fields.String,
+        'address': fields.Nested(address),
+    })
+
+
+class TestMarshallingProfiler(object):
+    def test_record_and_report(self):
+        profiler = MarshallingProfiler()
+        profiler.record('Person', 'name', 1, 0.001, 5)
+        profiler.record('Person', 'address', 1, 0.003, 20)
+        profiler.record('Person', 'name', 2, 0.001, 10)
+
+        assert profiler.report() == [
+            FieldCost('Person', 'address', 1, 0.003, 20),
+            FieldCost('Person', 'name', 3, 0.002, 15),
+        ]
+        assert profiler.report(1) == [FieldCost('Person', 'address', 1, 0.003, 20)]
+
+    def test_format(self):
+        profiler = MarshallingProfiler()
+        profiler.record('Person', 'name', 3, 0.002, 15)
+
+        assert profiler.format() == 'Person.name;dur=2.000;desc="3 calls, 15 bytes"'
+
+    def test_reset(self):
+        profiler = MarshallingProfiler()
+        profiler.record('Person', 'name', 1, 0.001, 5)
+        profiler.reset()
+
+        assert profiler.report() == []
+
+    def test_marshal_one(self, model):
+        profiler = MarshallingProfiler()
+        data = {'name': 'John', 'address': {'city': 'Paris'}}
+
+        assert marshal(data, model, profiler=profiler) == data
+        costs = {(cost.model, cost.field): cost for cost in profiler.report()}
+        assert set(costs) == {('Person', 'name'), ('Person', 'address'), ('Address', 'city')}
+        assert costs['Person', 'name'].calls == 1
+        assert costs['Person', 'name'].bytes == len('"John"')
+        assert costs['Address', 'city'].bytes == len('"Paris"')
+        assert costs['Person', 'address'].bytes == len('{"city":"Paris"}')
+        assert costs['Person', 'address'].time >= costs['Address', 'city'].time
+
+    def test_marshal_many(self, model):
+        profiler = MarshallingProfiler()
+        data = [{'name': 'John', 'address': {'city': 'Paris'}}] * 20
+
+        assert marshal(data, model, profiler=profiler) == data
+        costs = {(cost.model, cost.field): cost for cost in profiler.report()}
+        assert costs['Person', 'name'].calls == 20
+        assert costs['Person', 'name'].bytes == 20 * len('"John"')
+        assert costs['Address', 'city'].calls == 20
+
+    def test_profiled_marshallers_are_not_shared(self, model):
+        profiler = MarshallingProfiler()
+        marshal({'name': 'John'}, model, profiler=profiler)
+        marshal({'name': 'John'}, model)
+
+        assert profiler.report()[0].calls == 1
+
+
+class TestProfiledRequests(object):
+    @pytest.fixture
+    def resource(self, api, model):
+        @api.route('/people')
+        class People(Resource):
+            @api.marshal_list_with(model, profile=True)
+            async def get(self):
+                return [{'name': 'John', 'address': {'city': 'Paris'}}]
+
+            @api.marshal_with(model, direct=True, profile=True)
+            async def post(self):
+                return {'name': 'John'}
+
+            @api.marshal_with(model)
+            async def put(self):
+                return {'name': 'John'}
+
+        return People
+
+    @pytest.mark.config(restplus_profile_header='Server-Timing')
+    async def test_profile_header(self, client, resource):
+        response = await client.get('/people')
+
+        assert json.loads(await response.get_data(False)) == [{'name': 'John', 'address': {'city': 'Paris'}}]
+        assert 'Person.name;dur=' in response.headers['Server-Timing']
+        assert 'Address.city;dur=' in response.headers['Server-Timing']
+
+    @pytest.mark.config(restplus_profile_header='Server-Timing')
+    async def test_profile_direct_response(self, client, resource):
+        response = await client.post('/people')
+
+        assert 'Person.name;dur=' in response.headers['Server-Timing']
+
+    async def test_no_header_by_default(self, client, resource):
+        response = await client.get('/people')
+
+        assert 'Server-Timing' not in response.headers
+
+    @pytest.mark.config(restplus_profile_header='Server-Timing')
+    async def test_not_sampled(self, client, resource):
+        response = await client.put('/people')
+
+        assert 'Server-Timing' not in response.headers
+
+    @pytest.mark.config(restplus_profile_header='Server-Timing', restplus_profile_rate=1.)
+    async def test_sampled(self, client, resource):
+        response = await client.put('/people')
+
+        assert 'Person.name;dur=' in response.headers['Server-Timing']
+
+    async def test_outside_of_a_request(self, app, model, mocker):
+        @marshal_with(model, profile=True)
+        async def get_person():
+            return {'name': 'John'}
+
+        async with app.app_context():
+            info = mocker.patch.object(app.logger, 'info')
+            data, code, headers = await get_person()
+
+        assert data == {'name': 'John', 'address': {'city': None}}
+        assert info.call_args[0][:2] == ('Marshalling profile for %s: %s', get_person.__qualname__)
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+import json
+import pytest
+
+from datetime import datetime
+from decimal import Decimal
+from uuid import UUID
+
+from quart_restplus import Api, Resource
+from quart_restplus.representations import JSON_ENCODERS, make_json_encoder, register_json_encoder, json_default
+
+DATA = {'date': datetime(2018, 1, 2, 3, 4, 5), 'uuid': UUID(int=1), 'decimal': Decimal('1.10')}
+
+
+class TestJsonEncoders(object):
+    def test_default_encoder(self):
+        encode = make_json_encoder({})
+        assert encode({'foo': 3.0}) == b'{"foo": 3.0}'
+
+    def test_settings(self):
+        encode = make_json_encoder({'RESTPLUS_JSON': {'sort_keys': True, 'separators': (',', ':')}})
+        assert encode({'b': 1, 'a': 2}) == b'{"a":2,"b":1}'
+
+    def test_settings_are_not_mutated(self):
+        settings = {'sort_keys': True}
+        make_json_encoder({'RESTPLUS_JSON': settings}, debug=True)
+        assert settings == {'sort_keys': True}
+
+    def test_debug_indent(self):
+        encode = make_json_encoder({}, debug=True)
+        assert encode({'foo': 'bar'}) == b'{\n    "foo": "bar"\n}'
+
+    def test_custom_encoder_class(self):
+        class Encoder(json.JSONEncoder):
+            def default(self, obj):
+                return 'custom'
+
+        encode = make_json_encoder({'RESTPLUS_JSON': {'cls': Encoder}})
+        assert encode({'foo': object()}) == b'{"foo": "custom"}'
+
+    def test_native_types(self):
+        encode = make_json_encoder({'RESTPLUS_JSON_NATIVE_TYPES': True, 'RESTPLUS_JSON': {'sort_keys': True}})
+        assert json.loads(encode(DATA)) == {
+            'date': '2018-01-02T03:04:05',
+            'uuid': '00000000-0000-0000-0000-000000000001',
+            'decimal': '1.10',
+        }
+
+    def test_native_types_disabled(self):
+        with pytest.raises(TypeError):
+            make_json_encoder({})(DATA)
+
+    def test_json_default_unsupported(self):
+        with pytest.raises(TypeError):
+            json_default(object())
+
+    def test_orjson(self):
+        pytest.importorskip('orjson')
+        encode = make_json_encoder({'RESTPLUS_JSON_ENCODER': 'orjson', 'RESTPLUS_JSON_NATIVE_TYPES': True})
+        assert json.loads(encode(DATA)) == {
+            'date': '2018-01-02T03:04:05',
+            'uuid': '00000000-0000-0000-0000-000000000001',
+            'decimal': '1.10',
+        }
+        assert encode({1: 'int key'}) == b'{"1":"int key"}'
+
+    def test_unknown_encoder(self):
+        with pytest.raises(ValueError):
+            make_json_encoder({'RESTPLUS_JSON_ENCODER': 'unknown'})
+
+    def test_register_encoder(self):
+        @register_json_encoder('test')
+        def encoder(settings, native_types=False):
+            return lambda data: b'encoded'
+
+        try:
+            assert make_json_encoder({'RESTPLUS_JSON_ENCODER': 'test'})({}) == b'encoded'
+        finally:
+            del JSON_ENCODERS['test']
+
+    @pytest.mark.config(restplus_json={'separators': (',', ':')})
+    async def test_encoder_resolved_on_init(self, app, client):
+        api = Api(app)
+
+        @api.route('/test')
+        class Test(Resource):
+            def get(self):
+                return {'foo': 'bar'}
+
+        app.config['RESTPLUS_JSON'] = {}
+
+        response = await client.get('/test')
+        assert (await response.get_data()) == b'{"foo":"bar"}\n'
@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+import asyncio
 import pytest
 
 from quart_restplus import utils
@@ -119,3 +120,81 @@ class TestUnpack(object):
     def test_too_many_values(self):
         with pytest.raises(ValueError):
             utils.unpack((None, None, None, None))
+
+
+class TestLRUCache(object):
+    def test_evict_least_recently_used(self):
+        cache = utils.LRUCache(2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        assert 'a' in cache
+        assert 'b' not in cache
+        assert cache.info() == utils.CacheInfo(hits=1, misses=0, evictions=1, maxsize=2, currsize=2)
+
+    def test_ttl(self, mocker):
+        now = mocker.patch('time.monotonic', return_value=100.)
+        cache = utils.LRUCache(2, ttl=10)
+        cache.set('a', 1)
+
+        now.return_value = 109.
+        assert cache.get('a') == 1
+
+        now.return_value = 110.
+        assert cache.get('a') is None
+        assert len(cache) == 0
+        assert cache.info() == utils.CacheInfo(hits=1, misses=1, evictions=1, maxsize=2, currsize=0)
+
+
+class TestCurrentTask(object):
+    def test_outside_of_a_task(self):
+        assert utils.current_task() is None
+
+    async def test_in_a_task(self):
+        async def current():
+            return utils.current_task()
+
+        task = asyncio.ensure_future(current())
+
+        assert await task is task
+
+
+class TestTaskVar(object):
+    def test_default(self):
+        var = utils.TaskVar('var', default='default')
+
+        assert var.get() == 'default'
+
+    def test_set_and_reset(self):
+        var = utils.TaskVar('var')
+        first = var.set(1)
+        second = var.set(2)
+
+        assert var.get() == 2
+        var.reset(second)
+        assert var.get() == 1
+        var.reset(first)
+        assert var.get() is None
+
+    async def test_local_to_tasks(self):
+        var = utils.TaskVar('var')
+        started = asyncio.Event()
+        done = asyncio.Event()
+
+        async def other():
+            var.set('other')
+            started.set()
+            await done.wait()
+            return var.get()
+
+        task = asyncio.ensure_future(other())
+        await started.wait()
+        token = var.set('current')
+        done.set()
+
+        assert await task == 'other'
+        assert var.get() == 'current'
+        var.reset(token)
+        assert var.get() is None
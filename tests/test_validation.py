@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from jsonschema import Draft4Validator, FormatChecker, RefResolver
+from jsonschema.exceptions import RefResolutionError
+
+from quart.exceptions import BadRequest
+
+from quart_restplus import Api, Model, Resource, SchemaModel, fields
+from quart_restplus.validation import CompiledValidator
+
+
+address = Model('Address', {
+    'road': fields.String(required=True, min_length=2, max_length=20, pattern='^[a-z ]+$'),
+    'number': fields.Integer(min=1, max=100, exclusiveMax=True),
+})
+
+person = Model('Person', {
+    'name': fields.String(required=True, enum=['alice', 'bob']),
+    'score': fields.Float(min=0, exclusiveMin=True, multiple=0.5),
+    'level': fields.Integer(multiple=2),
+    'address': fields.Nested(address),
+    'previous': fields.List(fields.Nested(address), min_items=1, max_items=2),
+    'work': fields.Nested(address, description='The work address'),
+    'ips': fields.List(fields.String(pattern=r'^\d+(\.\d+){3}$')),
+    'scores': fields.Wildcard(fields.Integer),
+    'born': fields.DateTime,
+    'email': fields.String(required=True),
+})
+
+child = person.inherit('Child', {
+    'school': fields.String(required=True),
+    'parent': fields.Nested(person, allow_null=True),
+})
+
+resolver = RefResolver.from_schema({'definitions': {
+    model.name: model.__schema__ for model in (address, person, child)
+}})
+
+
+def jsonschema_errors(schema, data, format_checker=None):
+    validator = Draft4Validator(schema, resolver=resolver, format_checker=format_checker)
+    return dict(child.format_error(e) for e in validator.iter_errors(data))
+
+
+PAYLOADS = [
+    {},
+    [],
+    'child',
+    None,
+    {'name': 'alice', 'email': 'a@b.c', 'school': 'school'},
+    {'name': 'carol', 'email': 1, 'school': True, 'score': 0, 'level': 3},
+    {'name': 'bob', 'score': 1.3, 'level': True, 'address': {'road': 'A'}},
+    {'address': {'road': 'main street', 'number': 100}, 'work': {'number': 0}, 'previous': []},
+    {'previous': [{'road': 'x'}, {}, 3], 'ips': ['127.0.0.1', 'localhost', 42]},
+    {'scores': {'math': 1, 'music': 'high'}, 'born': 'yesterday', 'parent': None},
+    {'parent': {'name': 'alice', 'address': {'road': 1}, 'parent': {}}},
+]
+
+
+class TestCompiledValidator(object):
+    @pytest.mark.parametrize('data', PAYLOADS)
+    def test_same_errors_as_jsonschema(self, data):
+        validator = CompiledValidator(child.__schema__, resolver=resolver)
+
+        assert validator.errors(data) == jsonschema_errors(child.__schema__, data)
+
+    @pytest.mark.parametrize('data', PAYLOADS)
+    def test_same_errors_as_jsonschema_with_format_checker(self, data):
+        checker = FormatChecker()
+        validator = CompiledValidator(child.__schema__, resolver=resolver, format_checker=checker)
+
+        assert validator.errors(data) == jsonschema_errors(child.__schema__, data, checker)
+
+    def test_valid(self):
+        validator = CompiledValidator(child.__schema__, resolver=resolver)
+
+        assert validator.errors({
+            'name': 'bob',
+            'email': 'bob@example.com',
+            'school': 'school',
+            'address': {'road': 'main street', 'number': 99},
+            'parent': {'name': 'alice', 'email': 'alice@example.com'},
+        }) == {}
+
+    def test_references_are_compiled_once(self):
+        validator = CompiledValidator(child.__schema__, resolver=resolver)
+
+        assert validator.source.count('def ') == 3
+        assert 'fallback' not in validator.source
+
+    def test_recursive_model(self):
+        node = Model('Node', {'name': fields.String(required=True)})
+        node['children'] = fields.List(fields.Nested(node))
+        resolver = RefResolver.from_schema({'definitions': {'Node': node.__schema__}})
+        validator = CompiledValidator(node.__schema__, resolver=resolver)
+
+        assert validator.errors({'name': 'root', 'children': [{'children': [{'name': 1}]}]}) == {
+            'children.0.name': "'name' is a required property",
+            'children.0.children.0.name': "1 is not of type 'string'",
+        }
+
+    def test_fallback_for_unsupported_keywords(self):
+        schema = {
+            'type': 'object',
+            'properties': {
+                'tags': {'type': 'array', 'uniqueItems': True},
+                'id': {'oneOf': [{'type': 'integer'}, {'type': 'string', 'minLength': 3}]},
+                'name': {'type': 'string'},
+            },
+            'required': ['name'],
+        }
+        validator = CompiledValidator(schema)
+
+        assert validator.source.count('fallback(') == 2
+        for data in ({}, {'tags': [1, 1], 'id': 'ab', 'name': 1}, {'tags': [1, True], 'id': 1, 'name': 'x'}):
+            assert validator.errors(data) == jsonschema_errors(schema, data)
+
+    def test_fallback_keeps_required_keys(self):
+        schema = {
+            'properties': {
+                'nested': {'required': ['name'], 'not': {'type': 'null'}},
+            },
+        }
+        validator = CompiledValidator(schema)
+
+        assert validator.errors({'nested': {}}) == {'nested.name': "'name' is a required property"}
+
+    def test_unresolvable_reference_raises_when_reached(self):
+        schema = {'properties': {'owner': {'$ref': '#/definitions/Unknown'}}}
+        validator = CompiledValidator(schema)
+
+        assert validator.errors({}) == {}
+        with pytest.raises(RefResolutionError):
+            validator.errors({'owner': {}})
+
+    def test_schema_model(self):
+        model = SchemaModel('Point', {
+            'type': 'object',
+            'properties': {
+                'x': {'type': 'number', 'maximum': 10},
+                'y': {'type': ['number', 'null']},
+            },
+            'additionalProperties': False,
+        })
+        validator = CompiledValidator(model.__schema__)
+
+        for data in ({'x': 11, 'y': 'a'}, {'x': 1, 'z': 2}):
+            assert validator.errors(data) == jsonschema_errors(model.__schema__, data)
+
+
+class TestModelValidationBackend(object):
+    def test_compiled_validator_is_cached(self):
+        validator = child.validator(resolver, backend='compiled')
+
+        assert isinstance(validator, CompiledValidator)
+        assert child.validator(resolver, backend='compiled') is validator
+        assert child.validator(resolver) is not validator
+
+    def test_unknown_backend(self):
+        with pytest.raises(ValueError):
+            child.validator(resolver, backend='unknown')
+
+    @pytest.mark.parametrize('backend', ['jsonschema', 'compiled'])
+    def test_errors(self, backend):
+        assert child.errors({'name': 'carol', 'email': 'a@b.c'}, resolver, backend=backend) == {
+            'name': "'carol' is not one of ['alice', 'bob']",
+            'school': "'school' is a required property",
+        }
+        assert child.errors({'name': 'bob', 'email': 'a@b.c', 'school': 'x'}, resolver, backend=backend) == {}
+
+    def test_validate(self):
+        with pytest.raises(BadRequest) as excinfo:
+            child.validate({'name': 'carol'}, resolver, backend='compiled')
+
+        assert excinfo.value.data['errors'] == {
+            'name': "'carol' is not one of ['alice', 'bob']",
+            'email': "'email' is a required property",
+            'school': "'school' is a required property",
+        }
+
+
+class TestApiValidationBackend(object):
+    async def test_compiled_backend(self, app, client):
+        app.config['RESTPLUS_VALIDATION_BACKEND'] = 'compiled'
+        api = Api(app, validate=True)
+        user = api.model('User', {'name': fields.String(required=True)})
+        group = api.model('Group', {'owner': fields.Nested(user), 'members': fields.List(fields.Nested(user))})
+
+        @api.route('/groups/')
+        class Groups(Resource):
+            @api.expect(group)
+            def post(self):
+                return {}
+
+        out = await client.post_json('/groups/', {'owner': {}, 'members': [{'name': 'x'}, {'name': 1}]}, status=400)
+
+        assert out['errors'] == {
+            'owner.name': "'name' is a required property",
+            'members.1.name': "1 is not of type 'string'",
+        }
+        assert isinstance(group.validator(api.refresolver, backend='compiled'), CompiledValidator)
+
+    async def test_unknown_backend(self, app):
+        app.config['RESTPLUS_VALIDATION_BACKEND'] = 'unknown'
+
+        with pytest.raises(ValueError):
+            Api(app)